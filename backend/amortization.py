@@ -0,0 +1,218 @@
+"""
+Vektorisierte Tilgungspläne (NumPy)
+Berechnet viele Tilgungspläne gleichzeitig - eine Zeile pro Plan, eine Spalte pro Jahr.
+Gedacht für Szenarien, Sensitivitäten und Batch-Auswertungen, bei denen dieselbe
+Jahresschleife sonst hunderte Male in Python laufen würde.
+
+Die Rechenschritte und ihre Reihenfolge entsprechen exakt dem bisherigen
+calculate_tilgungsplan (gleiche Float-Operationen, Summen und Wachstum werden
+sequentiell akkumuliert) - tilgungsplan_view liefert daher dieselben Dicts
+bis auf die letzte Nachkommastelle.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Spalten der Jahresprojektion (Form: Pläne x Jahre)
+JAHRES_FELDER = (
+    "restschuld", "getilgt", "zinsen_jahr", "tilgung_jahr", "jaehrlicher_cashflow",
+    "monatlicher_cashflow", "immobilienwert", "eigenkapital_aufbau", "gesamtvermoegen", "aktuelle_miete",
+)
+
+# Kennzahlen pro Plan (Form: Pläne)
+PLAN_FELDER = (
+    "finanzierungssumme", "eigenkapital", "kaufpreis", "jaehrliche_rate",
+    "gesamte_zinsen", "gesamte_tilgung", "restschuld_ende",
+)
+
+
+def tilgungsplan_batch(
+    kaufpreis,
+    eigenkapital,
+    zinssatz,
+    tilgung,
+    monatliche_miete,
+    nebenkosten,
+    jahre: int = 30,
+    mietsteigerung=1.5,
+    wertsteigerung=1.5
+) -> Dict[str, np.ndarray]:
+    """
+    Berechnet beliebig viele Tilgungspläne auf einmal.
+    Alle Parameter außer jahre dürfen Skalare oder 1D-Arrays gleicher Länge sein (Broadcasting).
+
+    Args:
+        kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten,
+        mietsteigerung, wertsteigerung: wie calculate_tilgungsplan
+        jahre: Laufzeit in Jahren (für alle Pläne gleich)
+
+    Returns:
+        Dict mit Arrays (Pläne x Jahre) für JAHRES_FELDER und Arrays (Pläne,) für
+        finanzierungssumme, eigenkapital, jaehrliche_rate, gesamte_zinsen, gesamte_tilgung, restschuld_ende
+    """
+    kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten, mietsteigerung, wertsteigerung = (
+        np.atleast_1d(np.asarray(wert, dtype=float)) for wert in np.broadcast_arrays(
+            kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten, mietsteigerung, wertsteigerung
+        )
+    )
+    finanzierungssumme = kaufpreis - eigenkapital
+    jaehrliche_rate = finanzierungssumme * ((zinssatz + tilgung) / 100)
+    zins_faktor = zinssatz / 100
+
+    # Intern Jahre x Pläne (zusammenhängende Zeilen pro Jahr), nach außen Pläne x Jahre
+    anzahl = finanzierungssumme.shape[0]
+    restschuld, getilgt_kumuliert, zinsen, tilgung_jahr, miete, immobilienwert = (
+        np.empty((jahre, anzahl)) for _ in range(6)
+    )
+    miet_faktor = 1 + mietsteigerung / 100
+    wert_faktor = 1 + wertsteigerung / 100
+
+    # Jedes Jahr hängt vom Vorjahr ab - Schleife über die Jahre, vektorisiert über die Pläne.
+    # Summen und Wachstum werden wie in der Python-Schleife Jahr für Jahr akkumuliert.
+    rest = finanzierungssumme
+    gesamte_zinsen = np.zeros(anzahl)
+    for jahr in range(jahre):
+        np.multiply(rest, zins_faktor, out=zinsen[jahr])
+        gesamte_zinsen += zinsen[jahr]
+        getilgt = np.subtract(jaehrliche_rate, zinsen[jahr], out=tilgung_jahr[jahr])
+        np.copyto(getilgt, rest, where=getilgt > rest)  # nicht mehr tilgen als Restschuld
+        rest = np.maximum(0.0, rest - getilgt, out=restschuld[jahr])
+        if jahr == 0:
+            getilgt_kumuliert[0] = getilgt
+            miete[0] = monatliche_miete
+            immobilienwert[0] = kaufpreis
+        else:
+            np.add(getilgt_kumuliert[jahr - 1], getilgt, out=getilgt_kumuliert[jahr])
+            np.multiply(miete[jahr - 1], miet_faktor, out=miete[jahr])
+            np.multiply(immobilienwert[jahr - 1], wert_faktor, out=immobilienwert[jahr])
+
+    jaehrlicher_cashflow = (miete * 12) - jaehrliche_rate - (nebenkosten * 12)
+
+    jahres_werte = {
+        "restschuld": restschuld,
+        "getilgt": getilgt_kumuliert,
+        "zinsen_jahr": zinsen,
+        "tilgung_jahr": tilgung_jahr,
+        "jaehrlicher_cashflow": jaehrlicher_cashflow,
+        "monatlicher_cashflow": jaehrlicher_cashflow / 12,
+        "immobilienwert": immobilienwert,
+        "eigenkapital_aufbau": eigenkapital + getilgt_kumuliert,
+        "gesamtvermoegen": immobilienwert - restschuld,
+        "aktuelle_miete": miete,
+    }
+    leer = not jahre
+    return {
+        **{feld: werte.T for feld, werte in jahres_werte.items()},
+        "finanzierungssumme": finanzierungssumme,
+        "eigenkapital": eigenkapital,
+        "kaufpreis": kaufpreis,
+        "jaehrliche_rate": jaehrliche_rate,
+        "gesamte_zinsen": gesamte_zinsen,
+        "gesamte_tilgung": np.zeros_like(finanzierungssumme) if leer else getilgt_kumuliert[-1],
+        "restschuld_ende": finanzierungssumme if leer else rest,
+    }
+
+
+def plan_dict(
+    spalten: List[List[float]],
+    werte: Dict[str, float],
+    eingaben: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Dict im Format von calculate_tilgungsplan aus den Jahres-Spalten und Kennzahlen eines Plans.
+    eingaben: ursprüngliche Skalare (kaufpreis, eigenkapital, monatliche_miete), damit ganzzahlige
+    Eingaben im JSON ganzzahlig bleiben wie in der früheren Jahresschleife.
+    """
+    eingaben = eingaben or {}
+    gerundet = dict(zip(JAHRES_FELDER, ([round(wert, 2) for wert in spalte] for spalte in spalten)))
+    anzahl_jahre = len(spalten[0])
+
+    # Typen wie in der Jahresschleife: max(0, ...) liefert nach der Tilgung die Ganzzahl 0,
+    # in den Folgejahren wird (bei positiver Rate) genau diese 0 getilgt
+    for jahr, wert in enumerate(spalten[0]):
+        if wert <= 0:
+            gerundet["restschuld"][jahr] = 0
+            if jahr + 1 < anzahl_jahre and werte["jaehrliche_rate"] > 0:
+                gerundet["tilgung_jahr"][jahr + 1] = 0
+    if anzahl_jahre:
+        # Im ersten Jahr stehen Kaufpreis und Miete noch unverändert im Plan
+        if "kaufpreis" in eingaben:
+            gerundet["immobilienwert"][0] = round(eingaben["kaufpreis"], 2)
+            if spalten[0][0] <= 0:
+                gerundet["gesamtvermoegen"][0] = round(eingaben["kaufpreis"], 2)
+        if "monatliche_miete" in eingaben:
+            gerundet["aktuelle_miete"][0] = round(eingaben["monatliche_miete"], 2)
+
+    jahres_projektionen = [
+        dict(zip(("jahr",) + JAHRES_FELDER, zeile))
+        for zeile in zip(range(1, anzahl_jahre + 1), *gerundet.values())
+    ]
+
+    kaufpreis = eingaben.get("kaufpreis", werte["kaufpreis"])
+    eigenkapital = eingaben.get("eigenkapital", werte["eigenkapital"])
+    if "kaufpreis" in eingaben and "eigenkapital" in eingaben:
+        finanzierungssumme = kaufpreis - eigenkapital
+    else:
+        finanzierungssumme = werte["finanzierungssumme"]
+    jaehrliche_rate = werte["jaehrliche_rate"]
+    gesamte_zinsen = werte["gesamte_zinsen"] if anzahl_jahre else 0
+    gesamte_tilgung = werte["gesamte_tilgung"] if anzahl_jahre else 0
+    restschuld = werte["restschuld_ende"] if anzahl_jahre else finanzierungssumme
+    if restschuld <= 0 and anzahl_jahre:
+        restschuld = 0
+    letztes_jahr = jahres_projektionen[-1] if jahres_projektionen else None
+    erstes_jahr = jahres_projektionen[0] if jahres_projektionen else None
+
+    zusammenfassung = {
+        "finanzierungssumme": round(finanzierungssumme, 2),
+        "eigenkapital_start": round(eigenkapital, 2),
+        "jaehrliche_rate": round(jaehrliche_rate, 2),
+        "monatliche_rate": round(jaehrliche_rate / 12, 2),
+        "gesamte_zinsen": round(gesamte_zinsen, 2),
+        "gesamte_tilgung": round(gesamte_tilgung, 2),
+        "gesamtkosten": round(gesamte_zinsen + finanzierungssumme, 2),
+        "restschuld_nach_laufzeit": round(restschuld, 2),
+        "immobilienwert_nach_laufzeit": letztes_jahr["immobilienwert"] if letztes_jahr else kaufpreis,
+        "gesamtvermoegen_nach_laufzeit": letztes_jahr["gesamtvermoegen"] if letztes_jahr else eigenkapital,
+        "cashflow_jahr_1": erstes_jahr["jaehrlicher_cashflow"] if erstes_jahr else 0,
+        "cashflow_jahr_final": letztes_jahr["jaehrlicher_cashflow"] if letztes_jahr else 0,
+        "kredit_abbezahlt_in_jahren": len(jahres_projektionen) if restschuld <= 0 else None
+    }
+
+    return {
+        "jahre": jahres_projektionen,
+        "zusammenfassung": zusammenfassung
+    }
+
+
+def tilgungsplan_view(
+    batch: Dict[str, np.ndarray],
+    index: int = 0,
+    eingaben: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    Ein Plan aus tilgungsplan_batch im Format von calculate_tilgungsplan
+    ({"jahre": [...], "zusammenfassung": {...}}).
+    eingaben: die an tilgungsplan_batch übergebenen Skalare (siehe plan_dict)
+    """
+    spalten = [batch[feld][index].tolist() for feld in JAHRES_FELDER]
+    return plan_dict(spalten, {feld: float(batch[feld][index]) for feld in PLAN_FELDER}, eingaben)
+
+
+def tilgungsplan_views(
+    batch: Dict[str, np.ndarray],
+    eingaben: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    """
+    Alle Pläne eines Batches im Dict-Format (Arrays werden nur einmal in Listen umgewandelt).
+    eingaben: Skalare, die für alle Pläne gelten (siehe plan_dict)
+    """
+    spalten = [batch[feld].tolist() for feld in JAHRES_FELDER]
+    werte = {feld: batch[feld].tolist() for feld in PLAN_FELDER}
+    return [
+        plan_dict(
+            [spalte[index] for spalte in spalten], {feld: liste[index] for feld, liste in werte.items()}, eingaben
+        )
+        for index in range(len(werte["finanzierungssumme"]))
+    ]
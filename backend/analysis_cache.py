@@ -0,0 +1,106 @@
+"""
+Inhaltsadressierter Cache für KI-Bewertungen
+Wird dasselbe Exposé erneut analysiert (Reload, Tab-Wechsel, Retry nach Timeout),
+werden Kriterien-Scores, Stärken, Schwächen und Zusammenfassung aus einer früheren
+Analyse desselben Users übernommen - ohne neuen KI-Call.
+Alle deterministischen Zahlen werden trotzdem neu berechnet.
+
+Schlüssel = SHA-256 über:
+- normalisierte PropertyData
+- Verwendungszweck
+- Fingerabdruck der Marktdaten
+- Version der Wissensdatei (SHA-256 von KNOWLEDGE.md)
+- KI-Modell
+"""
+
+from typing import Any, Dict, Optional
+import hashlib
+import json
+
+from sqlalchemy.orm import Session
+
+from models import Analysis
+
+LIVE_METHODE = "live_web_search_v3"
+
+_stats = {"hits": 0, "misses": 0, "force_refresh": 0, "nicht_cachebar": 0}
+
+
+def _canonical(value: Any) -> Any:
+    """Normalisiert Werte für einen stabilen Hash (leere Werte weg, Strings getrimmt, 300000 == 300000.0)"""
+    if isinstance(value, dict):
+        return {k: _canonical(v) for k, v in sorted(value.items()) if v is not None and v != ""}
+    if isinstance(value, (list, tuple)):
+        return [_canonical(v) for v in value]
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _fingerprint(value: Any) -> str:
+    """SHA-256 über die kanonische JSON-Darstellung"""
+    canonical = json.dumps(_canonical(value), sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def analysis_cache_key(
+    property_data: Dict[str, Any],
+    verwendungszweck: str,
+    marktdaten: Optional[Dict[str, Any]],
+    knowledge_version: Optional[str],
+    model: str
+) -> Optional[str]:
+    """
+    Berechnet den Cache-Schlüssel einer KI-Bewertung.
+
+    Returns:
+        Hex-Hash oder None, wenn die Bewertung nicht gecacht werden soll
+        (Marktdaten sind nur Fallback-Werte)
+    """
+    if marktdaten and marktdaten.get("recherche_methode") != LIVE_METHODE:
+        return None
+
+    return _fingerprint({
+        "property_data": property_data,
+        "verwendungszweck": verwendungszweck,
+        "marktdaten": _fingerprint(marktdaten) if marktdaten else None,
+        "knowledge": knowledge_version,
+        "model": model,
+    })
+
+
+def find_cached_analysis(db: Session, user_id: int, cache_key: Optional[str], force_refresh: bool = False) -> Optional[Analysis]:
+    """
+    Sucht die neueste Analyse des Users mit demselben Schlüssel.
+    Nur Analysen desselben Users werden wiederverwendet.
+    """
+    if force_refresh:
+        _stats["force_refresh"] += 1
+        return None
+    if cache_key is None:
+        _stats["nicht_cachebar"] += 1
+        return None
+
+    analysis = db.query(Analysis)\
+        .filter(Analysis.user_id == user_id, Analysis.ai_cache_key == cache_key)\
+        .order_by(Analysis.created_at.desc())\
+        .first()
+
+    if analysis and (analysis.analysis_result or {}).get("kriterien"):
+        _stats["hits"] += 1
+        return analysis
+
+    _stats["misses"] += 1
+    return None
+
+
+def get_analysis_cache_stats() -> Dict[str, Any]:
+    """Hit/Miss-Zähler für die Admin-Statistik (pro Prozess)"""
+    anfragen = _stats["hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "anfragen": anfragen,
+        "hit_rate": round(_stats["hits"] / anfragen, 3) if anfragen else None,
+    }
@@ -0,0 +1,309 @@
+"""
+Hintergrund-Jobs für Analysen
+POST /analyze/jobs gibt sofort eine Job-ID zurück, ein begrenzter Worker-Pool im
+Prozess führt die Analyse-Pipeline aus. Der Client fragt GET /analyze/jobs/{id} ab -
+keine HTTP-Verbindung muss die volle Recherche + KI-Bewertung lang offen bleiben
+(Proxy-Timeouts beim Hosting, abbrechende Mobilfunk-Verbindungen).
+
+Job-Speicher (ANALYSIS_JOB_STORE):
+- memory: Jobs nur im Prozess (Standard), gehen beim Neustart verloren
+- db: Tabelle analysis_jobs, offene Jobs werden nach einem Neustart fortgesetzt
+
+Teilergebnisse laufender Jobs liegen im Worker-Prozess und werden nicht in die
+Tabelle geschrieben. Das Endergebnis ist die gespeicherte Analyse (analysis_id).
+Zugriffe auf die Tabelle (synchrones SQLAlchemy) laufen in einem Worker-Thread,
+damit Job-Abfragen unter Last den Event-Loop nicht blockieren.
+
+Konfiguration über Environment Variablen:
+- ANALYSIS_JOB_WORKERS: Parallel laufende Analysen (default: 2)
+- ANALYSIS_JOB_QUEUE_SIZE: Max. wartende Jobs, danach 503 (default: 100)
+- ANALYSIS_JOB_STORE: memory oder db (default: memory)
+- ANALYSIS_JOB_HISTORY: Max. Jobs im Speicher bei memory (default: 1000)
+"""
+
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+import asyncio
+import os
+import time
+import uuid
+
+from database import SessionLocal
+from models import AnalysisJob
+
+ANALYSIS_JOB_WORKERS = int(os.getenv("ANALYSIS_JOB_WORKERS", "2"))
+ANALYSIS_JOB_QUEUE_SIZE = int(os.getenv("ANALYSIS_JOB_QUEUE_SIZE", "100"))
+ANALYSIS_JOB_STORE = os.getenv("ANALYSIS_JOB_STORE", "memory")
+ANALYSIS_JOB_HISTORY = int(os.getenv("ANALYSIS_JOB_HISTORY", "1000"))
+
+OFFENE_STATUS = ("queued", "running")
+
+
+class QueueFullError(Exception):
+    """Die Warteschlange hat ANALYSIS_JOB_QUEUE_SIZE wartende Jobs erreicht"""
+
+
+class MemoryJobStore:
+    """Jobs im Prozess-Speicher. Die ältesten abgeschlossenen Jobs werden verdrängt."""
+
+    name = "memory"
+    blockierend = False  # Direkt im Event-Loop aufrufen (kein I/O)
+
+    def __init__(self, max_jobs: int = ANALYSIS_JOB_HISTORY):
+        self.max_jobs = max_jobs
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    def create(self, user_id: int, request: Dict[str, Any]) -> Dict[str, Any]:
+        job = {
+            "id": uuid.uuid4().hex,
+            "user_id": user_id,
+            "status": "queued",
+            "request": request,
+            "analysis_id": None,
+            "fehler": None,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        self._jobs[job["id"]] = job
+        self._evict()
+        return dict(job)
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        job = self._jobs.get(job_id)
+        return dict(job) if job else None
+
+    def update(self, job_id: str, **felder):
+        if job_id in self._jobs:
+            self._jobs[job_id].update(felder)
+
+    def pending(self) -> List[Dict[str, Any]]:
+        return []
+
+    def _evict(self):
+        """Verdrängt die ältesten abgeschlossenen Jobs (offene bleiben immer erhalten)"""
+        if len(self._jobs) <= self.max_jobs:
+            return
+        for job_id in [j for j, job in self._jobs.items() if job["status"] not in OFFENE_STATUS]:
+            del self._jobs[job_id]
+            if len(self._jobs) <= self.max_jobs:
+                break
+
+
+class DatabaseJobStore:
+    """Jobs in der Tabelle analysis_jobs - überleben einen Neustart des Backends"""
+
+    name = "db"
+    blockierend = True  # Synchrones SQLAlchemy - aus async Code per Worker-Thread aufrufen
+
+    @staticmethod
+    def _to_dict(row: AnalysisJob) -> Dict[str, Any]:
+        return {
+            "id": row.id,
+            "user_id": row.user_id,
+            "status": row.status,
+            "request": row.request,
+            "analysis_id": row.analysis_id,
+            "fehler": row.fehler,
+            "created_at": row.created_at,
+            "started_at": row.started_at,
+            "finished_at": row.finished_at,
+        }
+
+    def create(self, user_id: int, request: Dict[str, Any]) -> Dict[str, Any]:
+        db = SessionLocal()
+        try:
+            row = AnalysisJob(id=uuid.uuid4().hex, user_id=user_id, status="queued", request=request)
+            db.add(row)
+            db.commit()
+            db.refresh(row)
+            return self._to_dict(row)
+        finally:
+            db.close()
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        db = SessionLocal()
+        try:
+            row = db.query(AnalysisJob).filter(AnalysisJob.id == job_id).first()
+            return self._to_dict(row) if row else None
+        finally:
+            db.close()
+
+    def update(self, job_id: str, **felder):
+        db = SessionLocal()
+        try:
+            db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(felder)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            print(f"Analyse-Jobs: DB-Update fehlgeschlagen: {e}")
+        finally:
+            db.close()
+
+    def pending(self) -> List[Dict[str, Any]]:
+        """Offene Jobs (älteste zuerst). Beim Neustart abgebrochene Jobs starten von vorn."""
+        db = SessionLocal()
+        try:
+            db.query(AnalysisJob)\
+                .filter(AnalysisJob.status == "running")\
+                .update({"status": "queued", "started_at": None})
+            db.commit()
+            rows = db.query(AnalysisJob)\
+                .filter(AnalysisJob.status == "queued")\
+                .order_by(AnalysisJob.created_at)\
+                .all()
+            return [self._to_dict(row) for row in rows]
+        finally:
+            db.close()
+
+
+class AnalysisJobQueue:
+    """
+    Begrenzte Warteschlange + Worker-Pool im Prozess.
+
+    Der Runner bekommt den Job (mit request als dict) und liefert die Ereignisse
+    der Analyse-Pipeline ({"event": "block" | "kriterium" | "result" | "error", ...}).
+    Daraus werden Status und Teilergebnis des Jobs fortgeschrieben.
+    """
+
+    def __init__(self, store, workers: int = ANALYSIS_JOB_WORKERS, max_wartend: int = ANALYSIS_JOB_QUEUE_SIZE):
+        self.store = store
+        self.workers = workers
+        self.max_wartend = max_wartend
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: List[asyncio.Task] = []
+        self._runner: Optional[Callable[[Dict[str, Any]], AsyncIterator[Dict[str, Any]]]] = None
+        self._teilergebnisse: Dict[str, Dict[str, Any]] = {}
+        self._stats = {
+            "eingereicht": 0, "abgeschlossen": 0, "fehlgeschlagen": 0, "abgelehnt": 0,
+            "wartezeit_summe_s": 0.0, "laufzeit_summe_s": 0.0,
+        }
+
+    async def start(self, runner: Callable[[Dict[str, Any]], AsyncIterator[Dict[str, Any]]]):
+        """Startet die Worker und reiht offene Jobs aus dem Speicher wieder ein"""
+        self._runner = runner
+        self._queue = asyncio.Queue(maxsize=self.max_wartend)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+
+        offene = await self._store("pending")
+        if offene:
+            print(f"🔁 {len(offene)} offene Analyse-Jobs werden fortgesetzt")
+            self._tasks.append(asyncio.create_task(self._requeue([job["id"] for job in offene])))
+
+    async def stop(self):
+        """Beendet die Worker (laufende Jobs bleiben bei ANALYSIS_JOB_STORE=db offen)"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _store(self, methode: str, *args, **kwargs):
+        """Ruft den Job-Speicher auf - blockierende Speicher (Datenbank) in einem Worker-Thread"""
+        funktion = getattr(self.store, methode)
+        if self.store.blockierend:
+            return await asyncio.to_thread(funktion, *args, **kwargs)
+        return funktion(*args, **kwargs)
+
+    async def _requeue(self, job_ids: List[str]):
+        for job_id in job_ids:
+            await self._queue.put(job_id)
+
+    async def submit(self, user_id: int, request: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Legt einen Job an und reiht ihn ein.
+
+        Raises:
+            QueueFullError: wenn schon max_wartend Jobs warten
+        """
+        if self._queue is None:
+            raise RuntimeError("Analyse-Warteschlange ist nicht gestartet")
+        if self._queue.full():
+            self._stats["abgelehnt"] += 1
+            raise QueueFullError()
+
+        job = await self._store("create", user_id, request)
+        try:
+            self._queue.put_nowait(job["id"])
+        except asyncio.QueueFull:
+            # Während des Anlegens haben andere Anfragen die letzten Plätze belegt
+            self._stats["abgelehnt"] += 1
+            await self._store(
+                "update", job["id"], status="failed", finished_at=datetime.utcnow(), fehler="Warteschlange voll"
+            )
+            raise QueueFullError()
+        self._stats["eingereicht"] += 1
+        return job
+
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Job inkl. Teilergebnis, solange er läuft"""
+        job = await self._store("get", job_id)
+        if job:
+            job["teilergebnis"] = self._teilergebnisse.get(job_id)
+        return job
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"❌ Analyse-Job {job_id} abgebrochen: {e}")
+                await self._finish(job_id, "failed", fehler=f"Fehler bei der Analyse: {str(e)}")
+            finally:
+                self._teilergebnisse.pop(job_id, None)
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        job = await self._store("get", job_id)
+        if job is None or job["status"] != "queued":
+            return
+
+        started_at = datetime.utcnow()
+        self._stats["wartezeit_summe_s"] += (started_at - job["created_at"]).total_seconds()
+        await self._store("update", job_id, status="running", started_at=started_at)
+
+        teilergebnis = self._teilergebnisse[job_id] = {}
+        start = time.perf_counter()
+        try:
+            async for ereignis in self._runner(job):
+                if ereignis["event"] == "block":
+                    teilergebnis[ereignis["name"]] = ereignis["daten"]
+                elif ereignis["event"] == "kriterium":
+                    teilergebnis.setdefault("kriterien", []).append(ereignis["daten"])
+                elif ereignis["event"] == "result":
+                    await self._finish(job_id, "done", analysis_id=ereignis["daten"].get("analysis_id"))
+                    return
+                elif ereignis["event"] == "error":
+                    await self._finish(job_id, "failed", fehler=ereignis["detail"])
+                    return
+            await self._finish(job_id, "failed", fehler="Analyse ohne Ergebnis beendet")
+        finally:
+            self._stats["laufzeit_summe_s"] += time.perf_counter() - start
+
+    async def _finish(self, job_id: str, status: str, **felder):
+        self._stats["abgeschlossen" if status == "done" else "fehlgeschlagen"] += 1
+        await self._store("update", job_id, status=status, finished_at=datetime.utcnow(), **felder)
+
+    def stats(self) -> Dict[str, Any]:
+        """Warteschlangen-Metriken für die Admin-Statistik (pro Prozess)"""
+        beendet = self._stats["abgeschlossen"] + self._stats["fehlgeschlagen"]
+        gestartet = beendet + len(self._teilergebnisse)
+        return {
+            "store": self.store.name,
+            "workers": self.workers,
+            "laufend": len(self._teilergebnisse),
+            "wartend": self._queue.qsize() if self._queue else 0,
+            "max_wartend": self.max_wartend,
+            "eingereicht": self._stats["eingereicht"],
+            "abgeschlossen": self._stats["abgeschlossen"],
+            "fehlgeschlagen": self._stats["fehlgeschlagen"],
+            "abgelehnt": self._stats["abgelehnt"],
+            "wartezeit_avg_s": round(self._stats["wartezeit_summe_s"] / gestartet, 2) if gestartet else None,
+            "laufzeit_avg_s": round(self._stats["laufzeit_summe_s"] / beendet, 2) if beendet else None,
+        }
+
+
+analysis_jobs = AnalysisJobQueue(DatabaseJobStore() if ANALYSIS_JOB_STORE == "db" else MemoryJobStore())
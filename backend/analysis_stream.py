@@ -0,0 +1,81 @@
+"""
+Hilfen für die progressive Analyse (/analyze/stream)
+Die Antwort wird als NDJSON gestreamt: eine JSON-Zeile pro Ereignis.
+Deterministische Blöcke kommen sofort, Kriterien-Scores sobald die KI sie
+geschrieben hat, Gesamtscore und Empfehlung am Ende.
+"""
+
+from typing import Any, Dict, List, Optional
+import json
+
+
+def ndjson(ereignis: Dict[str, Any]) -> str:
+    """Formatiert ein Ereignis ({"event": ..., ...}) als NDJSON-Zeile"""
+    return json.dumps(ereignis, ensure_ascii=False, default=str) + "\n"
+
+
+class CriteriaStreamParser:
+    """
+    Findet fertige Kriterien-Objekte im gestreamten KI-JSON.
+
+    Die KI antwortet mit {"kriterien": [{...}, {...}], "stärken": [...], ...}.
+    Jedes Objekt auf Ebene 3 (im Array "kriterien") wird geparst, sobald
+    seine schließende Klammer angekommen ist. Strings (inkl. Escapes) werden
+    beachtet, damit Klammern in Begründungen nicht mitgezählt werden.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self._pos = 0
+        self._tiefe = 0
+        self._in_string = False
+        self._escape = False
+        self._start: Optional[int] = None
+
+    def feed(self, chunk: str) -> List[Dict[str, Any]]:
+        """
+        Verarbeitet ein Textstück der KI-Antwort.
+
+        Returns:
+            Liste der in diesem Stück fertig gewordenen Kriterien
+        """
+        self.text += chunk
+        fertig = []
+
+        while self._pos < len(self.text):
+            zeichen = self.text[self._pos]
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif zeichen == "\\":
+                    self._escape = True
+                elif zeichen == '"':
+                    self._in_string = False
+            elif zeichen == '"':
+                self._in_string = True
+            elif zeichen in "{[":
+                self._tiefe += 1
+                if zeichen == "{" and self._tiefe == 3:
+                    self._start = self._pos
+            elif zeichen in "}]":
+                if zeichen == "}" and self._tiefe == 3 and self._start is not None:
+                    kriterium = self._parse(self.text[self._start:self._pos + 1])
+                    if kriterium:
+                        fertig.append(kriterium)
+                    self._start = None
+                self._tiefe -= 1
+
+            self._pos += 1
+
+        return fertig
+
+    @staticmethod
+    def _parse(objekt: str) -> Optional[Dict[str, Any]]:
+        try:
+            kriterium = json.loads(objekt)
+        except json.JSONDecodeError:
+            return None
+        if isinstance(kriterium, dict) and "name" in kriterium and "score" in kriterium:
+            return kriterium
+        return None
@@ -0,0 +1,100 @@
+"""
+Geschlossene Formeln für Annuitätendarlehen (jährliche Rate, wie calculate_tilgungsplan)
+Statt einen Tilgungsplan Jahr für Jahr durchzurechnen, liefern die Formeln
+Restschuld, getilgten Betrag, exakte Laufzeit und den Zeitpunkt, an dem eine
+Schwelle überschritten wird, in O(1) pro Abfrage. Alle Funktionen akzeptieren
+Skalare oder NumPy-Arrays (Broadcasting) - geeignet für große Raster.
+
+Bezeichnungen:
+    K = Darlehen, i = Zinssatz/100, t = anfängliche Tilgung/100
+    Rate A = K * (i + t) pro Jahr
+    Annuitätenfaktor s(n) = ((1+i)^n - 1) / i   (bei i = 0: n)
+    Getilgt nach n Jahren  G(n) = K * t * s(n)
+    Restschuld             R(n) = K - G(n) = K * (1 - t * s(n))
+    Laufzeit               n* = ln(1 + i/t) / ln(1 + i)   (bei i = 0: 1/t)
+"""
+
+import numpy as np
+
+# Toleranz beim Aufrunden auf ganze Jahre (n* = 20.000000000004 ist Jahr 20)
+_EPS = 1e-9
+
+
+def annuitaetenfaktor(zinssatz, jahre):
+    """s(n) = ((1+i)^n - 1) / i, bei i = 0 gleich n"""
+    i = np.asarray(zinssatz, dtype=float) / 100
+    n = np.asarray(jahre, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        faktor = np.expm1(n * np.log1p(i)) / i
+    return np.where(i == 0, n, faktor)
+
+
+def getilgt_nach(darlehen, zinssatz, tilgung, jahre):
+    """Getilgter Betrag nach n vollen Jahren (höchstens das Darlehen)"""
+    darlehen = np.asarray(darlehen, dtype=float)
+    getilgt = darlehen * (np.asarray(tilgung, dtype=float) / 100) * annuitaetenfaktor(zinssatz, jahre)
+    return np.clip(getilgt, 0, np.maximum(darlehen, 0))
+
+
+def restschuld_nach(darlehen, zinssatz, tilgung, jahre):
+    """Restschuld nach n vollen Jahren (nie negativ)"""
+    return np.maximum(0.0, np.asarray(darlehen, dtype=float) - getilgt_nach(darlehen, zinssatz, tilgung, jahre))
+
+
+def laufzeit_jahre(zinssatz, tilgung):
+    """
+    Exakte Laufzeit bis zur vollständigen Tilgung in Jahren (mit Nachkommastellen).
+    inf, wenn das Darlehen nie getilgt wird (Tilgung 0).
+    """
+    return jahre_bis_anteil(zinssatz, tilgung, 1.0)
+
+
+def jahre_bis_anteil(zinssatz, tilgung, anteil):
+    """
+    Zeitpunkt (in Jahren, mit Nachkommastellen), zu dem der Anteil (0-1) des
+    Darlehens getilgt ist: t * s(n) = anteil. inf, wenn er nie erreicht wird.
+    """
+    i = np.asarray(zinssatz, dtype=float) / 100
+    t = np.asarray(tilgung, dtype=float) / 100
+    anteil = np.asarray(anteil, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mit_zins = np.log1p(anteil * i / t) / np.log1p(i)
+        ohne_zins = anteil / t
+    jahre = np.where(i == 0, ohne_zins, mit_zins)
+    # Mehr als das Darlehen wird nie getilgt
+    return np.where((t > 0) & (anteil <= 1) & np.isfinite(jahre), np.maximum(jahre, 0.0), np.inf)
+
+
+def erstes_volles_jahr(jahre):
+    """
+    Erstes ganzes Planjahr (1, 2, ...), an dessen Ende ein Zeitpunkt erreicht ist.
+    inf bleibt inf (nie erreicht).
+    """
+    jahre = np.asarray(jahre, dtype=float)
+    with np.errstate(invalid="ignore"):
+        return np.where(np.isfinite(jahre), np.maximum(1.0, np.ceil(jahre - _EPS)), np.inf)
+
+
+def erstes_jahr_ueber(startwert, wachstum_prozent, schwelle, streng: bool = False):
+    """
+    Erstes Planjahr j (1, 2, ...), in dem startwert * (1 + w)^(j-1) die Schwelle erreicht
+    (streng=True: überschreitet). Geometrisches Wachstum wie Miete/Immobilienwert im Tilgungsplan.
+    inf, wenn die Schwelle nie erreicht wird.
+    """
+    start = np.asarray(startwert, dtype=float)
+    g = np.log1p(np.asarray(wachstum_prozent, dtype=float) / 100)
+    schwelle = np.asarray(schwelle, dtype=float)
+    erreicht = (start > schwelle) if streng else (start >= schwelle)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        exponent = np.log(schwelle / start) / g
+    # Exponent j-1 muss die Schwelle erreichen; bei streng=True echt darüber
+    kandidat = np.where(streng, np.floor(exponent + _EPS) + 1, np.ceil(exponent - _EPS)) + 1
+    waechst = (g > 0) & (start > 0) & (schwelle > 0)
+    return np.where(erreicht, 1.0, np.where(waechst & np.isfinite(kandidat), np.maximum(kandidat, 1.0), np.inf))
+
+
+def als_jahr(wert, max_jahre: int):
+    """Planjahr als int für die API (None, wenn nie oder nach max_jahre erreicht)"""
+    wert = float(wert)
+    return int(wert) if np.isfinite(wert) and wert <= max_jahre else None
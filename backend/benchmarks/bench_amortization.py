@@ -0,0 +1,151 @@
+"""
+Benchmark: Tilgungspläne - Python-Jahresschleife vs. vektorisierte Engine
+
+Misst für 1, 100 und 100.000 Tilgungspläne (zufällige Zins/Tilgung/EK/Miete/Wachstum):
+- loop:   bisherige Jahresschleife in reinem Python (Referenz, hier nachgebaut)
+- engine: tilgungsplan_batch (nur Arrays)
+- view:   tilgungsplan_batch + tilgungsplan_views (Dicts wie calculate_tilgungsplan)
+Vor der Messung wird geprüft, dass Engine-Views und Schleife identische Dicts liefern.
+
+Aufruf (im backend-Ordner):
+    python benchmarks/bench_amortization.py
+    python benchmarks/bench_amortization.py --sizes 1 100 100000 --jahre 40 --runs 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from amortization import tilgungsplan_batch, tilgungsplan_views
+
+# Views für sehr große Batches dauern lange (ein Dict pro Jahr) - nur bis zu dieser Größe messen
+MAX_VIEW_PLAENE = 10000
+
+
+def loop_tilgungsplan(kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten,
+                      jahre=30, mietsteigerung=1.5, wertsteigerung=1.5) -> dict:
+    """Die ursprüngliche Jahresschleife von calculate_tilgungsplan (Referenz)"""
+    finanzierungssumme = kaufpreis - eigenkapital
+    restschuld = finanzierungssumme
+    jaehrliche_rate = finanzierungssumme * ((zinssatz + tilgung) / 100)
+    aktuelle_miete = monatliche_miete
+    immobilienwert = kaufpreis
+    jahres_projektionen = []
+    gesamte_zinsen = 0
+    gesamte_tilgung = 0
+
+    for jahr in range(1, jahre + 1):
+        zinsen_jahr = restschuld * (zinssatz / 100)
+        tilgung_jahr = jaehrliche_rate - zinsen_jahr
+        if tilgung_jahr > restschuld:
+            tilgung_jahr = restschuld
+        restschuld = max(0, restschuld - tilgung_jahr)
+        gesamte_zinsen += zinsen_jahr
+        gesamte_tilgung += tilgung_jahr
+        jaehrlicher_cashflow = (aktuelle_miete * 12) - jaehrliche_rate - (nebenkosten * 12)
+        jahres_projektionen.append({
+            "jahr": jahr,
+            "restschuld": round(restschuld, 2),
+            "getilgt": round(gesamte_tilgung, 2),
+            "zinsen_jahr": round(zinsen_jahr, 2),
+            "tilgung_jahr": round(tilgung_jahr, 2),
+            "jaehrlicher_cashflow": round(jaehrlicher_cashflow, 2),
+            "monatlicher_cashflow": round(jaehrlicher_cashflow / 12, 2),
+            "immobilienwert": round(immobilienwert, 2),
+            "eigenkapital_aufbau": round(eigenkapital + gesamte_tilgung, 2),
+            "gesamtvermoegen": round(immobilienwert - restschuld, 2),
+            "aktuelle_miete": round(aktuelle_miete, 2)
+        })
+        aktuelle_miete *= (1 + mietsteigerung / 100)
+        immobilienwert *= (1 + wertsteigerung / 100)
+
+    letztes_jahr = jahres_projektionen[-1] if jahres_projektionen else None
+    erstes_jahr = jahres_projektionen[0] if jahres_projektionen else None
+    return {
+        "jahre": jahres_projektionen,
+        "zusammenfassung": {
+            "finanzierungssumme": round(finanzierungssumme, 2),
+            "eigenkapital_start": round(eigenkapital, 2),
+            "jaehrliche_rate": round(jaehrliche_rate, 2),
+            "monatliche_rate": round(jaehrliche_rate / 12, 2),
+            "gesamte_zinsen": round(gesamte_zinsen, 2),
+            "gesamte_tilgung": round(gesamte_tilgung, 2),
+            "gesamtkosten": round(gesamte_zinsen + finanzierungssumme, 2),
+            "restschuld_nach_laufzeit": round(restschuld, 2),
+            "immobilienwert_nach_laufzeit": round(letztes_jahr["immobilienwert"], 2) if letztes_jahr else kaufpreis,
+            "gesamtvermoegen_nach_laufzeit": round(letztes_jahr["gesamtvermoegen"], 2) if letztes_jahr else eigenkapital,
+            "cashflow_jahr_1": round(erstes_jahr["jaehrlicher_cashflow"], 2) if erstes_jahr else 0,
+            "cashflow_jahr_final": round(letztes_jahr["jaehrlicher_cashflow"], 2) if letztes_jahr else 0,
+            "kredit_abbezahlt_in_jahren": len(jahres_projektionen) if restschuld <= 0 else None
+        }
+    }
+
+
+def zufalls_parameter(anzahl: int, seed: int) -> dict:
+    """Plausible Parameter: 100k-1M Kaufpreis, 0-40% EK, 1-6% Zins, 1-4% Tilgung, 3-5% Mietrendite"""
+    rng = np.random.default_rng(seed)
+    kaufpreis = rng.uniform(100000, 1000000, anzahl)
+    return {
+        "kaufpreis": kaufpreis,
+        "eigenkapital": kaufpreis * rng.uniform(0, 0.4, anzahl),
+        "zinssatz": rng.uniform(1, 6, anzahl),
+        "tilgung": rng.uniform(1, 4, anzahl),
+        "monatliche_miete": kaufpreis * rng.uniform(0.03, 0.05, anzahl) / 12,
+        "nebenkosten": rng.uniform(100, 500, anzahl),
+        "mietsteigerung": rng.uniform(0, 3, anzahl),
+        "wertsteigerung": rng.uniform(-1, 3, anzahl),
+    }
+
+
+def _messen(funktion, runs: int) -> float:
+    """Median der Laufzeit in Millisekunden"""
+    zeiten = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        funktion()
+        zeiten.append((time.perf_counter() - start) * 1000)
+    return statistics.median(zeiten)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der vektorisierten Tilgungspläne")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 100000], help="Anzahl Pläne pro Messung")
+    parser.add_argument("--jahre", type=int, default=30, help="Laufzeit in Jahren")
+    parser.add_argument("--runs", type=int, default=5, help="Wiederholungen pro Messung (Median)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Korrektheit: Engine-Views == Schleife
+    probe = zufalls_parameter(500, args.seed)
+    views = tilgungsplan_views(tilgungsplan_batch(**probe, jahre=args.jahre))
+    for i, view in enumerate(views):
+        referenz = loop_tilgungsplan(**{k: float(v[i]) for k, v in probe.items()}, jahre=args.jahre)
+        if view != referenz:
+            sys.exit(f"❌ Abweichung bei Plan {i}")
+    print(f"✅ {len(views)} Pläne identisch mit der Python-Schleife\n")
+
+    print(f"{'Pläne':>8} | {'loop ms':>10} | {'engine ms':>10} | {'view ms':>10} | {'Speedup engine':>14}")
+    print("-" * 66)
+    for anzahl in args.sizes:
+        params = zufalls_parameter(anzahl, args.seed)
+        listen = [{k: float(v[i]) for k, v in params.items()} for i in range(anzahl)]
+        runs = args.runs if anzahl <= 1000 else max(1, args.runs // 5)
+
+        loop_ms = _messen(lambda: [loop_tilgungsplan(**p, jahre=args.jahre) for p in listen], runs)
+        engine_ms = _messen(lambda: tilgungsplan_batch(**params, jahre=args.jahre), runs)
+        if anzahl <= MAX_VIEW_PLAENE:
+            view_ms = _messen(lambda: tilgungsplan_views(tilgungsplan_batch(**params, jahre=args.jahre)), runs)
+            view_text = f"{view_ms:>10.3f}"
+        else:
+            view_text = f"{'-':>10}"
+        print(f"{anzahl:>8} | {loop_ms:>10.3f} | {engine_ms:>10.3f} | {view_text} | {loop_ms / engine_ms:>13.1f}x")
+
+
+if __name__ == "__main__":
+    main()
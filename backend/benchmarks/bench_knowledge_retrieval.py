@@ -0,0 +1,148 @@
+"""
+Benchmark: Kompletter vs. abschnittsweiser (BM25) Knowledge-Prompt
+
+Vergleicht pro Beispiel-Immobilie:
+- Prompt-Tokens des System-Prompts (geschätzt, mit API-Key exakt via count_tokens)
+- Retrieval-Zeit
+- Mit --live: Latenz des Bewertungs-Calls von /analyze (der einzige Schritt,
+  der sich zwischen beiden Varianten unterscheidet)
+
+Aufruf (im backend-Ordner):
+    python benchmarks/bench_knowledge_retrieval.py --budget 15000
+    python benchmarks/bench_knowledge_retrieval.py --budget 15000 --live --runs 3
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+from knowledge_base import get_ai_system_prompt, build_knowledge_index
+from knowledge_index import estimate_tokens
+
+load_dotenv()
+
+MODEL = "claude-sonnet-4-20250514"
+
+BEISPIELE = [
+    {
+        "name": "ETW Kapitalanlage Leipzig",
+        "verwendungszweck": "kapitalanlage",
+        "property_data": {
+            "kaufpreis": 189000, "wohnflaeche": 62, "zimmer": 2, "baujahr": 1910,
+            "hausgeld": 240, "energieklasse": "E", "stadt": "Leipzig", "stadtteil": "Gohlis",
+            "objekttyp": "Eigentumswohnung", "vermietet": True, "aktuelle_miete": 520,
+            "beschreibung": "Vermietete Altbau-ETW mit Balkon, gepflegtes Gemeinschaftseigentum"
+        }
+    },
+    {
+        "name": "EFH Eigennutzung unsaniert",
+        "verwendungszweck": "eigennutzung",
+        "property_data": {
+            "kaufpreis": 420000, "wohnflaeche": 135, "zimmer": 5, "baujahr": 1972,
+            "energieklasse": "G", "heizungsart": "Öl-Zentralheizung", "stadt": "Kassel",
+            "objekttyp": "Einfamilienhaus", "vermietet": False,
+            "beschreibung": "Renovierungsbedürftiges Einfamilienhaus, Verkauf aus Altersgründen"
+        }
+    },
+    {
+        "name": "Leerstehende ETW München",
+        "verwendungszweck": "kapitalanlage",
+        "property_data": {
+            "kaufpreis": 640000, "wohnflaeche": 71, "zimmer": 3, "baujahr": 1995,
+            "hausgeld": 390, "energieklasse": "C", "stadt": "München", "stadtteil": "Sendling",
+            "objekttyp": "Eigentumswohnung", "vermietet": False,
+            "beschreibung": "Bezugsfreie 3-Zimmer-Wohnung mit Tiefgaragenstellplatz"
+        }
+    },
+]
+
+
+def _analyse_prompt(beispiel: dict) -> str:
+    """Vereinfachter Bewertungs-Prompt (gleiches Format wie /analyze)"""
+    return (
+        "Analysiere diese Immobilie und bewerte die 9 Kriterien mit 0-100.\n\n"
+        f"=== IMMOBILIENDATEN ===\n{json.dumps(beispiel['property_data'], indent=2, ensure_ascii=False)}\n\n"
+        f"=== VERWENDUNGSZWECK ===\n{beispiel['verwendungszweck']}\n\n"
+        'Antworte als JSON: {"kriterien": [...], "stärken": [...], "schwächen": [...], "zusammenfassung": "..."}'
+    )
+
+
+async def _count_tokens(client, system_prompt: str, user_prompt: str) -> int:
+    result = await client.messages.count_tokens(
+        model=MODEL,
+        system=system_prompt,
+        messages=[{"role": "user", "content": user_prompt}]
+    )
+    return result.input_tokens
+
+
+async def _timed_call(client, system_prompt: str, user_prompt: str) -> float:
+    start = time.perf_counter()
+    await client.messages.create(
+        model=MODEL,
+        max_tokens=2500,
+        system=system_prompt,
+        messages=[{"role": "user", "content": user_prompt}]
+    )
+    return time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=int, default=15000, help="Token-Budget für das Wissen")
+    parser.add_argument("--live", action="store_true", help="Echte Bewertungs-Calls messen (kostet Tokens!)")
+    parser.add_argument("--runs", type=int, default=3, help="Wiederholungen pro Variante bei --live")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    index = build_knowledge_index()
+    print(f"Index: {len(index.abschnitte)} Abschnitte, aufgebaut in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    client = None
+    if os.getenv("ANTHROPIC_API_KEY"):
+        from llm_client import get_anthropic_client
+        client = get_anthropic_client()
+    elif args.live:
+        sys.exit("--live benötigt ANTHROPIC_API_KEY")
+
+    for beispiel in BEISPIELE:
+        user_prompt = _analyse_prompt(beispiel)
+        voll = get_ai_system_prompt()
+
+        start = time.perf_counter()
+        teil = get_ai_system_prompt(beispiel["property_data"], args.budget, beispiel["verwendungszweck"])
+        retrieval_ms = (time.perf_counter() - start) * 1000
+
+        if client:
+            tokens_voll = await _count_tokens(client, voll, user_prompt)
+            tokens_teil = await _count_tokens(client, teil, user_prompt)
+            quelle = "count_tokens"
+        else:
+            tokens_voll = estimate_tokens(voll + user_prompt)
+            tokens_teil = estimate_tokens(teil + user_prompt)
+            quelle = "geschätzt"
+
+        print(f"== {beispiel['name']} ==")
+        print(f"  Prompt-Tokens ({quelle}): voll {tokens_voll:,} | retrieved {tokens_teil:,} "
+              f"({tokens_teil / tokens_voll * 100:.1f}%)")
+        print(f"  Retrieval: {retrieval_ms:.2f} ms")
+
+        if args.live:
+            for name, system_prompt in (("voll", voll), ("retrieved", teil)):
+                zeiten = [await _timed_call(client, system_prompt, user_prompt) for _ in range(args.runs)]
+                print(f"  Latenz {name}: median {statistics.median(zeiten):.2f} s "
+                      f"(min {min(zeiten):.2f} s, max {max(zeiten):.2f} s)")
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
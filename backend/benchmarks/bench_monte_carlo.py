@@ -0,0 +1,84 @@
+"""
+Benchmark: Monte-Carlo-Risikosimulation
+
+Misst run_monte_carlo (Simulation + Perzentile pro Jahr) für 10.000 und 100.000 Pfade
+samt Spitzen-Speicher (tracemalloc). Vor der Messung wird geprüft, dass
+- derselbe seed dasselbe Ergebnis liefert und
+- ohne Zufall (Volatilität 0, kein Leerstand/Schock, keine Anschlussfinanzierung)
+  die Bänder für Restschuld, Immobilienwert und Cashflow dem Tilgungsplan entsprechen.
+
+Aufruf (im backend-Ordner):
+    python benchmarks/bench_monte_carlo.py
+    python benchmarks/bench_monte_carlo.py --sizes 10000 50000 100000 --jahre 40 --runs 5
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from amortization import tilgungsplan_batch
+from monte_carlo import PERZENTILE, run_monte_carlo
+
+BEISPIEL = {
+    "kaufpreis": 300000, "monatliche_miete": 1100, "nebenkosten": 250,
+    "eigenkapital": 60000, "zinssatz": 3.5, "tilgung": 2.0,
+}
+
+OHNE_ZUFALL = {
+    "zinsbindung_jahre": 1000, "zins_volatilitaet": 0, "mietsteigerung_volatilitaet": 0,
+    "wertsteigerung_volatilitaet": 0, "mieterwechsel_quote": 0, "instandhaltung_quote": 0,
+}
+
+
+def _messen(funktion, runs: int) -> float:
+    """Median der Laufzeit in Millisekunden"""
+    zeiten = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        funktion()
+        zeiten.append((time.perf_counter() - start) * 1000)
+    return statistics.median(zeiten)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark der Monte-Carlo-Simulation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000], help="Anzahl Pfade pro Messung")
+    parser.add_argument("--jahre", type=int, default=30, help="Simulationszeitraum in Jahren")
+    parser.add_argument("--runs", type=int, default=5, help="Wiederholungen pro Messung (Median)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    # Korrektheit: reproduzierbar und ohne Zufall identisch mit dem Tilgungsplan
+    if run_monte_carlo(**BEISPIEL, pfade=1000, seed=args.seed) != run_monte_carlo(**BEISPIEL, pfade=1000, seed=args.seed):
+        sys.exit("❌ Gleicher seed liefert unterschiedliche Ergebnisse")
+    baender = run_monte_carlo(**BEISPIEL, jahre=args.jahre, pfade=2, seed=args.seed, annahmen=OHNE_ZUFALL)["baender"]
+    plan = tilgungsplan_batch(**BEISPIEL, jahre=args.jahre)
+    abbezahlt = plan["restschuld"][0] <= 0  # Tilgungsplan zieht die Rate auch nach der Tilgung ab
+    for feld in ("restschuld", "immobilienwert", "jaehrlicher_cashflow"):
+        vergleich = ~abbezahlt if feld == "jaehrlicher_cashflow" else slice(None)
+        erwartet = np.round(plan[feld][0], 2)[vergleich]
+        for p in PERZENTILE:
+            if not np.array_equal(np.array(baender[feld][f"p{p}"])[vergleich], erwartet):
+                sys.exit(f"❌ Abweichung vom Tilgungsplan bei {feld} (p{p})")
+    print("✅ Reproduzierbar und ohne Zufall identisch mit dem Tilgungsplan\n")
+
+    print(f"{'Pfade':>8} | {'gesamt ms':>10} | {'Speicher MB':>11}")
+    print("-" * 37)
+    for pfade in args.sizes:
+        gesamt_ms = _messen(lambda: run_monte_carlo(**BEISPIEL, jahre=args.jahre, pfade=pfade, seed=args.seed), args.runs)
+        tracemalloc.start()
+        run_monte_carlo(**BEISPIEL, jahre=args.jahre, pfade=pfade, seed=args.seed)
+        speicher_mb = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+        print(f"{pfade:>8} | {gesamt_ms:>10.1f} | {speicher_mb:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
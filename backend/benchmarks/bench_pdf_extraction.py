@@ -0,0 +1,171 @@
+"""
+Benchmark: PDF-Extraktion als Dokument vs. lokale Textebene + Rohtext
+
+Für jedes PDF im Korpus (Standard: benchmarks/pdf_corpus):
+- Lokale Stufe: Zeit für Textebene + Regex, erkannte Felder, Treffergenauigkeit
+- Prompt-Tokens beider Wege (mit API-Key exakt via count_tokens)
+- Mit --live: Latenz, Input/Output-Tokens und Feldgenauigkeit beider Wege
+
+Zu jedem <name>.pdf kann eine <name>.json mit den erwarteten Feldwerten liegen.
+Zahlen gelten als korrekt bei max. 1% Abweichung, Texte wenn der erwartete
+Wert (ohne Groß-/Kleinschreibung) enthalten ist.
+
+Aufruf (im backend-Ordner):
+    python benchmarks/bench_pdf_extraction.py
+    python benchmarks/bench_pdf_extraction.py --corpus /pfad/zu/exposes --live --runs 2
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from dotenv import load_dotenv
+
+from knowledge_index import estimate_tokens
+from pdf_extraction import (
+    EXTRACTION_FELDER,
+    EXTRACTION_MODEL,
+    PYPDF_AVAILABLE,
+    build_extraction_prompt,
+    extract_text_layer,
+    extract_via_document,
+    extract_via_text,
+    has_text_layer,
+    parse_expose_fields,
+)
+
+load_dotenv()
+
+STANDARD_KORPUS = Path(__file__).resolve().parent / "pdf_corpus"
+
+
+def _korrekt(erwartet, gefunden) -> bool:
+    """Vergleicht einen extrahierten Wert mit dem erwarteten"""
+    if gefunden is None:
+        return False
+    if isinstance(erwartet, (int, float)) and not isinstance(erwartet, bool):
+        try:
+            return abs(float(gefunden) - erwartet) <= abs(erwartet) * 0.01
+        except (TypeError, ValueError):
+            return False
+    return str(erwartet).lower() in str(gefunden).lower()
+
+
+def _genauigkeit(erwartet: dict, gefunden: dict, felder=None) -> str:
+    """Anteil korrekt extrahierter Felder als Text, z.B. "5/6" """
+    felder = [f for f in (felder or erwartet) if f in erwartet]
+    if not felder:
+        return "-"
+    richtig = sum(_korrekt(erwartet[f], gefunden.get(f)) for f in felder)
+    return f"{richtig}/{len(felder)}"
+
+
+async def _count_tokens(client, content) -> int:
+    result = await client.messages.count_tokens(
+        model=EXTRACTION_MODEL,
+        messages=[{"role": "user", "content": content}]
+    )
+    return result.input_tokens
+
+
+def _document_content(pdf: bytes) -> list:
+    """Gleiche Nachricht wie extract_via_document"""
+    return [
+        {"type": "document", "source": {"type": "base64", "media_type": "application/pdf",
+                                        "data": base64.b64encode(pdf).decode("utf-8")}},
+        {"type": "text", "text": build_extraction_prompt(
+            list(EXTRACTION_FELDER),
+            "Analysiere dieses Immobilien-Exposé und extrahiere alle relevanten Daten."
+        )},
+    ]
+
+
+def _text_content(text: str, lokale_felder: dict) -> str:
+    """Näherung der Nachricht von extract_via_text (für die Token-Zählung)"""
+    offene = [f for f in EXTRACTION_FELDER if f not in lokale_felder]
+    einleitung = "Analysiere den folgenden Text eines Immobilien-Exposés und extrahiere die relevanten Daten."
+    if lokale_felder:
+        einleitung += "\n\nBereits erkannt (nicht erneut angeben):\n" + json.dumps(lokale_felder, ensure_ascii=False)
+    return f"=== EXPOSÉ-TEXT ===\n{text}\n\n=== AUFGABE ===\n{build_extraction_prompt(offene, einleitung)}"
+
+
+async def _timed(coro):
+    start = time.perf_counter()
+    daten, usage = await coro
+    return daten, usage, time.perf_counter() - start
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", type=Path, default=STANDARD_KORPUS, help="Ordner mit PDF-Exposés")
+    parser.add_argument("--live", action="store_true", help="Echte Extraktions-Calls messen (kostet Tokens!)")
+    parser.add_argument("--runs", type=int, default=1, help="Wiederholungen pro Weg bei --live")
+    args = parser.parse_args()
+
+    if not PYPDF_AVAILABLE:
+        sys.exit("pypdf ist nicht installiert (pip install pypdf)")
+
+    pdfs = sorted(args.corpus.glob("*.pdf"))
+    if not pdfs:
+        sys.exit(f"Keine PDFs in {args.corpus}")
+
+    client = None
+    if os.getenv("ANTHROPIC_API_KEY"):
+        from llm_client import get_anthropic_client
+        client = get_anthropic_client()
+    elif args.live:
+        sys.exit("--live benötigt ANTHROPIC_API_KEY")
+
+    lokale_felder_namen = ["kaufpreis", "wohnflaeche", "zimmer", "baujahr", "hausgeld", "energieklasse"]
+
+    for pfad in pdfs:
+        pdf = pfad.read_bytes()
+        erwartet_pfad = pfad.with_suffix(".json")
+        erwartet = json.loads(erwartet_pfad.read_text(encoding="utf-8")) if erwartet_pfad.exists() else {}
+
+        start = time.perf_counter()
+        text, seiten = extract_text_layer(pdf)
+        text_pdf = has_text_layer(text, seiten)
+        lokale_felder = parse_expose_fields(text) if text_pdf else {}
+        lokal_ms = (time.perf_counter() - start) * 1000
+
+        print(f"== {pfad.name} ({len(pdf) / 1024:.0f} KB, {seiten} Seiten) ==")
+        print(f"  Weg: {'Text' if text_pdf else 'Dokument (gescannt)'} | lokale Stufe {lokal_ms:.1f} ms | "
+              f"lokal erkannt: {', '.join(lokale_felder) or '-'} | "
+              f"korrekt: {_genauigkeit(erwartet, lokale_felder, lokale_felder_namen)}")
+
+        if client:
+            tokens_dok = await _count_tokens(client, _document_content(pdf))
+            tokens_text = await _count_tokens(client, _text_content(text, lokale_felder)) if text_pdf else None
+            quelle = "count_tokens"
+        else:
+            tokens_dok = None
+            tokens_text = estimate_tokens(_text_content(text, lokale_felder)) if text_pdf else None
+            quelle = "geschätzt"
+        print(f"  Prompt-Tokens ({quelle}): Dokument {tokens_dok if tokens_dok is not None else 'n/a (API-Key nötig)'} | "
+              f"Text {tokens_text if tokens_text is not None else '-'}")
+
+        if args.live:
+            wege = [("dokument", lambda: extract_via_document(pdf))]
+            if text_pdf:
+                wege.append(("text", lambda: extract_via_text(text, lokale_felder)))
+            for name, aufruf in wege:
+                laeufe = [await _timed(aufruf()) for _ in range(args.runs)]
+                daten, usage, _ = laeufe[-1]
+                zeiten = [dauer for _, _, dauer in laeufe]
+                print(f"  {name:9s}: median {statistics.median(zeiten):.2f} s | "
+                      f"input {usage.input_tokens:,} / output {usage.output_tokens:,} Tokens | "
+                      f"korrekt: {_genauigkeit(erwartet, daten)}")
+        print()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,268 @@
+"""
+Lasttest: gemischte Last gegen die echte App (reines asyncio + httpx)
+
+Standardmäßig läuft die App im selben Prozess (ASGI, mit Startup/Shutdown) mit
+Wiedergabe statt echter Anthropic- und DuckDuckGo-Calls (http_replay.py):
+HTTP_TRANSPORT_MODE=replay, fehlende Fixtures synthetisch aus llm_stub.
+So wird der komplette Request-Pfad gemessen - inkl. Event-Loop-Lag, der
+blockierende Aufrufe (sync LLM-/DB-Calls im Event-Loop) sichtbar macht.
+
+Ablauf:
+1. N User registrieren und einloggen, der erste wird Admin
+2. Jeder User führt für --duration Sekunden zufällige Aktionen aus
+   (analyze, chat, library list/detail; der Admin zusätzlich admin stats/users)
+3. Report: Anfragen, Fehler, RPS und p50/p95/p99 pro Endpoint + Event-Loop-Lag
+
+Aufruf (im backend-Ordner):
+    python benchmarks/loadtest.py --users 20 --duration 30
+    python benchmarks/loadtest.py --latency recorded --fixtures fixtures/http
+    python benchmarks/loadtest.py --url http://localhost:8000 --users 5   # laufender Server, ohne Loop-Lag
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+
+# Anteil der Aktionen (normale User)
+WORKLOAD = {
+    "analyze": 10,
+    "chat": 15,
+    "library_list": 40,
+    "library_detail": 35,
+}
+# Zusätzliche Aktionen des Admin-Users
+ADMIN_WORKLOAD = {
+    "admin_stats": 50,
+    "admin_users": 50,
+}
+
+OBJEKTE = [
+    {"kaufpreis": 289000, "wohnflaeche": 72, "zimmer": 3, "baujahr": 1996, "stadt": "Leipzig", "stadtteil": "Gohlis",
+     "objekttyp": "Eigentumswohnung", "aktuelle_miete": 820, "hausgeld": 260, "energieklasse": "C"},
+    {"kaufpreis": 545000, "wohnflaeche": 138, "zimmer": 5, "baujahr": 1978, "stadt": "Bochum",
+     "objekttyp": "Einfamilienhaus", "energieklasse": "E"},
+    {"kaufpreis": 899000, "wohnflaeche": 96, "zimmer": 3, "baujahr": 2023, "stadt": "München", "stadtteil": "Schwabing",
+     "objekttyp": "Eigentumswohnung", "hausgeld": 420, "energieklasse": "A"},
+    {"kaufpreis": 1250000, "wohnflaeche": 520, "zimmer": 16, "baujahr": 1962, "stadt": "Kassel",
+     "objekttyp": "Mehrfamilienhaus", "aktuelle_miete": 5600, "energieklasse": "F"},
+]
+
+FRAGEN = [
+    "Ist der Kaufpreis für die Lage angemessen?",
+    "Welche Förderungen kommen für mich in Frage?",
+    "Wie hoch sollte mein Eigenkapital sein?",
+]
+
+
+def percentile(werte, p: float) -> float:
+    """Perzentil nach Nearest-Rank (Werte müssen sortiert sein)"""
+    if not werte:
+        return float("nan")
+    rang = max(1, min(len(werte), round(p / 100 * len(werte) + 0.5)))
+    return werte[rang - 1]
+
+
+class Messung:
+    """Sammelt Latenzen und Fehler pro Endpoint"""
+
+    def __init__(self):
+        self.latenzen = defaultdict(list)
+        self.fehler = defaultdict(int)
+        self.fehler_beispiele = {}
+
+    async def request(self, client: httpx.AsyncClient, name: str, method: str, url: str, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            ok = response.status_code < 400
+            if not ok:
+                self.fehler_beispiele.setdefault(name, f"{response.status_code}: {response.text[:200]}")
+        except Exception as e:
+            response, ok = None, False
+            self.fehler_beispiele.setdefault(name, repr(e))
+        self.latenzen[name].append(time.perf_counter() - start)
+        if not ok:
+            self.fehler[name] += 1
+        return response if ok else None
+
+
+class LoopLag:
+    """Misst, wie viel später als geplant der Event-Loop einen Timer bedient"""
+
+    def __init__(self, intervall: float = 0.05):
+        self.intervall = intervall
+        self.werte = []
+        self._task = None
+
+    async def _messen(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.intervall)
+            self.werte.append(max(0.0, time.perf_counter() - start - self.intervall))
+
+    def start(self):
+        self._task = asyncio.create_task(self._messen())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+async def anmelden(client: httpx.AsyncClient, messung: Messung, nummer: int, lauf: str) -> dict:
+    """Registriert und loggt einen Test-User ein"""
+    email = f"last{nummer}-{lauf}@example.com"
+    await messung.request(client, "register", "POST", "/auth/register",
+                          json={"email": email, "username": f"last{nummer}_{lauf}", "password": "lasttest123"})
+    response = await messung.request(client, "login", "POST", "/auth/login",
+                                     json={"email": email, "password": "lasttest123"})
+    if response is None:
+        raise RuntimeError(f"Login für {email} fehlgeschlagen: {messung.fehler_beispiele.get('login')}")
+    return {"headers": {"Authorization": f"Bearer {response.json()['access_token']}"}, "analysen": []}
+
+
+async def aktion(client: httpx.AsyncClient, messung: Messung, user: dict, name: str, rng: random.Random):
+    headers = user["headers"]
+    if name == "analyze":
+        response = await messung.request(client, name, "POST", "/analyze", headers=headers, json={
+            "property_data": rng.choice(OBJEKTE),
+            "verwendungszweck": rng.choice(["kapitalanlage", "eigennutzung"]),
+            "eigenkapital": rng.choice([0, 30000, 60000]),
+        })
+        if response is not None and response.json().get("analysis_id"):
+            user["analysen"].append(response.json()["analysis_id"])
+    elif name == "chat":
+        await messung.request(client, name, "POST", "/chat", headers=headers, json={
+            "message": rng.choice(FRAGEN),
+            "property_data": rng.choice(OBJEKTE),
+        })
+    elif name == "library_detail" and user["analysen"]:
+        await messung.request(client, name, "GET", f"/library/{rng.choice(user['analysen'])}", headers=headers)
+    elif name == "admin_stats":
+        await messung.request(client, name, "GET", "/admin/stats", headers=headers)
+    elif name == "admin_users":
+        await messung.request(client, name, "GET", "/admin/users", headers=headers)
+    else:
+        await messung.request(client, "library_list", "GET", "/library", headers=headers)
+
+
+async def virtueller_user(client, messung, user, workload, ende, denkzeit, seed):
+    rng = random.Random(seed)
+    namen, gewichte = list(workload), list(workload.values())
+    while time.perf_counter() < ende:
+        await aktion(client, messung, user, rng.choices(namen, gewichte)[0], rng)
+        if denkzeit:
+            await asyncio.sleep(rng.uniform(0, 2 * denkzeit))
+
+
+def report(messung: Messung, dauer: float, lag: LoopLag = None) -> dict:
+    zeilen = {}
+    print(f"\n{'Endpoint':16s} {'Anfr.':>6s} {'Fehler':>6s} {'RPS':>7s} {'p50 ms':>8s} {'p95 ms':>8s} {'p99 ms':>8s} {'max ms':>8s}")
+    for name in sorted(messung.latenzen):
+        werte = sorted(messung.latenzen[name])
+        zeile = {
+            "anfragen": len(werte),
+            "fehler": messung.fehler[name],
+            "rps": round(len(werte) / dauer, 2),
+            "p50_ms": round(percentile(werte, 50) * 1000, 1),
+            "p95_ms": round(percentile(werte, 95) * 1000, 1),
+            "p99_ms": round(percentile(werte, 99) * 1000, 1),
+            "max_ms": round(werte[-1] * 1000, 1),
+        }
+        zeilen[name] = zeile
+        print(f"{name:16s} {zeile['anfragen']:6d} {zeile['fehler']:6d} {zeile['rps']:7.2f} "
+              f"{zeile['p50_ms']:8.1f} {zeile['p95_ms']:8.1f} {zeile['p99_ms']:8.1f} {zeile['max_ms']:8.1f}")
+
+    gesamt = sum(z["anfragen"] for n, z in zeilen.items() if n not in ("register", "login"))
+    print(f"\nGesamt (ohne register/login): {gesamt} Anfragen in {dauer:.1f} s = {gesamt / dauer:.1f} RPS")
+
+    ergebnis = {"dauer_s": round(dauer, 2), "rps_gesamt": round(gesamt / dauer, 2), "endpoints": zeilen}
+    if lag is not None and lag.werte:
+        werte = sorted(lag.werte)
+        ergebnis["loop_lag_ms"] = {
+            "p50": round(percentile(werte, 50) * 1000, 1),
+            "p95": round(percentile(werte, 95) * 1000, 1),
+            "p99": round(percentile(werte, 99) * 1000, 1),
+            "max": round(werte[-1] * 1000, 1),
+        }
+        print("Event-Loop-Lag: " + " | ".join(f"{k} {v} ms" for k, v in ergebnis["loop_lag_ms"].items()))
+    for name, beispiel in messung.fehler_beispiele.items():
+        print(f"  Fehler {name}: {beispiel}")
+    return ergebnis
+
+
+async def lauf(client: httpx.AsyncClient, args, lag: LoopLag = None) -> dict:
+    messung = Messung()
+    lauf_id = f"{int(time.time())}{random.randint(100, 999)}"
+
+    users = await asyncio.gather(*(anmelden(client, messung, i, lauf_id) for i in range(args.users)))
+    admin = users[0]
+    await client.post("/admin/make-first-admin", headers=admin["headers"])
+
+    print(f"{args.users} User angemeldet, Last läuft {args.duration} s ...")
+    messung.latenzen.pop("register", None)
+    messung.latenzen.pop("login", None)
+
+    if lag:
+        lag.start()
+    start = time.perf_counter()
+    ende = start + args.duration
+    aufgaben = [virtueller_user(client, messung, user, WORKLOAD, ende, args.think, args.seed + i)
+                for i, user in enumerate(users)]
+    aufgaben.append(virtueller_user(client, messung, admin, ADMIN_WORKLOAD, ende, args.think * 4, args.seed - 1))
+    await asyncio.gather(*aufgaben)
+    dauer = time.perf_counter() - start
+    if lag:
+        await lag.stop()
+
+    return report(messung, dauer, lag)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="Anzahl virtueller User")
+    parser.add_argument("--duration", type=float, default=20, help="Dauer der Lastphase in Sekunden")
+    parser.add_argument("--think", type=float, default=0.2, help="Mittlere Denkzeit zwischen Aktionen in Sekunden")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--url", help="Laufenden Server testen statt der App im Prozess")
+    parser.add_argument("--latency", default="1.0", help="HTTP_REPLAY_LATENCY für die Stand-ins (Sekunden oder recorded)")
+    parser.add_argument("--fixtures", help="HTTP_FIXTURES_DIR mit aufgenommenen Antworten")
+    parser.add_argument("--json", type=Path, help="Ergebnis zusätzlich als JSON speichern")
+    args = parser.parse_args()
+
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=300) as client:
+            ergebnis = await lauf(client, args)
+    else:
+        # Stand-ins und Wegwerf-Datenbank müssen vor dem Import der App gesetzt sein
+        os.environ["HTTP_TRANSPORT_MODE"] = "replay"
+        os.environ["HTTP_REPLAY_LATENCY"] = args.latency
+        os.environ.setdefault("HTTP_REPLAY_FALLBACK", "stub")
+        if args.fixtures:
+            os.environ["HTTP_FIXTURES_DIR"] = str(Path(args.fixtures).resolve())
+        db_datei = Path(tempfile.mkdtemp()) / "loadtest.db"
+        os.environ["DATABASE_URL"] = f"sqlite:///{db_datei}"
+
+        from main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=300) as client:
+                ergebnis = await lauf(client, args, LoopLag())
+
+    if args.json:
+        args.json.write_text(json.dumps(ergebnis, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
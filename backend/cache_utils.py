@@ -0,0 +1,86 @@
+"""
+Kleine Cache-Bausteine für In-Process Caches
+"""
+
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import threading
+
+
+class LRUCache:
+    """
+    Thread-sicherer LRU-Cache mit fester Maximalgröße.
+    Der am längsten nicht benutzte Eintrag wird zuerst verdrängt.
+    """
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._data: "OrderedDict[str, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """Gibt den Eintrag zurück (oder None) und markiert ihn als zuletzt benutzt"""
+        with self._lock:
+            if key not in self._data:
+                return None
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def set(self, key: str, value: Any):
+        """Speichert einen Eintrag und verdrängt bei Bedarf den ältesten"""
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: str) -> Optional[Any]:
+        """Entfernt einen Eintrag"""
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class SingleFlight:
+    """
+    Fasst gleichzeitige Aufrufe mit demselben Schlüssel zusammen.
+
+    Der erste Aufrufer startet die Arbeit, alle weiteren warten auf dasselbe Ergebnis.
+    Fehler gehen an alle Wartenden; danach ist der Schlüssel wieder frei,
+    sodass ein späterer Versuch neu startet. Bricht ein Wartender ab
+    (z.B. Client-Disconnect), läuft die Arbeit für die anderen weiter.
+    """
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self.stats = {"ausgefuehrt": 0, "zusammengefasst": 0}
+
+    def in_flight(self, key: str) -> bool:
+        """Läuft für diesen Schlüssel gerade eine Ausführung?"""
+        return key in self._tasks
+
+    async def do(self, key: str, func: Callable[[], Awaitable[Any]]) -> Any:
+        """Führt func() aus oder wartet auf die bereits laufende Ausführung"""
+        task = self._tasks.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t, key=key: self._forget(key, t))
+            self.stats["ausgefuehrt"] += 1
+        else:
+            self.stats["zusammengefasst"] += 1
+        return await asyncio.shield(task)
+
+    def _forget(self, key: str, task: asyncio.Task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Fehler als abgerufen markieren, falls alle Wartenden abgebrochen haben
+            task.exception()
@@ -0,0 +1,114 @@
+"""
+Rechenkontext pro Analyse
+Die Finanz-Blöcke von /analyze rufen dieselben Rechner mehrfach mit identischen
+Eingaben auf (Basis-Cashflow in Miet-Variationen und Finanzierungsoptionen,
+Basis-Tilgungsplan im Investment-Vergleich ...).
+
+Mit @memoized markierte Rechner werden innerhalb von calculation_context()
+pro Eingabe-Kombination nur einmal berechnet. Die Eingaben eines Blocks sind seine
+Parameter (Defaults eingesetzt, Typ zählt mit: 0 und 0.0 sind verschiedene Eingaben).
+Außerhalb eines Kontexts rechnen die Funktionen wie bisher.
+
+Gemerkte Ergebnisse werden geteilt - Aufrufer dürfen sie nicht verändern.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+from typing import Any, Callable, Dict, Optional
+import inspect
+
+_aktiver_kontext: ContextVar[Optional["CalcContext"]] = ContextVar("calc_context", default=None)
+
+_stats = {"kontexte": 0, "berechnet": 0, "wiederverwendet": 0}
+_pro_funktion: Dict[str, Dict[str, int]] = {}
+
+
+class CalcContext:
+    """Ergebnisse und Zähler eines Rechendurchlaufs"""
+
+    def __init__(self):
+        self.ergebnisse: Dict[tuple, Any] = {}
+        self.berechnet: Dict[str, int] = {}
+        self.wiederverwendet: Dict[str, int] = {}
+
+    def zusammenfassung(self) -> Dict[str, Any]:
+        return {
+            "berechnet": sum(self.berechnet.values()),
+            "wiederverwendet": sum(self.wiederverwendet.values()),
+            "pro_funktion": {
+                name: {"berechnet": self.berechnet.get(name, 0), "wiederverwendet": self.wiederverwendet.get(name, 0)}
+                for name in sorted(set(self.berechnet) | set(self.wiederverwendet))
+            },
+        }
+
+
+def memoized(funktion: Callable) -> Callable:
+    """Merkt Ergebnisse im aktiven Rechenkontext (Schlüssel: Funktion + alle Parameter)"""
+    signatur = inspect.signature(funktion)
+    name = funktion.__name__
+
+    @wraps(funktion)
+    def wrapper(*args, **kwargs):
+        kontext = _aktiver_kontext.get()
+        if kontext is None:
+            return funktion(*args, **kwargs)
+
+        gebunden = signatur.bind(*args, **kwargs)
+        gebunden.apply_defaults()
+        try:
+            key = (name,) + tuple((type(wert), wert) for wert in gebunden.arguments.values())
+            hash(key)
+        except TypeError:
+            # Nicht hashbare Eingaben (Listen, Dicts) - ohne Memo rechnen
+            return funktion(*args, **kwargs)
+
+        if key in kontext.ergebnisse:
+            kontext.wiederverwendet[name] = kontext.wiederverwendet.get(name, 0) + 1
+            return kontext.ergebnisse[key]
+
+        ergebnis = funktion(*args, **kwargs)
+        kontext.ergebnisse[key] = ergebnis
+        kontext.berechnet[name] = kontext.berechnet.get(name, 0) + 1
+        return ergebnis
+
+    return wrapper
+
+
+@contextmanager
+def calculation_context():
+    """
+    Aktiviert einen Rechenkontext. Verschachtelte Aufrufe nutzen den äußeren Kontext mit.
+
+    Verwendung:
+        with calculation_context() as kontext:
+            finanz = ...
+        print(kontext.zusammenfassung())
+    """
+    vorhanden = _aktiver_kontext.get()
+    if vorhanden is not None:
+        yield vorhanden
+        return
+
+    kontext = CalcContext()
+    token = _aktiver_kontext.set(kontext)
+    try:
+        yield kontext
+    finally:
+        _aktiver_kontext.reset(token)
+        _stats["kontexte"] += 1
+        for zaehler, werte in (("berechnet", kontext.berechnet), ("wiederverwendet", kontext.wiederverwendet)):
+            for name, anzahl in werte.items():
+                _stats[zaehler] += anzahl
+                eintrag = _pro_funktion.setdefault(name, {"berechnet": 0, "wiederverwendet": 0})
+                eintrag[zaehler] += anzahl
+
+
+def get_calc_context_stats() -> Dict[str, Any]:
+    """Berechnete und wiederverwendete Rechner-Aufrufe über alle Kontexte (pro Prozess)"""
+    aufrufe = _stats["berechnet"] + _stats["wiederverwendet"]
+    return {
+        **_stats,
+        "dedup_rate": round(_stats["wiederverwendet"] / aufrufe, 4) if aufrufe else None,
+        "pro_funktion": {name: dict(werte) for name, werte in sorted(_pro_funktion.items())},
+    }
@@ -62,6 +62,32 @@ def run_migrations():
                     print("Migration: usage_limit_usd Spalte hinzugefügt")
                 except Exception as e:
                     print(f"Migration usage_limit_usd fehlgeschlagen: {e}")
+
+            # Prüfe und füge Prompt-Cache Token-Spalten zur usage_logs Tabelle hinzu
+            for column in ("cache_creation_input_tokens", "cache_read_input_tokens"):
+                try:
+                    conn.execute(text(f"SELECT {column} FROM usage_logs LIMIT 1"))
+                except Exception:
+                    conn.rollback()
+                    try:
+                        conn.execute(text(f"ALTER TABLE usage_logs ADD COLUMN {column} INTEGER DEFAULT 0"))
+                        conn.commit()
+                        print(f"Migration: {column} Spalte hinzugefügt")
+                    except Exception as e:
+                        print(f"Migration {column} fehlgeschlagen: {e}")
+
+            # Prüfe und füge ai_cache_key zur analyses Tabelle hinzu
+            try:
+                conn.execute(text("SELECT ai_cache_key FROM analyses LIMIT 1"))
+            except Exception:
+                conn.rollback()
+                try:
+                    conn.execute(text("ALTER TABLE analyses ADD COLUMN ai_cache_key VARCHAR"))
+                    conn.execute(text("CREATE INDEX IF NOT EXISTS ix_analyses_ai_cache_key ON analyses (ai_cache_key)"))
+                    conn.commit()
+                    print("Migration: ai_cache_key Spalte hinzugefügt")
+                except Exception as e:
+                    print(f"Migration ai_cache_key fehlgeschlagen: {e}")
     except Exception as e:
         print(f"Could not run migrations: {e}")
 
@@ -69,7 +95,7 @@ def run_migrations():
 def init_db(max_retries=5, retry_delay=3):
     """Initialisiert die Datenbank-Tabellen mit Retry-Logik"""
     # Importiere Models hier um sicherzustellen dass alle Tabellen registriert sind
-    from models import User, Analysis, UsageLog
+    from models import User, Analysis, UsageLog, MarketDataCache, PdfExtractionCache, AnalysisJob
 
     for attempt in range(max_retries):
         try:
@@ -0,0 +1,228 @@
+"""
+Aufnahme und Wiedergabe von HTTP-Antworten (Anthropic-API und Web-Suche)
+Damit lassen sich /analyze, /chat, /extract-pdf und die Marktrecherche ohne
+Internetzugang benchmarken und profilen (CI, abgeschottete Rechner).
+
+Die Transports sitzen unter den httpx-Clients - der komplette Request-Pfad
+(Anthropic-SDK inkl. Streaming, HTML-Parsing der Suche) läuft wie im Betrieb.
+
+Modi (HTTP_TRANSPORT_MODE):
+- live: normale Verbindungen (Standard)
+- record: echte Antworten werden zusätzlich als Fixture gespeichert
+- replay: Antworten kommen aus den Fixtures, keine Verbindung nach außen
+
+Schlüssel einer Fixture = SHA-256 über Methode, URL und Request-Body (JSON kanonisch).
+Request-Header (API-Key!) werden nie gespeichert.
+
+Konfiguration über Environment Variablen:
+- HTTP_TRANSPORT_MODE: live, record oder replay (default: live)
+- HTTP_FIXTURES_DIR: Ordner der Fixtures (default: fixtures/http im backend-Ordner)
+- HTTP_REPLAY_LATENCY: Künstliche Antwortzeit in Sekunden oder "recorded" für
+  die aufgenommene Dauer (default: 0). Streams verteilen sie über die Events.
+- HTTP_REPLAY_FALLBACK: Bei fehlender Fixture "error" (404) oder "stub" (synthetische
+  Antwort aus llm_stub bzw. leere Trefferseite) (default: error)
+"""
+
+from pathlib import Path
+from typing import Any, Dict, Optional
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import time
+import uuid
+
+import httpx
+
+from llm_stub import stub_text
+
+HTTP_TRANSPORT_MODE = os.getenv("HTTP_TRANSPORT_MODE", "live")
+HTTP_FIXTURES_DIR = Path(os.getenv("HTTP_FIXTURES_DIR", str(Path(__file__).resolve().parent / "fixtures" / "http")))
+HTTP_REPLAY_LATENCY = os.getenv("HTTP_REPLAY_LATENCY", "0")
+HTTP_REPLAY_FALLBACK = os.getenv("HTTP_REPLAY_FALLBACK", "error")
+
+# Nur diese Antwort-Header landen in der Fixture
+GESPEICHERTE_HEADER = ("content-type", "request-id")
+
+_stats = {"aufgenommen": 0, "wiedergegeben": 0, "fehlend": 0, "synthetisch": 0}
+
+
+def fixture_key(method: str, url: str, body: bytes) -> str:
+    """SHA-256 über Methode, URL und Body (JSON-Bodies kanonisch, Key-Reihenfolge egal)"""
+    try:
+        body = json.dumps(json.loads(body), sort_keys=True, ensure_ascii=False).encode("utf-8")
+    except (ValueError, UnicodeDecodeError):
+        pass
+    return hashlib.sha256(method.encode() + b" " + url.encode() + b"\n" + body).hexdigest()
+
+
+def _fixture_path(name: str, key: str) -> Path:
+    return HTTP_FIXTURES_DIR / name / f"{key}.json"
+
+
+def _prompt_preview(body: bytes) -> Optional[str]:
+    """Anfang der letzten User-Message (nur zur Orientierung in der Fixture)"""
+    try:
+        content = json.loads(body)["messages"][-1]["content"]
+    except (ValueError, KeyError, IndexError, TypeError):
+        return None
+    if not isinstance(content, str):
+        content = " ".join(block.get("text", "") for block in content if block.get("type") == "text")
+    return content[:200]
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    """Gibt einen Body in Stücken (SSE-Events) mit verteilter Latenz zurück"""
+
+    def __init__(self, stuecke, latenz: float):
+        self.stuecke = stuecke
+        self.latenz = latenz
+
+    async def __aiter__(self):
+        for stueck in self.stuecke:
+            if self.latenz:
+                await asyncio.sleep(self.latenz / len(self.stuecke))
+            yield stueck
+
+
+def _response(status_code: int, headers: Dict[str, str], body: bytes, latenz: float) -> httpx.Response:
+    if headers.get("content-type", "").startswith("text/event-stream"):
+        stuecke = [event + b"\n\n" for event in body.split(b"\n\n") if event.strip()] or [body]
+        return httpx.Response(status_code, headers=headers, stream=_ReplayStream(stuecke, latenz))
+    return httpx.Response(status_code, headers=headers, stream=_ReplayStream([body], latenz))
+
+
+class RecordingTransport(httpx.AsyncBaseTransport):
+    """Leitet Requests an den echten Transport weiter und speichert die Antworten"""
+
+    def __init__(self, name: str, transport: httpx.AsyncBaseTransport):
+        self.name = name
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        start = time.perf_counter()
+        response = await self.transport.handle_async_request(request)
+
+        # Body komplett lesen und dekomprimieren (gzip etc.), damit die Fixture lesbar bleibt
+        roh = httpx.Response(response.status_code, headers=response.headers, stream=response.stream)
+        inhalt = await roh.aread()
+        await roh.aclose()
+        dauer = time.perf_counter() - start
+
+        headers = {k: v for k, v in response.headers.items() if k.lower() in GESPEICHERTE_HEADER}
+        try:
+            gespeichert = {"text": inhalt.decode("utf-8")}
+        except UnicodeDecodeError:
+            gespeichert = {"base64": base64.b64encode(inhalt).decode("ascii")}
+
+        key = fixture_key(request.method, str(request.url), body)
+        pfad = _fixture_path(self.name, key)
+        pfad.parent.mkdir(parents=True, exist_ok=True)
+        pfad.write_text(json.dumps({
+            "request": {"method": request.method, "url": str(request.url), "prompt": _prompt_preview(body)},
+            "status_code": response.status_code,
+            "headers": headers,
+            "body": gespeichert,
+            "dauer_s": round(dauer, 3),
+        }, ensure_ascii=False, indent=2), encoding="utf-8")
+        _stats["aufgenommen"] += 1
+
+        return httpx.Response(response.status_code, headers=headers, content=inhalt)
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+class ReplayTransport(httpx.AsyncBaseTransport):
+    """Beantwortet Requests aus den Fixtures - ohne Netzwerk"""
+
+    def __init__(self, name: str, latenz: str = HTTP_REPLAY_LATENCY, fallback: str = HTTP_REPLAY_FALLBACK):
+        self.name = name
+        self.latenz = latenz
+        self.fallback = fallback
+
+    def _latenz(self, fixture: Optional[Dict[str, Any]]) -> float:
+        if self.latenz == "recorded":
+            return float(fixture.get("dauer_s", 0)) if fixture else 0.0
+        return float(self.latenz)
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        body = await request.aread()
+        pfad = _fixture_path(self.name, fixture_key(request.method, str(request.url), body))
+
+        if pfad.exists():
+            fixture = json.loads(pfad.read_text(encoding="utf-8"))
+            gespeichert = fixture["body"]
+            inhalt = gespeichert["text"].encode("utf-8") if "text" in gespeichert else base64.b64decode(gespeichert["base64"])
+            _stats["wiedergegeben"] += 1
+            return _response(fixture["status_code"], fixture["headers"], inhalt, self._latenz(fixture))
+
+        _stats["fehlend"] += 1
+        if self.fallback == "stub":
+            _stats["synthetisch"] += 1
+            return self._synthetic(request, body)
+
+        fehler = {"type": "error", "error": {"type": "not_found_error",
+                                             "message": f"Keine Fixture für {request.method} {request.url} ({pfad.name})"}}
+        return httpx.Response(404, json=fehler)
+
+    def _synthetic(self, request: httpx.Request, body: bytes) -> httpx.Response:
+        """Antwort ohne Fixture: Messages-API über llm_stub, sonst leere HTML-Seite"""
+        latenz = self._latenz(None)
+        if not request.url.path.endswith("/messages"):
+            return _response(200, {"content-type": "text/html; charset=utf-8"}, b"<html><body></body></html>", latenz)
+
+        params = json.loads(body)
+        text = stub_text(params)
+        message = {
+            "id": f"msg_replay_{uuid.uuid4().hex[:16]}",
+            "type": "message",
+            "role": "assistant",
+            "model": params.get("model"),
+            "content": [{"type": "text", "text": text}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {"input_tokens": len(body) // 4, "output_tokens": len(text) // 4,
+                      "cache_creation_input_tokens": 0, "cache_read_input_tokens": 0},
+        }
+        if not params.get("stream"):
+            return _response(200, {"content-type": "application/json"}, json.dumps(message).encode("utf-8"), latenz)
+
+        def sse(event: str, daten: Dict[str, Any]) -> str:
+            return f"event: {event}\ndata: {json.dumps({'type': event, **daten})}\n\n"
+
+        start = {**message, "content": [], "stop_reason": None, "usage": {**message["usage"], "output_tokens": 0}}
+        events = [sse("message_start", {"message": start}),
+                  sse("content_block_start", {"index": 0, "content_block": {"type": "text", "text": ""}})]
+        events += [sse("content_block_delta", {"index": 0, "delta": {"type": "text_delta", "text": text[i:i + 40]}})
+                   for i in range(0, len(text), 40)]
+        events += [sse("content_block_stop", {"index": 0}),
+                   sse("message_delta", {"delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                         "usage": {"output_tokens": message["usage"]["output_tokens"]}}),
+                   sse("message_stop", {})]
+        return _response(200, {"content-type": "text/event-stream"}, "".join(events).encode("utf-8"), latenz)
+
+
+def build_transport(name: str, http2: bool = False, limits: Optional[httpx.Limits] = None) -> Optional[httpx.AsyncBaseTransport]:
+    """
+    Transport für einen httpx-Client je nach HTTP_TRANSPORT_MODE.
+
+    Args:
+        name: Unterordner der Fixtures (z.B. "anthropic", "search")
+        http2, limits: Einstellungen des echten Transports (live/record)
+
+    Returns:
+        None im live-Modus (httpx-Standard), sonst Record- oder Replay-Transport
+    """
+    if HTTP_TRANSPORT_MODE == "replay":
+        return ReplayTransport(name)
+    if HTTP_TRANSPORT_MODE == "record":
+        return RecordingTransport(name, httpx.AsyncHTTPTransport(http2=http2, limits=limits or httpx.Limits()))
+    return None
+
+
+def get_transport_stats() -> Dict[str, Any]:
+    """Zähler für Aufnahme/Wiedergabe (pro Prozess)"""
+    return {"modus": HTTP_TRANSPORT_MODE, **_stats}
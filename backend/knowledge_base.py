@@ -5,20 +5,45 @@ Version 3.0 ULTIMATE - Januar 2026
 
 WICHTIG: Um das "Gehirn" der KI zu ändern:
 1. Bearbeite die Datei: backend/brain/KNOWLEDGE.md
-2. Starte den Server neu
+2. Fertig - kein Neustart nötig
 
-Die KNOWLEDGE.md Datei wird bei jedem Start geladen und an die KI übergeben.
+Die KNOWLEDGE.md Datei wird beim Start geladen und im Speicher gehalten.
+Änderungen werden anhand von mtime/inode/Größe erkannt und automatisch
+nachgeladen (Prüfung höchstens alle KNOWLEDGE_RELOAD_CHECK_SECONDS Sekunden).
+Mit KNOWLEDGE_TOKEN_BUDGET > 0 werden nur die passenden Abschnitte gesendet
+(siehe knowledge_index.py).
 """
 
 from typing import List, Dict, Any, Optional
+from datetime import datetime, timezone
+import hashlib
 import math
 import os
+import re
+import threading
+import time
 from pathlib import Path
 
+from knowledge_index import KnowledgeIndex, build_retrieval_query, estimate_tokens
+
 # Pfad zur Knowledge-Datei
 BRAIN_DIR = Path(__file__).parent / "brain"
 KNOWLEDGE_FILE = BRAIN_DIR / "KNOWLEDGE.md"
 
+# Token-Budget für das Wissen im Analyse-Prompt (0 = komplette KNOWLEDGE.md senden)
+KNOWLEDGE_TOKEN_BUDGET = int(os.getenv("KNOWLEDGE_TOKEN_BUDGET", "0"))
+
+# Wie oft (in Sekunden) höchstens geprüft wird, ob sich KNOWLEDGE.md geändert hat
+KNOWLEDGE_RELOAD_CHECK_SECONDS = float(os.getenv("KNOWLEDGE_RELOAD_CHECK_SECONDS", "2"))
+
+# Geladener Stand der Wissensdatei (Text, Hash, Index, fertiger System-Prompt)
+_knowledge_state: Dict[str, Any] = {
+    "signatur": None,
+    "letzte_pruefung": 0.0,
+    "reload_count": 0,
+}
+_knowledge_lock = threading.Lock()
+
 
 def load_knowledge_from_file() -> str:
     """
@@ -33,6 +58,109 @@ def load_knowledge_from_file() -> str:
             print(f"Warnung: Konnte KNOWLEDGE.md nicht laden: {e}")
     return None
 
+
+def _file_signature() -> Optional[tuple]:
+    """mtime/inode/Größe der KNOWLEDGE.md (None wenn nicht vorhanden)"""
+    try:
+        stat = KNOWLEDGE_FILE.stat()
+    except OSError:
+        return None
+    return (stat.st_mtime_ns, stat.st_ino, stat.st_size)
+
+
+def _parse_knowledge_version(text: str) -> Optional[str]:
+    """Liest die Versionsnummer aus der Wissensdatei (Titelzeile 'V4.0' oder letzte 'Version 4.0' Angabe)"""
+    titel = text.split("\n", 1)[0]
+    match = re.search(r"\bV(\d+(?:\.\d+)*)", titel)
+    if match:
+        return match.group(1)
+    versionen = re.findall(r"Version\s+(\d+(?:\.\d+)*)", text)
+    return versionen[-1] if versionen else None
+
+
+def _reload_knowledge(signatur: Optional[tuple]):
+    """Liest KNOWLEDGE.md neu ein und baut Index + System-Prompt einmalig auf"""
+    file_knowledge = load_knowledge_from_file()
+    prompt = _compose_system_prompt(file_knowledge)
+    index = KnowledgeIndex(file_knowledge) if file_knowledge else None
+
+    _knowledge_state.update({
+        "signatur": signatur,
+        "text": file_knowledge,
+        "sha256": hashlib.sha256(file_knowledge.encode("utf-8")).hexdigest() if file_knowledge else None,
+        "version": _parse_knowledge_version(file_knowledge) if file_knowledge else None,
+        "geaendert_am": datetime.fromtimestamp(signatur[0] / 1e9, tz=timezone.utc) if signatur else None,
+        "geladen_am": datetime.now(timezone.utc),
+        "index": index,
+        "prompt": prompt,
+        "blocks": [{"type": "text", "text": prompt, "cache_control": {"type": "ephemeral"}}],
+        # Retrieval: statischer Teil (Anweisungen + TEIL 0) als eigener, gecachter Block
+        "retrieval_basis_block": {
+            "type": "text",
+            "text": _compose_system_prompt(index.pflicht_knowledge()),
+            "cache_control": {"type": "ephemeral"},
+        } if index else None,
+    })
+    _knowledge_state["reload_count"] += 1
+    print(f"Knowledge Base geladen: Version {_knowledge_state['version']}, "
+          f"{len(file_knowledge or '')} Zeichen, {_knowledge_state['sha256'] or 'eingebaut'}")
+
+
+def _get_knowledge_state(force_check: bool = False) -> Dict[str, Any]:
+    """
+    Gibt den geladenen Stand zurück.
+    Lädt nur neu, wenn sich mtime/inode/Größe der Datei geändert haben.
+    """
+    jetzt = time.monotonic()
+    if (not force_check and "prompt" in _knowledge_state
+            and jetzt - _knowledge_state["letzte_pruefung"] < KNOWLEDGE_RELOAD_CHECK_SECONDS):
+        return _knowledge_state
+
+    with _knowledge_lock:
+        signatur = _file_signature()
+        if "prompt" not in _knowledge_state or signatur != _knowledge_state["signatur"]:
+            _reload_knowledge(signatur)
+        _knowledge_state["letzte_pruefung"] = jetzt
+    return _knowledge_state
+
+
+def build_knowledge_index() -> Optional[KnowledgeIndex]:
+    """
+    Lädt KNOWLEDGE.md und baut den Abschnitts-Index auf (beim Start).
+    """
+    return _get_knowledge_state(force_check=True)["index"]
+
+
+def get_knowledge_index() -> Optional[KnowledgeIndex]:
+    """Gibt den Abschnitts-Index des aktuellen Stands zurück"""
+    return _get_knowledge_state()["index"]
+
+
+def get_knowledge_version() -> str:
+    """SHA-256 der geladenen KNOWLEDGE.md ("eingebaut" ohne Datei) - z.B. für Cache-Schlüssel"""
+    return _get_knowledge_state()["sha256"] or "eingebaut"
+
+
+def get_knowledge_info() -> Dict[str, Any]:
+    """Infos zum geladenen Wissensstand (für Admin-Endpoint)"""
+    state = _get_knowledge_state(force_check=True)
+    text = state["text"] or ""
+    return {
+        "datei": str(KNOWLEDGE_FILE),
+        "quelle": "KNOWLEDGE.md" if state["text"] else "eingebaut",
+        "version": state["version"],
+        "sha256": state["sha256"],
+        "groesse_bytes": len(text.encode("utf-8")),
+        "zeichen": len(text),
+        "zeilen": text.count("\n") + 1 if text else 0,
+        "abschnitte": len(state["index"].abschnitte) if state["index"] else 0,
+        "system_prompt_zeichen": len(state["prompt"]),
+        "system_prompt_tokens_geschaetzt": estimate_tokens(state["prompt"]),
+        "geaendert_am": state["geaendert_am"],
+        "geladen_am": state["geladen_am"],
+        "reload_count": state["reload_count"],
+    }
+
 # =============================================================================
 # PHILOSOPHIE: NIEMALS NUR "NEIN" SAGEN!
 # =============================================================================
@@ -975,20 +1103,8 @@ Nutze immer Ist-Miete, nicht Potenzialmiete für Berechnungen!
 """
 
 
-def get_ai_system_prompt() -> str:
-    """
-    Gibt den vollständigen System-Prompt für die KI zurück.
-
-    V3.0: LIVE-DATEN PFLICHT!
-    Die KI muss die recherchierten Marktdaten verwenden.
-
-    Lädt zuerst aus der KNOWLEDGE.md Datei (falls vorhanden),
-    dann wird der Standard-Prompt hinzugefügt.
-
-    Um das Wissen zu ändern: Bearbeite backend/brain/KNOWLEDGE.md
-    """
-    # V3.0 Live-Daten Hinweis
-    v3_live_data_instruction = """
+# V3.0 Live-Daten Hinweis (statisch, Teil des gecachten System-Prompts)
+V3_LIVE_DATA_INSTRUCTION = """
 🔴🔴🔴 V3.0 WICHTIGSTE REGEL 🔴🔴🔴
 
 Du MUSST bei JEDER Immobilienbewertung die LIVE-RECHERCHIERTEN MARKTDATEN verwenden!
@@ -1010,14 +1126,14 @@ BEISPIEL FALSCH:
 🔴🔴🔴 ENDE V3.0 REGEL 🔴🔴🔴
 """
 
-    # Versuche Knowledge aus Datei zu laden
-    file_knowledge = load_knowledge_from_file()
 
+def _compose_system_prompt(file_knowledge: Optional[str]) -> str:
+    """Setzt V3.0-Anweisung, Wissen und technischen Prompt zusammen"""
     if file_knowledge:
         # Kombiniere V3.0-Anweisung + Datei-Wissen + technischer Prompt
         return f"""Du bist AmlakI - der beste Immobilienberater Deutschlands!
 
-{v3_live_data_instruction}
+{V3_LIVE_DATA_INSTRUCTION}
 
 ## DEIN WISSEN (aus KNOWLEDGE.md):
 
@@ -1029,6 +1145,70 @@ BEISPIEL FALSCH:
 """
 
     # Fallback: V3.0 Anweisung + eingebauter Prompt
-    return f"""{v3_live_data_instruction}
+    return f"""{V3_LIVE_DATA_INSTRUCTION}
 
 {SYSTEM_PROMPT_IMMOBILIEN_BERATER}"""
+
+
+def get_ai_system_prompt(
+    context: Optional[Any] = None,
+    token_budget: Optional[int] = None,
+    verwendungszweck: Optional[str] = None
+) -> str:
+    """
+    Gibt den vollständigen System-Prompt für die KI zurück.
+
+    V3.0: LIVE-DATEN PFLICHT!
+    Die KI muss die recherchierten Marktdaten verwenden.
+
+    Basis ist die KNOWLEDGE.md Datei (falls vorhanden), danach der Standard-Prompt.
+    Der komplette Prompt wird im Speicher gehalten und nur neu gebaut,
+    wenn sich die Datei ändert.
+
+    Mit token_budget werden statt der ganzen Datei nur die zum Kontext
+    passenden Abschnitte (+ Pflicht-Regeln aus TEIL 0) übernommen.
+
+    Um das Wissen zu ändern: Bearbeite backend/brain/KNOWLEDGE.md
+
+    Args:
+        context: Immobiliendaten (dict) oder Chat-Nachricht (str) für die Abschnittssuche
+        token_budget: Max. Tokens für das Wissen (None/0 = komplette Datei)
+        verwendungszweck: "kapitalanlage" oder "eigennutzung"
+    """
+    state = _get_knowledge_state()
+    if token_budget and state["index"]:
+        query = build_retrieval_query(context, verwendungszweck)
+        return _compose_system_prompt(state["index"].build_knowledge(query, token_budget))
+    return state["prompt"]
+
+
+def get_ai_system_blocks(
+    context: Optional[Any] = None,
+    token_budget: Optional[int] = None,
+    verwendungszweck: Optional[str] = None
+) -> List[Dict[str, Any]]:
+    """
+    Gibt den System-Prompt als Content-Blocks mit Cache-Breakpoint zurück.
+
+    Der statische Teil (V3.0-Regel, KNOWLEDGE.md, technische Anweisungen)
+    ist bei jedem Call identisch und wird per Prompt-Caching wiederverwendet.
+    Die objektbezogenen Daten gehören in die User-Message dahinter.
+
+    Mit token_budget: erst der gecachte statische Block (Anweisungen + TEIL 0),
+    dann die pro Objekt ausgewählten Abschnitte ohne Breakpoint - sie ändern
+    sich bei jedem Call, ein Cache-Write dafür würde nie gelesen.
+    """
+    state = _get_knowledge_state()
+    if not token_budget or not state["index"]:
+        # Vorgefertigte Blocks des aktuellen Stands - als Kopie, damit Aufrufer
+        # den gemeinsamen Prompt nicht verändern können (der Text selbst wird nicht kopiert)
+        return [dict(block) for block in state["blocks"]]
+
+    query = build_retrieval_query(context, verwendungszweck)
+    abschnitte = state["index"].build_retrieved_knowledge(query, token_budget)
+    if not abschnitte:
+        return [dict(state["retrieval_basis_block"])]
+    return [
+        dict(state["retrieval_basis_block"]),
+        {"type": "text", "text": f"## PASSENDES WISSEN ZU DIESER ANFRAGE (aus KNOWLEDGE.md):\n\n{abschnitte}"},
+    ]
@@ -0,0 +1,279 @@
+"""
+AmlakI Knowledge Index
+Abschnittsweise Suche (BM25) über brain/KNOWLEDGE.md
+
+Statt die komplette Wissensdatei (~130k Tokens) bei jeder Analyse mitzuschicken,
+wird sie an den #/## Überschriften in Abschnitte zerlegt und lexikalisch indexiert.
+Pro Anfrage werden nur die relevantesten Abschnitte + die Pflicht-Regeln (TEIL 0)
+in den System-Prompt übernommen.
+"""
+
+from typing import List, Dict, Any, Optional
+from collections import Counter
+import math
+import re
+
+# Schätzung für deutschen Markdown-Text mit Emojis (gemessen mit count_tokens: ~2,4 Zeichen/Token)
+CHARS_PER_TOKEN = 2.4
+
+# Abschnitte über dieser Größe werden zusätzlich an ### Überschriften geteilt
+MAX_SECTION_CHARS = 12000
+
+# BM25 Parameter
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+# Abschnitte, die IMMER im Prompt landen
+PFLICHT_PATTERN = re.compile(r"TEIL 0:", re.IGNORECASE)
+
+STOPWORDS = {
+    "der", "die", "das", "und", "oder", "ein", "eine", "einer", "eines", "einem", "einen",
+    "ist", "sind", "mit", "für", "von", "bei", "auf", "aus", "als", "auch", "nicht", "nur",
+    "wie", "was", "wenn", "dann", "den", "dem", "des", "im", "in", "zu", "zum", "zur", "am",
+    "an", "es", "er", "sie", "wir", "ihr", "du", "ich", "bis", "pro", "über", "unter", "nach",
+    "vor", "noch", "mehr", "kein", "keine", "immer", "null", "true", "false", "none"
+}
+
+# Zusätzliche Suchbegriffe je Verwendungszweck
+ZWECK_BEGRIFFE = {
+    "kapitalanlage": "cashflow rendite bruttorendite kaufpreisfaktor miete eigenkapitalrendite afa steuer",
+    "eigennutzung": "selbstnutzer eigennutzung kfw förderung finanzierung rate"
+}
+
+
+def estimate_tokens(text: str) -> int:
+    """Schätzt die Token-Anzahl eines Textes"""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def tokenize(text: str) -> List[str]:
+    """Zerlegt Text in normalisierte Suchbegriffe (klein, ohne Stoppwörter, leicht gestemmt)"""
+    begriffe = []
+    for wort in re.findall(r"[a-zäöüß0-9]+", text.lower()):
+        if len(wort) < 3 or wort in STOPWORDS:
+            continue
+        # Leichtes Stemming für deutsche Flexionsendungen
+        if len(wort) > 5:
+            for endung in ("ungen", "en", "er", "es", "e", "n", "s"):
+                if wort.endswith(endung):
+                    wort = wort[:-len(endung)]
+                    break
+        begriffe.append(wort)
+    return begriffe
+
+
+def _normalize_title(titel: str) -> str:
+    """Überschrift ohne Emojis und Klammer-Zusätze (zur Duplikat-Erkennung)"""
+    titel = re.sub(r"\(.*?\)", "", titel)
+    titel = re.sub(r"[^\w\s-]", "", titel.lower())
+    return re.sub(r"\s+", " ", titel).strip()
+
+
+def _chars(lines: List[str], start: int, ende: int) -> int:
+    """Zeichenanzahl eines Zeilenbereichs"""
+    return sum(len(line) + 1 for line in lines[start:ende])
+
+
+def _split_by_size(lines: List[str], start: int, ende: int) -> List[tuple]:
+    """Teilt einen Zeilenbereich (z.B. langen Code-Block) in Stücke <= MAX_SECTION_CHARS"""
+    teile = []
+    t_start = start
+    groesse = 0
+    for i in range(start, ende):
+        groesse += len(lines[i]) + 1
+        if groesse > MAX_SECTION_CHARS and i > t_start:
+            teile.append((t_start, i))
+            t_start = i
+            groesse = len(lines[i]) + 1
+    teile.append((t_start, ende))
+    return teile
+
+
+def chunk_markdown(text: str) -> List[Dict[str, Any]]:
+    """
+    Zerlegt Markdown an # und ## Überschriften in Abschnitte.
+    Überschriften innerhalb von Code-Blöcken werden ignoriert.
+    Sehr große Abschnitte werden zusätzlich an ### Überschriften geteilt.
+
+    Returns:
+        Liste von Abschnitten (dicts) in Dokument-Reihenfolge
+    """
+    lines = text.split("\n")
+    grenzen = []  # (zeilen_index, ebene)
+    im_code = False
+    for i, line in enumerate(lines):
+        if line.strip().startswith("```"):
+            im_code = not im_code
+            continue
+        if im_code:
+            continue
+        match = re.match(r"^(#{1,3}) ", line)
+        if match:
+            grenzen.append((i, len(match.group(1))))
+
+    # Zuerst nur an #/## schneiden
+    haupt_grenzen = [g for g in grenzen if g[1] <= 2]
+    if not haupt_grenzen or haupt_grenzen[0][0] != 0:
+        haupt_grenzen.insert(0, (0, 0))
+
+    rohe_abschnitte = []
+    for idx, (start, ebene) in enumerate(haupt_grenzen):
+        ende = haupt_grenzen[idx + 1][0] if idx + 1 < len(haupt_grenzen) else len(lines)
+        rohe_abschnitte.append((start, ende, ebene))
+
+    abschnitte = []
+    top_titel = ""
+    for start, ende, ebene in rohe_abschnitte:
+        titel = lines[start].lstrip("#").strip() if ebene else ""
+        if ebene == 1 and re.search(r"\w", titel):
+            # Rein dekorative Trennlinien (# ═══) sind keine Überschrift
+            top_titel = titel
+
+        teile = [(start, ende)]
+        if _chars(lines, start, ende) > MAX_SECTION_CHARS:
+            unter = [g[0] for g in grenzen if g[1] == 3 and start < g[0] < ende]
+            schnitte = [start] + unter + [ende]
+            teile = []
+            for t_start, t_ende in zip(schnitte, schnitte[1:]):
+                teile.extend(_split_by_size(lines, t_start, t_ende))
+
+        for teil_nr, (t_start, t_ende) in enumerate(teile):
+            teil_text = "\n".join(lines[t_start:t_ende]).strip()
+            if not teil_text:
+                continue
+            teil_titel = titel
+            duplikat_key = _normalize_title(titel)
+            if teil_nr > 0:
+                erste_zeile = lines[t_start]
+                unter_titel = erste_zeile.lstrip("#").strip() if erste_zeile.startswith("### ") else f"Teil {teil_nr + 1}"
+                teil_titel = f"{titel} › {unter_titel}"
+                duplikat_key = f"{duplikat_key} #{teil_nr}"
+                # Kontext der Überschrift mitgeben, damit der Teil verständlich bleibt
+                teil_text = f"## {titel} (Fortsetzung)\n\n{teil_text}"
+
+            pfad = f"{top_titel} › {teil_titel}" if ebene == 2 and top_titel else teil_titel
+            abschnitte.append({
+                "id": len(abschnitte),
+                "titel": teil_titel,
+                "pfad": pfad,
+                "text": teil_text,
+                "tokens": estimate_tokens(teil_text),
+                "pflicht": bool(PFLICHT_PATTERN.search(pfad)),
+                "duplikat_key": duplikat_key
+            })
+
+    return abschnitte
+
+
+class KnowledgeIndex:
+    """
+    In-Process BM25 Index über die Abschnitte der Wissensdatei.
+    Wird einmal pro geladener KNOWLEDGE.md aufgebaut.
+    """
+
+    def __init__(self, text: str):
+        self.abschnitte = chunk_markdown(text)
+        self.gesamt_tokens = estimate_tokens(text)
+
+        self._begriffe: List[Counter] = []
+        self._laengen: List[int] = []
+        dokument_frequenz: Counter = Counter()
+
+        for abschnitt in self.abschnitte:
+            # Überschrift doppelt gewichten
+            begriffe = Counter(tokenize(abschnitt["text"]) + tokenize(abschnitt["pfad"]) * 2)
+            self._begriffe.append(begriffe)
+            self._laengen.append(sum(begriffe.values()))
+            dokument_frequenz.update(begriffe.keys())
+
+        anzahl = len(self.abschnitte) or 1
+        self._avg_laenge = (sum(self._laengen) / anzahl) if self._laengen else 0
+        self._idf = {
+            begriff: math.log(1 + (anzahl - df + 0.5) / (df + 0.5))
+            for begriff, df in dokument_frequenz.items()
+        }
+
+    def score(self, query: str) -> List[float]:
+        """Berechnet den BM25-Score jedes Abschnitts für die Anfrage"""
+        query_begriffe = set(tokenize(query))
+        scores = []
+        for begriffe, laenge in zip(self._begriffe, self._laengen):
+            score = 0.0
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * laenge / self._avg_laenge) if self._avg_laenge else BM25_K1
+            for begriff in query_begriffe:
+                tf = begriffe.get(begriff)
+                if tf:
+                    score += self._idf[begriff] * tf * (BM25_K1 + 1) / (tf + norm)
+            scores.append(score)
+        return scores
+
+    def retrieve(self, query: str, token_budget: int) -> List[Dict[str, Any]]:
+        """
+        Wählt Pflicht-Abschnitte + die bestbewerteten Abschnitte innerhalb des Token-Budgets.
+        Doppelte Abschnitte (gleiche Überschrift) werden nur einmal übernommen.
+
+        Returns:
+            Ausgewählte Abschnitte in Dokument-Reihenfolge
+        """
+        ausgewaehlt = [a for a in self.abschnitte if a["pflicht"]]
+        verbraucht = sum(a["tokens"] for a in ausgewaehlt)
+        gesehene_keys = {a["duplikat_key"] for a in ausgewaehlt}
+
+        scores = self.score(query)
+        rangliste = sorted(
+            (i for i, a in enumerate(self.abschnitte) if not a["pflicht"] and scores[i] > 0),
+            key=lambda i: scores[i],
+            reverse=True
+        )
+        for i in rangliste:
+            abschnitt = self.abschnitte[i]
+            if abschnitt["duplikat_key"] and abschnitt["duplikat_key"] in gesehene_keys:
+                continue
+            if verbraucht + abschnitt["tokens"] > token_budget:
+                continue
+            ausgewaehlt.append(abschnitt)
+            verbraucht += abschnitt["tokens"]
+            gesehene_keys.add(abschnitt["duplikat_key"])
+
+        return sorted(ausgewaehlt, key=lambda a: a["id"])
+
+    def build_knowledge(self, query: str, token_budget: int) -> str:
+        """Setzt die ausgewählten Abschnitte wieder zu einem Markdown-Text zusammen"""
+        return "\n\n".join(a["text"] for a in self.retrieve(query, token_budget))
+
+    def pflicht_knowledge(self) -> str:
+        """Nur die Pflicht-Abschnitte (TEIL 0) - bei jeder Anfrage gleich"""
+        return "\n\n".join(a["text"] for a in self.abschnitte if a["pflicht"])
+
+    def build_retrieved_knowledge(self, query: str, token_budget: int) -> str:
+        """Nur die zur Anfrage ausgewählten Abschnitte ohne Pflicht-Abschnitte (Budget zählt beide)"""
+        return "\n\n".join(a["text"] for a in self.retrieve(query, token_budget) if not a["pflicht"])
+
+
+def build_retrieval_query(context: Optional[Any], verwendungszweck: Optional[str] = None) -> str:
+    """
+    Baut den Suchtext aus Objekt- oder Chat-Kontext.
+
+    Args:
+        context: Freitext (Chat-Nachricht) oder dict (Immobiliendaten, Analyse-Kontext)
+        verwendungszweck: "kapitalanlage" oder "eigennutzung"
+    """
+    teile = []
+    if isinstance(context, dict):
+        for key, value in context.items():
+            if value is None or value is False:
+                continue
+            if isinstance(value, dict):
+                teile.append(build_retrieval_query(value))
+            elif isinstance(value, list):
+                teile.extend(build_retrieval_query(v) if isinstance(v, dict) else str(v) for v in value)
+            else:
+                teile.append(f"{key} {value}")
+    elif context:
+        teile.append(str(context))
+
+    if verwendungszweck:
+        teile.append(verwendungszweck)
+        teile.append(ZWECK_BEGRIFFE.get(verwendungszweck, ""))
+
+    return " ".join(t for t in teile if t)
@@ -0,0 +1,112 @@
+"""
+Prozessweiter Anthropic-Client
+Ein gemeinsamer AsyncAnthropic-Client mit Keep-Alive Connection-Pool,
+damit LLM-Calls den Event-Loop nicht blockieren.
+
+Konfiguration über Environment Variablen:
+- ANTHROPIC_MAX_CONNECTIONS: Max. offene HTTP-Verbindungen (default: 20)
+- ANTHROPIC_MAX_KEEPALIVE: Max. Keep-Alive Verbindungen im Pool (default: 10)
+- ANTHROPIC_MAX_CONCURRENCY: Max. gleichzeitige LLM-Calls (default: 8)
+- ANTHROPIC_TIMEOUT: Timeout pro Call in Sekunden (default: 120)
+- LLM_PROVIDER: anthropic oder stub (lokale Antworten ohne API-Call, siehe llm_stub.py)
+- HTTP_TRANSPORT_MODE: live, record oder replay (siehe http_replay.py)
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import anthropic
+import httpx
+from fastapi import HTTPException
+
+from http_replay import HTTP_TRANSPORT_MODE, build_transport
+from llm_stub import stub_create_message, stub_stream_message
+
+MAX_CONNECTIONS = int(os.getenv("ANTHROPIC_MAX_CONNECTIONS", "20"))
+MAX_KEEPALIVE = int(os.getenv("ANTHROPIC_MAX_KEEPALIVE", "10"))
+MAX_CONCURRENCY = int(os.getenv("ANTHROPIC_MAX_CONCURRENCY", "8"))
+TIMEOUT_SECONDS = float(os.getenv("ANTHROPIC_TIMEOUT", "120"))
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "anthropic")
+
+_client: Optional[anthropic.AsyncAnthropic] = None
+_semaphore: Optional[asyncio.Semaphore] = None
+
+
+def get_anthropic_client() -> anthropic.AsyncAnthropic:
+    """Gibt den gemeinsamen AsyncAnthropic Client zurück (wird beim ersten Aufruf erstellt)"""
+    global _client
+    if _client is None:
+        api_key = os.getenv("ANTHROPIC_API_KEY")
+        if not api_key and HTTP_TRANSPORT_MODE == "replay":
+            api_key = "replay"  # Wiedergabe braucht keinen echten Key
+        if not api_key:
+            raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY nicht konfiguriert")
+        limits = httpx.Limits(
+            max_connections=MAX_CONNECTIONS,
+            max_keepalive_connections=MAX_KEEPALIVE,
+        )
+        _client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            timeout=TIMEOUT_SECONDS,
+            http_client=anthropic.DefaultAsyncHttpxClient(
+                limits=limits,
+                timeout=TIMEOUT_SECONDS,
+                transport=build_transport("anthropic", limits=limits),
+            ),
+        )
+    return _client
+
+
+def get_llm_semaphore() -> asyncio.Semaphore:
+    """Begrenzt die Anzahl gleichzeitiger LLM-Calls im Prozess"""
+    global _semaphore
+    if _semaphore is None:
+        _semaphore = asyncio.Semaphore(MAX_CONCURRENCY)
+    return _semaphore
+
+
+async def create_message(**kwargs):
+    """
+    Führt messages.create auf dem gemeinsamen Client aus.
+    Wartet auf einen freien Slot, falls bereits MAX_CONCURRENCY Calls laufen.
+    """
+    if LLM_PROVIDER == "stub":
+        async with get_llm_semaphore():
+            return await stub_create_message(**kwargs)
+
+    client = get_anthropic_client()
+    async with get_llm_semaphore():
+        return await client.messages.create(**kwargs)
+
+
+@asynccontextmanager
+async def stream_message(**kwargs):
+    """
+    Streaming-Variante von create_message (messages.stream).
+    Der Slot bleibt belegt, bis der Stream geschlossen ist.
+
+    Verwendung:
+        async with stream_message(...) as stream:
+            async for text in stream.text_stream: ...
+            final = await stream.get_final_message()
+    """
+    if LLM_PROVIDER == "stub":
+        async with get_llm_semaphore():
+            async with stub_stream_message(**kwargs) as stream:
+                yield stream
+        return
+
+    client = get_anthropic_client()
+    async with get_llm_semaphore():
+        async with client.messages.stream(**kwargs) as stream:
+            yield stream
+
+
+async def close_anthropic_client():
+    """Schließt den Connection-Pool (beim Shutdown)"""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -0,0 +1,140 @@
+"""
+Lokaler LLM-Stub (LLM_PROVIDER=stub)
+Antwortet ohne API-Call und ohne Kosten mit deterministischen, plausiblen
+Antworten im Format der Anthropic-Messages. Gedacht für Lasttests und
+Offline-Entwicklung (z.B. Portfolio-Analyse mit 50 Exposés).
+
+Erkannt werden die Prompts der App:
+- KI-Bewertung (/analyze): JSON mit 9 Kriterien, Stärken, Schwächen, Zusammenfassung
+- Marktrecherche: JSON mit €/m²-Preisen und Mieten für den Standort
+- PDF-Extraktion: JSON mit der Stadt aus dem Exposé-Text (Zahlen erkennt die lokale Stufe)
+- alles andere (Chat): kurzer Text
+
+Konfiguration über Environment Variablen:
+- LLM_STUB_LATENCY: Simulierte Antwortzeit in Sekunden (default: 0)
+"""
+
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any, Dict
+import asyncio
+import hashlib
+import json
+import os
+import re
+
+LLM_STUB_LATENCY = float(os.getenv("LLM_STUB_LATENCY", "0"))
+
+KRITERIEN = [
+    "cashflow_rendite", "lage", "kaufpreis_qm", "zukunftspotenzial", "zustand_baujahr",
+    "energieeffizienz", "nebenkosten", "grundriss", "verkäufertyp",
+]
+
+STREAM_CHUNK_ZEICHEN = 40
+
+
+def _prompt_text(kwargs: Dict[str, Any]) -> str:
+    """Text der letzten User-Message (auch bei Content-Blöcken)"""
+    content = kwargs["messages"][-1]["content"]
+    if isinstance(content, str):
+        return content
+    return "\n".join(block.get("text", "") for block in content if block.get("type") == "text")
+
+
+def _zahl(seed: str, von: int, bis: int) -> int:
+    """Deterministische Zahl in [von, bis] für denselben Seed"""
+    return von + int(hashlib.sha256(seed.encode("utf-8")).hexdigest()[:8], 16) % (bis - von + 1)
+
+
+def _analyse(prompt: str) -> Dict[str, Any]:
+    return {
+        "kriterien": [
+            {"name": name, "score": _zahl(prompt + name, 35, 90), "begründung": f"Stub-Bewertung für {name}"}
+            for name in KRITERIEN
+        ],
+        "stärken": ["Stub: solide Lage"],
+        "schwächen": ["Stub: keine echte KI-Bewertung"],
+        "zusammenfassung": "Stub-Antwort ohne KI-Call (LLM_PROVIDER=stub).",
+    }
+
+
+def _marktdaten(prompt: str) -> Dict[str, Any]:
+    stadt = re.search(r"^Stadt: (.+)$", prompt, re.M)
+    stadtteil = re.search(r"^Stadtteil: (.+)$", prompt, re.M)
+    standort = stadt.group(1).strip() if stadt else "Unbekannt"
+    if stadtteil and stadtteil.group(1).strip() != "Nicht angegeben":
+        standort = f"{stadtteil.group(1).strip()}, {standort}"
+
+    kauf = _zahl(standort, 2000, 7000)
+    miete = _zahl(standort + "miete", 7, 16)
+    return {
+        "standort": standort,
+        "kaufpreis_qm_von": round(kauf * 0.8),
+        "kaufpreis_qm_bis": round(kauf * 1.2),
+        "kaufpreis_qm_durchschnitt": kauf,
+        "miete_qm_von": round(miete * 0.8, 1),
+        "miete_qm_bis": round(miete * 1.2, 1),
+        "miete_qm_durchschnitt": miete,
+        "tendenz": "stabil",
+        "standort_bewertung": _zahl(standort, 4, 9),
+        "datenquellen": ["LLM-Stub"],
+        "vertrauenswuerdigkeit": "niedrig",
+    }
+
+
+def _extraktion(prompt: str) -> Dict[str, Any]:
+    ort = re.search(r"(?:\b\d{5}\s+|\b(?:Stadt|Ort):\s*)([A-ZÄÖÜ][a-zäöüß]+)", prompt)
+    return {"stadt": ort.group(1) if ort else None}
+
+
+def stub_text(kwargs: Dict[str, Any]) -> str:
+    """Antworttext des Stubs für die Parameter eines messages.create-Calls"""
+    prompt = _prompt_text(kwargs)
+    if '"kriterien"' in prompt:
+        return json.dumps(_analyse(prompt), ensure_ascii=False)
+    if "kaufpreis_qm_durchschnitt" in prompt:
+        return json.dumps(_marktdaten(prompt), ensure_ascii=False)
+    if "Exposé" in prompt and "Gib die Daten als JSON zurück" in prompt:
+        return json.dumps(_extraktion(prompt), ensure_ascii=False)
+    return "Stub-Antwort: Ohne KI-Zugang (LLM_PROVIDER=stub) kann ich keine echte Einschätzung geben."
+
+
+def _message(kwargs: Dict[str, Any], text: str) -> SimpleNamespace:
+    usage = SimpleNamespace(
+        input_tokens=len(_prompt_text(kwargs)) // 4,
+        output_tokens=len(text) // 4,
+        cache_creation_input_tokens=0,
+        cache_read_input_tokens=0,
+    )
+    return SimpleNamespace(
+        content=[SimpleNamespace(type="text", text=text)],
+        usage=usage,
+        model=kwargs.get("model"),
+        stop_reason="end_turn",
+    )
+
+
+async def stub_create_message(**kwargs):
+    """Ersatz für messages.create"""
+    text = stub_text(kwargs)
+    if LLM_STUB_LATENCY:
+        await asyncio.sleep(LLM_STUB_LATENCY)
+    return _message(kwargs, text)
+
+
+@asynccontextmanager
+async def stub_stream_message(**kwargs):
+    """Ersatz für messages.stream (Text in Stücken, Latenz gleichmäßig verteilt)"""
+    text = stub_text(kwargs)
+    stuecke = [text[i:i + STREAM_CHUNK_ZEICHEN] for i in range(0, len(text), STREAM_CHUNK_ZEICHEN)]
+
+    async def text_stream():
+        for stueck in stuecke:
+            if LLM_STUB_LATENCY:
+                await asyncio.sleep(LLM_STUB_LATENCY / len(stuecke))
+            yield stueck
+
+    async def get_final_message():
+        return _message(kwargs, text)
+
+    yield SimpleNamespace(text_stream=text_stream(), get_final_message=get_final_message)
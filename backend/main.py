@@ -3,23 +3,29 @@ AmlakI Backend
 KI-gestützter Immobilienanalyse-Service mit User-Management
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, Depends, status
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, Request, Response, status
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
-from pydantic import BaseModel
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict, Any, Union
+from contextlib import aclosing
 from sqlalchemy.orm import Session
-from datetime import timedelta
-import anthropic
+from datetime import datetime, timedelta
+import asyncio
 import json
 import os
+import time
+import numpy as np
 from dotenv import load_dotenv
-import httpx
-import re
 
 # Eigene Module
 from knowledge_base import (
-    get_ai_system_prompt,
+    get_ai_system_blocks,
+    build_knowledge_index,
+    get_knowledge_info,
+    get_knowledge_version,
+    KNOWLEDGE_TOKEN_BUDGET,
     berechne_fairen_preis,
     empfehle_foerderungen,
     generiere_verbesserungsvorschlaege,
@@ -34,7 +40,23 @@ from knowledge_base import (
     MARKTDATEN,
     DEALBREAKER
 )
-from database import get_db, init_db, Base
+from database import get_db, init_db, Base, SessionLocal
+from llm_client import create_message, stream_message, close_anthropic_client
+from market_cache import get_cached_market_data, get_market_cache_stats
+from web_search import run_search_stage, close_search_client
+from analysis_cache import analysis_cache_key, find_cached_analysis, get_analysis_cache_stats
+from analysis_stream import CriteriaStreamParser, ndjson
+from analysis_jobs import analysis_jobs, QueueFullError
+from portfolio import run_portfolio, PORTFOLIO_MAX_OBJEKTE
+from pdf_cache import get_cached_pdf_extraction, get_pdf_cache_stats
+from pdf_extraction import extract_expose
+from calc_context import calculation_context, memoized, get_calc_context_stats
+from annuity import erstes_jahr_ueber, erstes_volles_jahr, jahre_bis_anteil, laufzeit_jahre, restschuld_nach, als_jahr
+from sensitivity import cashflow_raster, sensitivity_analysis, SensitivityError, SENSITIVITY_MAX_ZELLEN
+from monte_carlo import run_monte_carlo, MonteCarloError
+from monthly_amortization import monatsplan_batch, monatsplan_views, LOAN_MAX_VARIANTEN
+from amortization import tilgungsplan_batch, tilgungsplan_view, tilgungsplan_views
+from timing import span, start_request, end_request, server_timing_header, request_seconds, render_metrics
 from models import User, Analysis, UsageLog
 from auth import (
     get_password_hash,
@@ -61,8 +83,17 @@ app = FastAPI(title="AmlakI API", version="3.0.0")
 
 # Initialisiere Datenbank beim Start
 @app.on_event("startup")
-def startup_event():
+async def startup_event():
     init_db()
+    build_knowledge_index()
+    await analysis_jobs.start(run_analysis_job)
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    await analysis_jobs.stop()
+    await close_anthropic_client()
+    await close_search_client()
 
 # CORS - Erlaubt alle Origins (JWT wird über Header gesendet, nicht Cookies)
 app.add_middleware(
@@ -75,29 +106,68 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def server_timing(request: Request, call_next):
+    """
+    Misst jeden Request und gibt die Stufen (span) als Server-Timing-Header zurück.
+    Bei Streaming-Antworten zählt die Zeit bis zum Start des Streams.
+    """
+    token = start_request()
+    start = time.perf_counter()
+    try:
+        response = await call_next(request)
+    finally:
+        spans = end_request(token)
+    gesamt = time.perf_counter() - start
+
+    # Route-Template statt Pfad (/analyses/{analysis_id}), sonst explodieren die Labels
+    route = request.scope.get("route")
+    request_seconds.observe(gesamt, request.method, getattr(route, "path", "unbekannt"), str(response.status_code))
+
+    response.headers["Server-Timing"] = server_timing_header(spans, gesamt)
+    response.headers["Timing-Allow-Origin"] = "*"  # Frontend läuft auf anderer Origin
+    return response
+
+
 # ========================================
 # USAGE TRACKING & LIMITS
 # ========================================
 
+# Modell für die Immobilien-Bewertung (Teil des KI-Bewertungs-Cache-Schlüssels)
+ANALYSIS_MODEL = "claude-sonnet-4-20250514"
+
 # Claude Sonnet 4 Preise (pro 1M Tokens)
 INPUT_PRICE_PER_1M = 3.0   # $3 pro 1M input tokens
 OUTPUT_PRICE_PER_1M = 15.0  # $15 pro 1M output tokens
-
-def calculate_cost(input_tokens: int, output_tokens: int) -> float:
-    """Berechnet Kosten in USD"""
+CACHE_WRITE_PRICE_PER_1M = 3.75  # $3.75 pro 1M Tokens beim Schreiben in den Prompt-Cache
+CACHE_READ_PRICE_PER_1M = 0.30   # $0.30 pro 1M Tokens beim Lesen aus dem Prompt-Cache
+
+def calculate_cost(
+    input_tokens: int,
+    output_tokens: int,
+    cache_creation_input_tokens: int = 0,
+    cache_read_input_tokens: int = 0
+) -> float:
+    """Berechnet Kosten in USD (inkl. Prompt-Cache Schreib-/Lese-Tokens)"""
     input_cost = (input_tokens / 1_000_000) * INPUT_PRICE_PER_1M
     output_cost = (output_tokens / 1_000_000) * OUTPUT_PRICE_PER_1M
-    return input_cost + output_cost
+    cache_write_cost = (cache_creation_input_tokens / 1_000_000) * CACHE_WRITE_PRICE_PER_1M
+    cache_read_cost = (cache_read_input_tokens / 1_000_000) * CACHE_READ_PRICE_PER_1M
+    return input_cost + output_cost + cache_write_cost + cache_read_cost
 
 def get_user_total_usage(db: Session, user_id: int) -> dict:
     """Holt Gesamtverbrauch eines Users"""
     logs = db.query(UsageLog).filter(UsageLog.user_id == user_id).all()
     total_input = sum(log.input_tokens for log in logs)
     total_output = sum(log.output_tokens for log in logs)
+    total_cache_write = sum(log.cache_creation_input_tokens or 0 for log in logs)
+    total_cache_read = sum(log.cache_read_input_tokens or 0 for log in logs)
     total_cost = sum(log.cost_usd for log in logs)
     return {
         "total_input_tokens": total_input,
         "total_output_tokens": total_output,
+        "total_cache_creation_input_tokens": total_cache_write,
+        "total_cache_read_input_tokens": total_cache_read,
         "total_cost_usd": total_cost,
         "total_requests": len(logs)
     }
@@ -111,18 +181,29 @@ def check_usage_limit(db: Session, user: User) -> bool:
     limit = user.usage_limit_usd if user.usage_limit_usd else 5.0
     return usage["total_cost_usd"] < limit
 
-def log_usage(db: Session, user_id: int, action_type: str, input_tokens: int, output_tokens: int):
+def log_usage(
+    db: Session,
+    user_id: int,
+    action_type: str,
+    input_tokens: int,
+    output_tokens: int,
+    cache_creation_input_tokens: int = 0,
+    cache_read_input_tokens: int = 0
+):
     """Speichert einen Usage-Log"""
-    cost = calculate_cost(input_tokens, output_tokens)
+    cost = calculate_cost(input_tokens, output_tokens, cache_creation_input_tokens, cache_read_input_tokens)
     log = UsageLog(
         user_id=user_id,
         action_type=action_type,
         input_tokens=input_tokens,
         output_tokens=output_tokens,
+        cache_creation_input_tokens=cache_creation_input_tokens,
+        cache_read_input_tokens=cache_read_input_tokens,
         cost_usd=cost
     )
-    db.add(log)
-    db.commit()
+    with span("db_usage_log"):
+        db.add(log)
+        db.commit()
     return log
 
 
@@ -526,6 +607,15 @@ class AnalysisRequest(BaseModel):
     zinssatz: Optional[float] = 3.75  # Angepasst auf 3.75%
     tilgung: Optional[float] = 1.25   # Angepasst auf 1.25%
     marktpreis_qm: Optional[float] = None  # Falls manuell eingegeben
+    force_refresh: bool = False  # True = KI-Bewertung nicht aus dem Cache übernehmen
+
+
+class RecalculateRequest(BaseModel):
+    """Neu-Berechnung einer gespeicherten Analyse mit anderer Finanzierung (ohne KI)"""
+    verwendungszweck: Optional[str] = None  # None = gespeicherter Wert
+    eigenkapital: Optional[float] = None
+    zinssatz: Optional[float] = None
+    tilgung: Optional[float] = None
 
 
 class CriterionScore(BaseModel):
@@ -575,14 +665,101 @@ class AnalysisResult(BaseModel):
     mietschaetzung: Optional[dict] = None  # Info wenn Miete geschätzt wurde
     # NEU: Kaufnebenkosten
     kaufnebenkosten: Optional[dict] = None  # Aufschlüsselung der Kaufnebenkosten
+    # ID der gespeicherten Analyse (für /library/{id}/recalculate)
+    analysis_id: Optional[int] = None
+    # True = Kriterien-Scores aus früherer Analyse desselben Objekts übernommen
+    ki_bewertung_aus_cache: bool = False
 
 
-def get_anthropic_client():
-    """Erstellt Anthropic Client"""
-    api_key = os.getenv("ANTHROPIC_API_KEY")
-    if not api_key:
-        raise HTTPException(status_code=500, detail="ANTHROPIC_API_KEY nicht konfiguriert")
-    return anthropic.Anthropic(api_key=api_key)
+class PortfolioRequest(BaseModel):
+    """Portfolio-Analyse mehrerer Objekte mit gemeinsamer Finanzierung"""
+    objekte: List[PropertyData]
+    verwendungszweck: str = "kapitalanlage"
+    eigenkapital: Optional[float] = 0
+    zinssatz: Optional[float] = 3.75
+    tilgung: Optional[float] = 1.25
+    force_refresh: bool = False
+
+
+class SensitivityAxis(BaseModel):
+    """Achse der Sensitivitätsanalyse: feste Werte oder von/bis in gleichen Schritten"""
+    parameter: str  # kaufpreis, monatliche_miete, nebenkosten, eigenkapital, eigenkapital_prozent, zinssatz, tilgung
+    werte: Optional[List[float]] = Field(None, max_length=SENSITIVITY_MAX_ZELLEN)
+    von: Optional[float] = None
+    bis: Optional[float] = None
+    schritte: Optional[int] = Field(None, ge=2, le=SENSITIVITY_MAX_ZELLEN)
+
+
+class SensitivityRequest(BaseModel):
+    """Sensitivitätsraster mit 1-3 frei wählbaren Achsen (ohne KI)"""
+    kaufpreis: float
+    monatliche_miete: float
+    nebenkosten: Optional[float] = 0
+    eigenkapital: Optional[float] = 0
+    eigenkapital_prozent: Optional[float] = None  # Falls gesetzt: EK = Kaufpreis * Prozent (auch bei Kaufpreis-Achse)
+    zinssatz: Optional[float] = 3.75
+    tilgung: Optional[float] = 1.25
+    achsen: List[SensitivityAxis]
+    break_even: Optional[str] = None  # Parameter der Break-Even-Linie (default: letzte Achse)
+
+
+class RiskSimulationRequest(BaseModel):
+    """Monte-Carlo-Simulation von Cashflow, Restschuld und Vermögen (ohne KI)"""
+    kaufpreis: float
+    monatliche_miete: float
+    nebenkosten: Optional[float] = 0
+    eigenkapital: Optional[float] = 0
+    zinssatz: Optional[float] = 3.75
+    tilgung: Optional[float] = 1.25
+    jahre: int = 30
+    pfade: int = 10000
+    seed: Optional[int] = None  # Gleicher seed = gleiches Ergebnis
+    cashflow_schwelle: float = 0  # Monatlicher Cashflow, unter dem ein Pfad als Risiko zählt
+    annahmen: Optional[Dict[str, float]] = None  # Overrides für monte_carlo.STANDARD_ANNAHMEN
+
+
+class LoanVariant(BaseModel):
+    """Finanzierungsvariante für /loan-schedule - leere Felder übernehmen die Basiswerte"""
+    name: Optional[str] = None
+    eigenkapital: Optional[float] = None
+    zinssatz: Optional[float] = None
+    tilgung: Optional[float] = None
+    zinsbindung_jahre: Optional[int] = None
+    anschlusszins: Optional[float] = None
+    sondertilgung: Optional[Union[float, List[float]]] = None
+    tilgungsfreie_jahre: Optional[int] = None
+
+
+class LoanScheduleRequest(BaseModel):
+    """Monatlicher Tilgungsplan mit Zinsbindung, Sondertilgung und tilgungsfreien Jahren"""
+    kaufpreis: float
+    monatliche_miete: float
+    nebenkosten: Optional[float] = 0
+    eigenkapital: Optional[float] = 0
+    zinssatz: Optional[float] = 3.75
+    tilgung: Optional[float] = 1.25
+    jahre: int = 30
+    mietsteigerung: float = 1.5
+    wertsteigerung: float = 1.5
+    zinsbindung_jahre: Optional[int] = None  # None = Zins über die gesamte Laufzeit fest
+    anschlusszins: Optional[float] = None  # None = gleicher Zins nach der Zinsbindung
+    zinspfad: Optional[List[float]] = None  # Zinssatz pro Jahr (ersetzt Zinsbindung/Anschlusszins)
+    sondertilgung: Union[float, List[float]] = 0  # EUR pro Jahr, fest oder ein Betrag pro Jahr
+    tilgungsfreie_jahre: int = 0
+    varianten: Optional[List[LoanVariant]] = None  # Mehrere Varianten in einem Durchlauf
+
+
+class AnalysisJobResponse(BaseModel):
+    """Status eines Analyse-Jobs (POST/GET /analyze/jobs)"""
+    job_id: str
+    status: str  # "queued", "running", "done", "failed"
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    teilergebnis: Optional[dict] = None  # Bereits berechnete Blöcke + Kriterien, solange der Job läuft
+    analysis_id: Optional[int] = None
+    ergebnis: Optional[AnalysisResult] = None  # Gespeicherte Analyse, sobald der Job fertig ist
+    fehler: Optional[str] = None
 
 
 @app.get("/")
@@ -733,104 +910,67 @@ def get_favorite_analyses(
 
 
 @app.post("/extract-pdf")
-async def extract_pdf_data(file: UploadFile = File(...)):
+async def extract_pdf_data(response: Response, file: UploadFile = File(...)):
     """
-    Extrahiert Immobiliendaten aus einem PDF-Exposé mittels Claude
+    Extrahiert Immobiliendaten aus einem PDF-Exposé mittels Claude.
+    Identische PDFs (gleicher SHA-256) kommen aus dem Cache - ohne Token-Verbrauch.
+
+    Response-Header:
+    - X-PDF-Cache: HIT oder MISS
+    - X-PDF-Cache-Source: memory oder db (nur bei HIT)
+    - X-PDF-SHA256: Hash der hochgeladenen Datei
     """
     if not file.filename.endswith('.pdf'):
         raise HTTPException(status_code=400, detail="Nur PDF-Dateien werden akzeptiert")
-    
-    content = await file.read()
-    
-    # Base64 encoding für Claude
-    import base64
-    pdf_base64 = base64.b64encode(content).decode('utf-8')
-    
-    client = get_anthropic_client()
-    
-    extraction_prompt = """Analysiere dieses Immobilien-Exposé und extrahiere alle relevanten Daten.
-
-Gib die Daten als JSON zurück mit genau diesen Feldern (null wenn nicht gefunden):
-
-{
-    "kaufpreis": <Zahl in Euro>,
-    "wohnflaeche": <Zahl in qm>,
-    "zimmer": <Anzahl>,
-    "baujahr": <Jahr>,
-    "etage": "<z.B. 2. OG>",
-    "nebenkosten": <monatlich in Euro>,
-    "hausgeld": <monatlich in Euro>,
-    "energieausweis": "<Verbrauch oder Bedarf>",
-    "energieklasse": "<A+ bis H>",
-    "heizungsart": "<z.B. Gas-Zentralheizung>",
-    "adresse": "<Straße und Hausnummer>",
-    "stadt": "<Stadt>",
-    "stadtteil": "<Stadtteil/Bezirk>",
-    "objekttyp": "<z.B. Eigentumswohnung, Einfamilienhaus>",
-    "zustand": "<z.B. gepflegt, renovierungsbedürftig, Neubau>",
-    "ausstattung": "<z.B. gehoben, normal, einfach>",
-    "balkon_terrasse": <true/false>,
-    "keller": <true/false>,
-    "stellplatz": "<z.B. Tiefgarage, Außenstellplatz, keiner>",
-    "vermietet": <true/false>,
-    "aktuelle_miete": <monatliche Kaltmiete in Euro falls vermietet>,
-    "verkäufertyp": "<privat oder Makler>",
-    "provision": "<z.B. 3,57% oder provisionsfrei>",
-    "beschreibung": "<Kurze Zusammenfassung des Objekts in 2-3 Sätzen>"
-}
 
-Antworte NUR mit dem JSON, kein anderer Text."""
+    content = await file.read()
 
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2000,
-            messages=[
-                {
-                    "role": "user",
-                    "content": [
-                        {
-                            "type": "document",
-                            "source": {
-                                "type": "base64",
-                                "media_type": "application/pdf",
-                                "data": pdf_base64
-                            }
-                        },
-                        {
-                            "type": "text",
-                            "text": extraction_prompt
-                        }
-                    ]
-                }
-            ]
-        )
-        
-        # Parse JSON response
-        json_text = response.content[0].text.strip()
-        # Entferne mögliche Markdown-Codeblöcke
-        if json_text.startswith("```"):
-            json_text = json_text.split("```")[1]
-            if json_text.startswith("json"):
-                json_text = json_text[4:]
-        json_text = json_text.strip()
-        
-        property_data = json.loads(json_text)
-        return PropertyData(**property_data)
-        
+        with span("pdf_extraktion"):
+            property_data, quelle, digest = await get_cached_pdf_extraction(content, extract_pdf_with_claude)
+    except HTTPException:
+        raise
     except json.JSONDecodeError as e:
         raise HTTPException(status_code=500, detail=f"Fehler beim Parsen der KI-Antwort: {str(e)}")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Fehler bei der PDF-Extraktion: {str(e)}")
 
+    response.headers["X-PDF-Cache"] = "HIT" if quelle else "MISS"
+    if quelle:
+        response.headers["X-PDF-Cache-Source"] = quelle
+    response.headers["X-PDF-SHA256"] = digest
+    return PropertyData(**property_data)
+
+
+async def extract_pdf_with_claude(content: bytes) -> dict:
+    """
+    Extrahiert die Daten mit Claude. Text-PDFs werden lokal vorverarbeitet
+    (Regex für Kaufpreis, Wohnfläche, Zimmer, Baujahr, Hausgeld, Energieklasse),
+    nur Rohtext + offene Felder gehen an Claude. Gescannte PDFs als Dokument.
+
+    Returns:
+        PropertyData als dict (validiert)
+    """
+    property_data, info = await extract_expose(content)
+    print(f"📄 PDF-Extraktion ({info['methode']}): lokal erkannt: {', '.join(info['lokal_erkannt']) or '-'}")
+    return PropertyData(**property_data).dict()
+
 
 async def fetch_live_market_data(stadt: str, stadtteil: Optional[str], objekttyp: str = "Eigentumswohnung") -> dict:
+    """
+    V3.0 - LIVE MARKTDATEN mit Cache
+    Gibt gecachte Live-Daten zurück (TTL + stale-while-revalidate),
+    recherchiert nur bei fehlendem oder abgelaufenem Eintrag neu.
+    """
+    return await get_cached_market_data(stadt, stadtteil, objekttyp, research_live_market_data)
+
+
+async def research_live_market_data(stadt: str, stadtteil: Optional[str], objekttyp: str = "Eigentumswohnung") -> dict:
     """
     V3.0 - LIVE MARKTDATEN RECHERCHE
     Sucht aktuelle Immobilienpreise über Web-Suche
     KEINE statischen Werte mehr!
     """
-    client = get_anthropic_client()
     location = f"{stadtteil}, {stadt}" if stadtteil else stadt
 
     # Schritt 1: Web-Suche durchführen für aktuelle Preise
@@ -842,30 +982,9 @@ async def fetch_live_market_data(stadt: str, stadtteil: Optional[str], objekttyp
     ]
 
     # Versuche Daten von bekannten Immobilienportalen zu holen
-    search_results = []
-
-    async with httpx.AsyncClient(timeout=15.0) as http_client:
-        for query in search_queries[:2]:  # Erste 2 Queries
-            try:
-                # DuckDuckGo HTML-Suche (kein API-Key nötig)
-                encoded_query = query.replace(' ', '+')
-                url = f"https://html.duckduckgo.com/html/?q={encoded_query}"
-                headers = {
-                    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
-                }
-                response = await http_client.get(url, headers=headers)
-                if response.status_code == 200:
-                    # Extrahiere relevante Snippets
-                    text = response.text
-                    # Suche nach Preisangaben im HTML
-                    price_patterns = re.findall(r'(\d{1,2}[.,]?\d{0,3})\s*(?:€|Euro)?\s*/?\s*(?:m²|qm|Quadratmeter)', text, re.IGNORECASE)
-                    search_results.append({
-                        "query": query,
-                        "found_prices": price_patterns[:5] if price_patterns else [],
-                        "raw_snippet": text[:2000] if len(text) > 100 else ""
-                    })
-            except Exception as e:
-                search_results.append({"query": query, "error": str(e)})
+    # Alle Queries parallel, mit Deadline für die gesamte Suchstufe
+    with span("search"):
+        search_results = await run_search_stage(search_queries)
 
     # Schritt 2: Claude analysiert die Suchergebnisse UND recherchiert selbst
     research_prompt = f"""WICHTIG: Du musst LIVE-MARKTDATEN für diese Immobilienbewertung recherchieren!
@@ -876,7 +995,7 @@ Stadtteil: {stadtteil or "Nicht angegeben"}
 Objekttyp: {objekttyp}
 
 === GEFUNDENE SUCHERGEBNISSE ===
-{json.dumps(search_results, indent=2, ensure_ascii=False)}
+{json.dumps(search_results, ensure_ascii=False)}
 
 === DEINE AUFGABE ===
 1. Analysiere die gefundenen Preisangaben
@@ -913,11 +1032,12 @@ Antworte als JSON:
 WICHTIG: Gib KONKRETE Zahlen für DIESEN Standort an, keine Platzhalter!"""
 
     try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": research_prompt}]
-        )
+        with span("llm_research"):
+            response = await create_message(
+                model="claude-sonnet-4-20250514",
+                max_tokens=2000,
+                messages=[{"role": "user", "content": research_prompt}]
+            )
 
         json_text = response.content[0].text.strip()
         if json_text.startswith("```"):
@@ -1004,6 +1124,7 @@ def calculate_kaufnebenkosten(kaufpreis: float, bundesland: str = None, mit_makl
     }
 
 
+@memoized
 def calculate_cashflow(
     kaufpreis: float,
     monatliche_miete: float,
@@ -1094,6 +1215,7 @@ def calculate_cashflow(
     }
 
 
+@memoized
 def calculate_tilgungsplan(
     kaufpreis: float,
     eigenkapital: float,
@@ -1121,91 +1243,22 @@ def calculate_tilgungsplan(
 
     Returns:
         Dict mit jahresweisen Projektionen und Zusammenfassung
+        (Berechnung über die vektorisierte Engine in amortization.py)
     """
-    finanzierungssumme = kaufpreis - eigenkapital
-    restschuld = finanzierungssumme
-
-    # Jährliche Rate (Annuität)
-    jaehrliche_rate_prozent = zinssatz + tilgung
-    jaehrliche_rate = finanzierungssumme * (jaehrliche_rate_prozent / 100)
-
-    aktuelle_miete = monatliche_miete
-    immobilienwert = kaufpreis
-
-    jahres_projektionen = []
-    gesamte_zinsen = 0
-    gesamte_tilgung = 0
-
-    for jahr in range(1, jahre + 1):
-        # Zinsen und Tilgung für dieses Jahr
-        zinsen_jahr = restschuld * (zinssatz / 100)
-        tilgung_jahr = jaehrliche_rate - zinsen_jahr
-
-        # Sicherstellen, dass wir nicht mehr tilgen als Restschuld
-        if tilgung_jahr > restschuld:
-            tilgung_jahr = restschuld
-            # Zinsen bleiben korrekt - bereits auf Basis der Restschuld zu Jahresbeginn berechnet
-
-        restschuld = max(0, restschuld - tilgung_jahr)
-        gesamte_zinsen += zinsen_jahr
-        gesamte_tilgung += tilgung_jahr
-
-        # Cashflow berechnen (mit aktueller Miete)
-        jaehrlicher_cashflow = (aktuelle_miete * 12) - jaehrliche_rate - (nebenkosten * 12)
-
-        # Eigenkapital = Getilgter Betrag + ursprüngliches EK
-        eigenkapital_aufbau = eigenkapital + gesamte_tilgung
-
-        # Gesamtvermögen = Immobilienwert - Restschuld
-        gesamtvermoegen = immobilienwert - restschuld
-
-        jahres_projektionen.append({
-            "jahr": jahr,
-            "restschuld": round(restschuld, 2),
-            "getilgt": round(gesamte_tilgung, 2),
-            "zinsen_jahr": round(zinsen_jahr, 2),
-            "tilgung_jahr": round(tilgung_jahr, 2),
-            "jaehrlicher_cashflow": round(jaehrlicher_cashflow, 2),
-            "monatlicher_cashflow": round(jaehrlicher_cashflow / 12, 2),
-            "immobilienwert": round(immobilienwert, 2),
-            "eigenkapital_aufbau": round(eigenkapital_aufbau, 2),
-            "gesamtvermoegen": round(gesamtvermoegen, 2),
-            "aktuelle_miete": round(aktuelle_miete, 2)
-        })
-
-        # Werte für nächstes Jahr anpassen
-        aktuelle_miete *= (1 + mietsteigerung / 100)
-        immobilienwert *= (1 + wertsteigerung / 100)
-
-        # Wenn Kredit abbezahlt, setze Werte auf 0 aber berechne weiter für vollständige Projektion
-        if restschuld <= 0:
-            restschuld = 0
-            # Weitere Jahre haben keine Kreditkosten mehr
-
-    # Zusammenfassung
-    letztes_jahr = jahres_projektionen[-1] if jahres_projektionen else None
-    erstes_jahr = jahres_projektionen[0] if jahres_projektionen else None
-
-    zusammenfassung = {
-        "finanzierungssumme": round(finanzierungssumme, 2),
-        "eigenkapital_start": round(eigenkapital, 2),
-        "jaehrliche_rate": round(jaehrliche_rate, 2),
-        "monatliche_rate": round(jaehrliche_rate / 12, 2),
-        "gesamte_zinsen": round(gesamte_zinsen, 2),
-        "gesamte_tilgung": round(gesamte_tilgung, 2),
-        "gesamtkosten": round(gesamte_zinsen + finanzierungssumme, 2),
-        "restschuld_nach_laufzeit": round(restschuld, 2),
-        "immobilienwert_nach_laufzeit": round(letztes_jahr["immobilienwert"], 2) if letztes_jahr else kaufpreis,
-        "gesamtvermoegen_nach_laufzeit": round(letztes_jahr["gesamtvermoegen"], 2) if letztes_jahr else eigenkapital,
-        "cashflow_jahr_1": round(erstes_jahr["jaehrlicher_cashflow"], 2) if erstes_jahr else 0,
-        "cashflow_jahr_final": round(letztes_jahr["jaehrlicher_cashflow"], 2) if letztes_jahr else 0,
-        "kredit_abbezahlt_in_jahren": len(jahres_projektionen) if restschuld <= 0 else None
-    }
-
-    return {
-        "jahre": jahres_projektionen,
-        "zusammenfassung": zusammenfassung
-    }
+    batch = tilgungsplan_batch(
+        kaufpreis=kaufpreis,
+        eigenkapital=eigenkapital,
+        zinssatz=zinssatz,
+        tilgung=tilgung,
+        monatliche_miete=monatliche_miete,
+        nebenkosten=nebenkosten,
+        jahre=jahre,
+        mietsteigerung=mietsteigerung,
+        wertsteigerung=wertsteigerung
+    )
+    return tilgungsplan_view(
+        batch, eingaben={"kaufpreis": kaufpreis, "eigenkapital": eigenkapital, "monatliche_miete": monatliche_miete}
+    )
 
 
 def calculate_breakeven_eigenkapital(
@@ -1295,20 +1348,29 @@ def generate_scenarios(
     """
     szenarien = []
 
-    # Konservatives Szenario
     konservativ_zins = zinssatz + 1.0
     konservativ_miete = monatliche_miete * 0.95  # 5% Leerstand
-    konservativ_tilgungsplan = calculate_tilgungsplan(
-        kaufpreis=kaufpreis,
-        eigenkapital=eigenkapital,
-        zinssatz=konservativ_zins,
-        tilgung=tilgung,
-        monatliche_miete=konservativ_miete,
-        nebenkosten=nebenkosten,
-        jahre=30,
-        mietsteigerung=0.5,
-        wertsteigerung=0.5
+    realistisch_miete = monatliche_miete * 0.98  # 2% Leerstand
+    optimistisch_zins = max(0.5, zinssatz - 0.5)  # Mindestens 0.5%
+    optimistisch_miete = monatliche_miete * 0.98  # 2% Leerstand
+
+    # Alle drei Tilgungspläne in einem Durchlauf (Konservativ, Realistisch, Optimistisch)
+    konservativ_tilgungsplan, realistisch_tilgungsplan, optimistisch_tilgungsplan = tilgungsplan_views(
+        tilgungsplan_batch(
+            kaufpreis=kaufpreis,
+            eigenkapital=eigenkapital,
+            zinssatz=[konservativ_zins, zinssatz, optimistisch_zins],
+            tilgung=tilgung,
+            monatliche_miete=[konservativ_miete, realistisch_miete, optimistisch_miete],
+            nebenkosten=nebenkosten,
+            jahre=30,
+            mietsteigerung=[0.5, 1.5, 2.5],
+            wertsteigerung=[0.5, 1.5, 2.0]
+        ),
+        eingaben={"kaufpreis": kaufpreis, "eigenkapital": eigenkapital}
     )
+
+    # Konservatives Szenario
     konservativ_cashflow = calculate_cashflow(
         kaufpreis=kaufpreis,
         monatliche_miete=konservativ_miete,
@@ -1333,18 +1395,6 @@ def generate_scenarios(
     })
 
     # Realistisches Szenario
-    realistisch_miete = monatliche_miete * 0.98  # 2% Leerstand
-    realistisch_tilgungsplan = calculate_tilgungsplan(
-        kaufpreis=kaufpreis,
-        eigenkapital=eigenkapital,
-        zinssatz=zinssatz,
-        tilgung=tilgung,
-        monatliche_miete=realistisch_miete,
-        nebenkosten=nebenkosten,
-        jahre=30,
-        mietsteigerung=1.5,
-        wertsteigerung=1.5
-    )
     realistisch_cashflow = calculate_cashflow(
         kaufpreis=kaufpreis,
         monatliche_miete=realistisch_miete,
@@ -1369,19 +1419,6 @@ def generate_scenarios(
     })
 
     # Optimistisches Szenario
-    optimistisch_zins = max(0.5, zinssatz - 0.5)  # Mindestens 0.5%
-    optimistisch_miete = monatliche_miete * 0.98  # 2% Leerstand
-    optimistisch_tilgungsplan = calculate_tilgungsplan(
-        kaufpreis=kaufpreis,
-        eigenkapital=eigenkapital,
-        zinssatz=optimistisch_zins,
-        tilgung=tilgung,
-        monatliche_miete=optimistisch_miete,
-        nebenkosten=nebenkosten,
-        jahre=30,
-        mietsteigerung=2.5,
-        wertsteigerung=2.0
-    )
     optimistisch_cashflow = calculate_cashflow(
         kaufpreis=kaufpreis,
         monatliche_miete=optimistisch_miete,
@@ -1445,25 +1482,23 @@ def calculate_sensitivity_analysis(
     ek_prozente = [0, 10, 20, 30, 40]
     ek_variationen = [kaufpreis * (p / 100) for p in ek_prozente]
 
-    matrix = []
-
-    for zins in zins_variationen:
-        zeile = []
-        for ek in ek_variationen:
-            cashflow = calculate_cashflow(
-                kaufpreis=kaufpreis,
-                monatliche_miete=monatliche_miete,
-                nebenkosten=nebenkosten,
-                eigenkapital=ek,
-                zinssatz=zins,
-                tilgung=tilgung
-            )
-            zeile.append({
-                "monatlicher_cashflow": cashflow["monatlicher_cashflow"],
-                "jaehrlicher_cashflow": cashflow["jaehrlicher_cashflow"],
-                "selbsttragend": cashflow["selbsttragend"]
-            })
-        matrix.append(zeile)
+    # Ganze Matrix in einem Schritt (gleiche Formel wie calculate_cashflow)
+    monatlich = cashflow_raster(
+        {"kaufpreis": kaufpreis, "monatliche_miete": monatliche_miete, "nebenkosten": nebenkosten, "tilgung": tilgung},
+        [{"parameter": "zinssatz", "werte": zins_variationen}, {"parameter": "eigenkapital", "werte": ek_variationen}]
+    ).tolist()
+
+    matrix = [
+        [
+            {
+                "monatlicher_cashflow": round(cashflow, 2),
+                "jaehrlicher_cashflow": round(cashflow * 12, 2),
+                "selbsttragend": cashflow >= 0
+            }
+            for cashflow in zeile
+        ]
+        for zeile in monatlich
+    ]
 
     # Finde aktuellen Referenzpunkt
     aktueller_zins_index = zins_variationen.index(zinssatz) if zinssatz in zins_variationen else 2
@@ -1568,61 +1603,63 @@ def calculate_key_milestones(
     nebenkosten: float
 ) -> dict:
     """
-    Berechnet wichtige Meilensteine der Investition.
+    Berechnet wichtige Meilensteine der Investition (Jahr 1-40, wie ein 40-jähriger Tilgungsplan
+    mit 1.5% Miet- und Wertsteigerung).
+    Tilgungs-, Cashflow- und EK-Meilensteine kommen direkt aus den Annuitätenformeln (annuity.py),
+    die Vermögens-Schwellen aus der geschlossen berechneten Vermögenskurve - ohne Jahresschleife.
     """
-    tilgungsplan = calculate_tilgungsplan(
-        kaufpreis=kaufpreis,
-        eigenkapital=eigenkapital,
-        zinssatz=zinssatz,
-        tilgung=tilgung,
-        monatliche_miete=monatliche_miete,
-        nebenkosten=nebenkosten,
-        jahre=40  # Längerer Zeitraum für Meilensteine
-    )
-
-    jahre = tilgungsplan["jahre"]
+    horizont = 40  # Längerer Zeitraum für Meilensteine
+    mietsteigerung = 1.5
+    wertsteigerung = 1.5
     finanzierungssumme = kaufpreis - eigenkapital
+    jaehrliche_rate = finanzierungssumme * ((zinssatz + tilgung) / 100)
 
-    # Meilensteine finden
-    meilensteine = {
-        "kredit_25_prozent_getilgt": None,
-        "kredit_50_prozent_getilgt": None,
-        "kredit_75_prozent_getilgt": None,
-        "kredit_komplett_getilgt": None,
-        "erster_positiver_cashflow": None,
-        "eigenkapital_verdoppelt": None,
-        "vermögen_100k_erreicht": None,
-        "vermögen_250k_erreicht": None,
-        "vermögen_500k_erreicht": None
-    }
-
-    for jahr_daten in jahre:
-        jahr = jahr_daten["jahr"]
-        getilgt_prozent = (jahr_daten["getilgt"] / finanzierungssumme * 100) if finanzierungssumme > 0 else 0
+    # Tilgungs-Meilensteine: Zeitpunkt, zu dem 25/50/75/100% des Darlehens getilgt sind
+    if finanzierungssumme > 0:
+        anteile = erstes_volles_jahr(jahre_bis_anteil(zinssatz, tilgung, [0.25, 0.5, 0.75, 1.0]))
+        kredit_25, kredit_50, kredit_75, kredit_komplett = (als_jahr(jahr, horizont) for jahr in anteile)
+    else:
+        kredit_25 = kredit_50 = kredit_75 = None
+        kredit_komplett = 1  # Nichts zu tilgen
 
-        if meilensteine["kredit_25_prozent_getilgt"] is None and getilgt_prozent >= 25:
-            meilensteine["kredit_25_prozent_getilgt"] = jahr
-        if meilensteine["kredit_50_prozent_getilgt"] is None and getilgt_prozent >= 50:
-            meilensteine["kredit_50_prozent_getilgt"] = jahr
-        if meilensteine["kredit_75_prozent_getilgt"] is None and getilgt_prozent >= 75:
-            meilensteine["kredit_75_prozent_getilgt"] = jahr
-        if meilensteine["kredit_komplett_getilgt"] is None and jahr_daten["restschuld"] <= 0:
-            meilensteine["kredit_komplett_getilgt"] = jahr
+    # Cashflow positiv, sobald die wachsende Miete Rate + Nebenkosten übersteigt
+    erster_positiver_cashflow = als_jahr(
+        erstes_jahr_ueber(monatliche_miete, mietsteigerung, jaehrliche_rate / 12 + nebenkosten, streng=True),
+        horizont
+    )
 
-        if meilensteine["erster_positiver_cashflow"] is None and jahr_daten["monatlicher_cashflow"] > 0:
-            meilensteine["erster_positiver_cashflow"] = jahr
+    # EK verdoppelt, sobald der getilgte Betrag das Start-EK erreicht
+    if eigenkapital <= 0:
+        eigenkapital_verdoppelt = 1
+    elif finanzierungssumme > 0:
+        eigenkapital_verdoppelt = als_jahr(
+            erstes_volles_jahr(jahre_bis_anteil(zinssatz, tilgung, eigenkapital / finanzierungssumme)), horizont
+        )
+    else:
+        eigenkapital_verdoppelt = None
 
-        if meilensteine["eigenkapital_verdoppelt"] is None and jahr_daten["eigenkapital_aufbau"] >= eigenkapital * 2:
-            meilensteine["eigenkapital_verdoppelt"] = jahr
+    # Vermögen = Immobilienwert - Restschuld: Kurve über alle Jahre auf einmal auswerten
+    jahre = np.arange(1, horizont + 1)
+    vermoegen = (
+        kaufpreis * (1 + wertsteigerung / 100) ** (jahre - 1)
+        - restschuld_nach(max(finanzierungssumme, 0), zinssatz, tilgung, jahre)
+    )
 
-        if meilensteine["vermögen_100k_erreicht"] is None and jahr_daten["gesamtvermoegen"] >= 100000:
-            meilensteine["vermögen_100k_erreicht"] = jahr
-        if meilensteine["vermögen_250k_erreicht"] is None and jahr_daten["gesamtvermoegen"] >= 250000:
-            meilensteine["vermögen_250k_erreicht"] = jahr
-        if meilensteine["vermögen_500k_erreicht"] is None and jahr_daten["gesamtvermoegen"] >= 500000:
-            meilensteine["vermögen_500k_erreicht"] = jahr
+    def vermoegen_erreicht(schwelle: float) -> Optional[int]:
+        erreicht = vermoegen >= schwelle
+        return int(jahre[erreicht.argmax()]) if erreicht.any() else None
 
-    return meilensteine
+    return {
+        "kredit_25_prozent_getilgt": kredit_25,
+        "kredit_50_prozent_getilgt": kredit_50,
+        "kredit_75_prozent_getilgt": kredit_75,
+        "kredit_komplett_getilgt": kredit_komplett,
+        "erster_positiver_cashflow": erster_positiver_cashflow,
+        "eigenkapital_verdoppelt": eigenkapital_verdoppelt,
+        "vermögen_100k_erreicht": vermoegen_erreicht(100000),
+        "vermögen_250k_erreicht": vermoegen_erreicht(250000),
+        "vermögen_500k_erreicht": vermoegen_erreicht(500000)
+    }
 
 
 def calculate_rental_variations(
@@ -1672,8 +1709,10 @@ def calculate_financing_options(
 ) -> list:
     """
     Vergleicht verschiedene Finanzierungsoptionen.
+    Laufzeit und Gesamtkosten (Summe aller Raten) exakt aus den Annuitätenformeln.
     """
     optionen = []
+    finanzierungssumme = kaufpreis - eigenkapital
 
     # Verschiedene Zins/Tilgung Kombinationen
     kombinationen = [
@@ -1684,7 +1723,17 @@ def calculate_financing_options(
         {"name": "Hoher Zins Szenario", "zins": 5.0, "tilgung": 1.5},
     ]
 
-    for kombi in kombinationen:
+    # Exakte Laufzeit des Annuitätendarlehens (nicht 100 / Tilgung - die Tilgung wächst mit jeder Rate),
+    # für alle Kombinationen auf einmal
+    zinsen = np.array([kombi["zins"] for kombi in kombinationen])
+    tilgungen = np.array([kombi["tilgung"] for kombi in kombinationen])
+    laufzeiten = laufzeit_jahre(zinsen, tilgungen)
+    abbezahlt_im_jahr = erstes_volles_jahr(laufzeiten)
+    # Summe aller Raten: volle Raten bis zum Vorjahr + Restschuld inkl. Zinsen im letzten Jahr
+    rest_vorjahr = restschuld_nach(finanzierungssumme, zinsen, tilgungen, np.where(np.isfinite(abbezahlt_im_jahr), abbezahlt_im_jahr - 1, 0))
+    summe_raten = finanzierungssumme * (zinsen + tilgungen) / 100 * (abbezahlt_im_jahr - 1) + rest_vorjahr * (1 + zinsen / 100)
+
+    for kombi, laufzeit, jahr, raten in zip(kombinationen, laufzeiten.tolist(), abbezahlt_im_jahr.tolist(), summe_raten.tolist()):
         cashflow = calculate_cashflow(
             kaufpreis=kaufpreis,
             monatliche_miete=monatliche_miete,
@@ -1694,9 +1743,16 @@ def calculate_financing_options(
             tilgung=kombi["tilgung"]
         )
 
-        # Berechne wie lange bis abbezahlt
-        tilgung_prozent = kombi["tilgung"]
-        jahre_bis_abbezahlt = round(100 / tilgung_prozent) if tilgung_prozent > 0 else 999
+        ist_tilgbar = laufzeit != float("inf")
+        if ist_tilgbar and finanzierungssumme > 0:
+            jahre_bis_abbezahlt = int(jahr)
+            gesamtkosten = raten
+        elif finanzierungssumme > 0:
+            jahre_bis_abbezahlt = 999  # Ohne Tilgung nie abbezahlt
+            gesamtkosten = cashflow["monatliche_rate"] * 12 * jahre_bis_abbezahlt
+        else:
+            jahre_bis_abbezahlt = 0
+            gesamtkosten = 0
 
         optionen.append({
             "name": kombi["name"],
@@ -1706,73 +1762,57 @@ def calculate_financing_options(
             "monatlicher_cashflow": cashflow["monatlicher_cashflow"],
             "selbsttragend": cashflow["selbsttragend"],
             "jahre_bis_abbezahlt": jahre_bis_abbezahlt,
-            "gesamtkosten_geschaetzt": round(cashflow["monatliche_rate"] * 12 * jahre_bis_abbezahlt, 2)
+            "laufzeit_jahre_exakt": round(laufzeit, 1) if ist_tilgbar and finanzierungssumme > 0 else None,
+            "gesamtkosten_geschaetzt": round(gesamtkosten, 2)
         })
 
     return optionen
 
 
-@app.post("/analyze", response_model=AnalysisResult)
-async def analyze_property(
-    request: AnalysisRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
-    """
-    Führt die vollständige Immobilienanalyse durch mit:
-    - No-Go-Prüfung (K.O.-Kriterien)
-    - Kaufpreisfaktor & Bruttorendite
-    - Cashflow-Berechnung (3.75% Zins, 1.25% Tilgung)
-    - Warnsignal-Erkennung
-    - Gewichtete Score-Berechnung
+def calculate_financial_blocks(
+    data: 'PropertyData',
+    zweck: str,
+    eigenkapital: Optional[float],
+    zinssatz: Optional[float],
+    tilgung: Optional[float],
+    marktdaten: Optional[dict]
+) -> dict:
     """
-    # Prüfe Usage-Limit
-    if not check_usage_limit(db, current_user):
-        usage = get_user_total_usage(db, current_user.id)
-        raise HTTPException(
-            status_code=429,
-            detail=f"Nutzungslimit erreicht! Du hast ${usage['total_cost_usd']:.2f} von ${current_user.usage_limit_usd:.2f} verbraucht. Kontaktiere den Admin für mehr."
-        )
-
-    data = request.property_data
-    zweck = request.verwendungszweck
-
-    weights = WEIGHTS_INVESTMENT if zweck == "kapitalanlage" else WEIGHTS_SELF_USE
+    Berechnet alle deterministischen Finanz-Blöcke der Analyse
+    (Cashflow, Tilgungsplan, Szenarien, Sensitivität, Knowledge-Base-Rechner).
+    Benötigt keine KI und wird von /analyze und /library/{id}/recalculate genutzt.
 
-    client = get_anthropic_client()
-
-    # 1. NO-GO-PRÜFUNG - Sofortiges Ausschlusskriterium
-    no_go_check = check_no_gos(data)
-
-    # 2. WARNSIGNAL-ERKENNUNG
-    warnsignale = detect_warning_signals(data)
+    Returns:
+        Dict mit den Feldern von AnalysisResult (Feldname → Wert)
+    """
+    # Gleiche Rechner-Aufrufe (Basis-Cashflow, Basis-Tilgungsplan ...) nur einmal pro Analyse.
+    # Die Zähler stehen aggregiert in der Admin-Statistik (get_calc_context_stats).
+    with calculation_context():
+        return _calculate_financial_blocks(data, zweck, eigenkapital, zinssatz, tilgung, marktdaten)
+
+
+def _calculate_financial_blocks(
+    data: 'PropertyData',
+    zweck: str,
+    eigenkapital: Optional[float],
+    zinssatz: Optional[float],
+    tilgung: Optional[float],
+    marktdaten: Optional[dict]
+) -> dict:
+    """Die Finanz-Blöcke selbst (siehe calculate_financial_blocks)"""
+    # Gemeinsame Eingaben aller Blöcke - einmal abgeleitet
+    miete = data.aktuelle_miete or 0
+    ist_geschaetzte_miete = False
+    if miete == 0 and data.wohnflaeche and marktdaten:
+        # Schätze Miete falls nicht vorhanden (frei/leerstehend)
+        geschaetzte_miete_qm = marktdaten.get("miete_qm_durchschnitt", 10)
+        miete = data.wohnflaeche * geschaetzte_miete_qm
+        ist_geschaetzte_miete = True
 
-    # 3. V3.0 - LIVE MARKTDATEN RECHERCHE (PFLICHT!)
-    # Die KI MUSS zuerst aktuelle Preise recherchieren
-    marktdaten = None
-    if data.stadt:
-        try:
-            objekttyp = data.objekttyp or "Eigentumswohnung"
-            marktdaten = await fetch_live_market_data(
-                stadt=data.stadt,
-                stadtteil=data.stadtteil,
-                objekttyp=objekttyp
-            )
-            # Prüfe ob Live-Daten erfolgreich
-            if marktdaten and marktdaten.get("recherche_methode") == "live_web_search_v3":
-                print(f"✅ Live-Marktdaten für {data.stadt} erfolgreich recherchiert")
-            else:
-                print(f"⚠️ Fallback-Marktdaten für {data.stadt} verwendet")
-        except Exception as e:
-            print(f"❌ Marktdaten-Recherche fehlgeschlagen: {str(e)}")
-            # Fallback-Daten mit Warnung
-            marktdaten = {
-                "standort": f"{data.stadtteil}, {data.stadt}" if data.stadtteil else data.stadt,
-                "kaufpreis_qm_durchschnitt": 3500,
-                "miete_qm_durchschnitt": 10,
-                "datenqualität": "ACHTUNG: Konnte keine Live-Daten abrufen!",
-                "recherche_methode": "error_fallback"
-            }
+    nebenkosten = data.hausgeld or data.nebenkosten or 0
+    ek = eigenkapital or 0
+    zins = zinssatz or 3.75
+    tilg = tilgung or 1.25
 
     # 4. Investment-Metriken berechnen (nur bei Kapitalanlage)
     investment_metriken = None
@@ -1780,15 +1820,7 @@ async def analyze_property(
     mietschaetzung_info = None  # NEU: Tracking ob Miete geschätzt wurde
 
     if zweck == "kapitalanlage" and data.kaufpreis:
-        miete = data.aktuelle_miete or 0
-        ist_geschaetzte_miete = False
-
-        # Schätze Miete falls nicht vorhanden (frei/leerstehend)
-        if miete == 0 and data.wohnflaeche and marktdaten:
-            geschaetzte_miete_qm = marktdaten.get("miete_qm_durchschnitt", 10)
-            miete = data.wohnflaeche * geschaetzte_miete_qm
-            ist_geschaetzte_miete = True
-
+        if ist_geschaetzte_miete:
             # Erstelle Info-Objekt für geschätzte Miete
             mietschaetzung_info = {
                 "ist_geschaetzt": True,
@@ -1812,11 +1844,6 @@ async def analyze_property(
             )
 
         # Cashflow-Berechnung mit neuen Standardwerten
-        nebenkosten = data.hausgeld or data.nebenkosten or 0
-        ek = request.eigenkapital or 0
-        zins = request.zinssatz or 3.75
-        tilg = request.tilgung or 1.25
-
         cashflow_analyse = calculate_cashflow(
             kaufpreis=data.kaufpreis,
             monatliche_miete=miete,
@@ -1833,15 +1860,6 @@ async def analyze_property(
     sensitivity_analyse = None
 
     if zweck == "kapitalanlage" and data.kaufpreis and data.kaufpreis > 0:
-        miete = data.aktuelle_miete or 0
-        if miete == 0 and data.wohnflaeche and marktdaten:
-            miete = data.wohnflaeche * marktdaten.get("miete_qm_durchschnitt", 10)
-
-        nebenkosten = data.hausgeld or data.nebenkosten or 0
-        ek = request.eigenkapital or 0
-        zins = request.zinssatz or 3.75
-        tilg = request.tilgung or 1.25
-
         if miete > 0:
             # Tilgungsplan berechnen
             tilgungsplan = calculate_tilgungsplan(
@@ -1892,15 +1910,6 @@ async def analyze_property(
     finanzierungsoptionen = None
 
     if zweck == "kapitalanlage" and data.kaufpreis and data.kaufpreis > 0:
-        miete = data.aktuelle_miete or 0
-        if miete == 0 and data.wohnflaeche and marktdaten:
-            miete = data.wohnflaeche * marktdaten.get("miete_qm_durchschnitt", 10)
-
-        nebenkosten = data.hausgeld or data.nebenkosten or 0
-        ek = request.eigenkapital or 0
-        zins = request.zinssatz or 3.75
-        tilg = request.tilgung or 1.25
-
         if miete > 0:
             # Investment-Vergleich (Immobilie vs. ETF)
             investment_vergleich = calculate_investment_comparison(
@@ -1949,14 +1958,6 @@ async def analyze_property(
     quick_check_result = None
 
     if data.kaufpreis and data.kaufpreis > 0:
-        miete = data.aktuelle_miete or 0
-        if miete == 0 and data.wohnflaeche and marktdaten:
-            miete = data.wohnflaeche * marktdaten.get("miete_qm_durchschnitt", 10)
-
-        nebenkosten = data.hausgeld or data.nebenkosten or 0
-        ek = request.eigenkapital or 0
-        zins = request.zinssatz or 3.75
-        tilg = request.tilgung or 1.25
         jahresmiete = miete * 12
 
         if jahresmiete > 0:
@@ -2028,58 +2029,269 @@ async def analyze_property(
                 "sozialbindung": False
             })
 
-    # 8. KI-BEWERTUNG mit allen Informationen + Knowledge Base System Prompt
-    system_prompt = get_ai_system_prompt()
+    return {
+        "investment_metriken": investment_metriken,
+        "cashflow_analyse": cashflow_analyse,
+        "mietschaetzung": mietschaetzung_info,
+        "tilgungsplan": tilgungsplan,
+        "breakeven_eigenkapital": breakeven_eigenkapital,
+        "szenarien": szenarien,
+        "sensitivity_analyse": sensitivity_analyse,
+        "investment_vergleich": investment_vergleich,
+        "meilensteine": meilensteine,
+        "miet_variationen": miet_variationen,
+        "finanzierungsoptionen": finanzierungsoptionen,
+        "verbesserungsvorschlaege": verbesserungsvorschlaege,
+        "foerderungen": foerderungen_empfehlung,
+        "fairer_preis": fairer_preis_result,
+        "afa_berechnung": afa_result,
+        "leverage_effekt": leverage_result,
+        "quick_check_result": quick_check_result
+    }
 
-    # V3.0: Marktdaten-Info für Prompt
-    marktdaten_hinweis = ""
-    if marktdaten:
-        if marktdaten.get("recherche_methode") == "live_web_search_v3":
-            marktdaten_hinweis = "✅ LIVE-MARKTDATEN ERFOLGREICH RECHERCHIERT"
-        else:
-            marktdaten_hinweis = "⚠️ FALLBACK-DATEN - Bewertung mit Vorsicht!"
 
-    analyse_prompt = f"""Analysiere diese Immobilie professionell und bewerte jedes Kriterium mit einem Score von 0-100.
+def weigh_criterion(criterion: dict, weights: dict) -> 'CriterionScore':
+    """Gewichtet einen KI-Kriterien-Score (name/score/begründung) nach Verwendungszweck"""
+    gewichtung = weights.get(criterion["name"], 0)
+    gewichteter_score = (criterion["score"] * gewichtung) / 100
 
-🔴 V3.0 WICHTIG: Du MUSST die LIVE-RECHERCHIERTEN MARKTDATEN unten verwenden!
-Vergleiche den Kaufpreis IMMER mit den aktuellen €/m²-Preisen für diesen KONKRETEN Standort!
+    return CriterionScore(
+        name=criterion["name"],
+        score=criterion["score"],
+        gewichtung=gewichtung,
+        gewichteter_score=round(gewichteter_score, 2),
+        begründung=criterion["begründung"]
+    )
 
-=== IMMOBILIENDATEN ===
-{json.dumps(data.dict(), indent=2, ensure_ascii=False)}
 
-=== VERWENDUNGSZWECK ===
-{zweck}
+def calculate_price_overview(data: 'PropertyData', marktdaten: Optional[dict]) -> dict:
+    """
+    Kaufnebenkosten und Kennzahlen (€/m² im Vergleich zum Live-Markt).
 
-=== 🔴 LIVE-MARKTDATEN FÜR DIESEN STANDORT ({marktdaten_hinweis}) ===
-{json.dumps(marktdaten, indent=2, ensure_ascii=False) if marktdaten else "FEHLER: Keine Marktdaten!"}
+    Returns:
+        {"kaufnebenkosten": ..., "kennzahlen": ...}
+    """
+    # Kaufnebenkosten berechnen
+    kaufnebenkosten_result = None
+    if data.kaufpreis:
+        # Prüfe ob Makler involviert (aus Provision oder Verkäufertyp)
+        mit_makler = bool(data.provision) or (data.verkäufertyp and data.verkäufertyp.lower() == "makler")
+        kaufnebenkosten_result = calculate_kaufnebenkosten(
+            kaufpreis=data.kaufpreis,
+            bundesland=None,  # TODO: aus Stadt ableiten
+            mit_makler=mit_makler
+        )
 
-PFLICHT-VERGLEICH:
-- Objektpreis/m²: {round(data.kaufpreis / data.wohnflaeche, 2) if data.kaufpreis and data.wohnflaeche else "Unbekannt"} €/m²
-- Markt-Durchschnitt: {marktdaten.get('kaufpreis_qm_durchschnitt', 'Unbekannt') if marktdaten else 'Unbekannt'} €/m²
-- Bewertung: {"UNTER Markt ✅" if marktdaten and data.kaufpreis and data.wohnflaeche and (data.kaufpreis/data.wohnflaeche) < marktdaten.get('kaufpreis_qm_durchschnitt', 999999) else "ÜBER Markt ⚠️" if marktdaten else "Keine Daten"}
+    # V3.0: Kennzahlen mit Live-Marktdaten-Vergleich
+    kennzahlen = None
+    if data.kaufpreis and data.wohnflaeche:
+        preis_pro_qm = round(data.kaufpreis / data.wohnflaeche, 2)
+        markt_durchschnitt = marktdaten.get("kaufpreis_qm_durchschnitt") if marktdaten else None
+
+        kennzahlen = {
+            "preis_pro_qm": preis_pro_qm,
+            "markt_durchschnitt_qm": markt_durchschnitt,
+            "abweichung_prozent": round(((preis_pro_qm / markt_durchschnitt) - 1) * 100, 1) if markt_durchschnitt else None,
+            "unter_markt": preis_pro_qm < markt_durchschnitt if markt_durchschnitt else None,
+            "marktdaten_quelle": marktdaten.get("recherche_methode", "unbekannt") if marktdaten else "keine",
+            "marktdaten_standort": marktdaten.get("standort") if marktdaten else None,
+            "marktdaten_vertrauen": marktdaten.get("vertrauenswuerdigkeit", "unbekannt") if marktdaten else "keine",
+            "kaufpreisfaktor": round(data.kaufpreis / (data.aktuelle_miete * 12), 1) if data.aktuelle_miete else None,
+            "bruttorendite": round((data.aktuelle_miete * 12 / data.kaufpreis) * 100, 2) if data.aktuelle_miete else None
+        }
 
-=== NO-GO-PRÜFUNG ===
-{json.dumps(no_go_check, indent=2, ensure_ascii=False)}
-⚠️ WICHTIG: Bei No-Gos Alternativen und Verbesserungsvorschläge geben!
+    return {
+        "kaufnebenkosten": kaufnebenkosten_result,
+        "kennzahlen": kennzahlen
+    }
 
-=== WARNSIGNALE ===
-{json.dumps(warnsignale, indent=2, ensure_ascii=False)}
 
-=== INVESTMENT-METRIKEN (Kapitalanlage) ===
-{json.dumps(investment_metriken, indent=2, ensure_ascii=False) if investment_metriken else "Nicht berechnet"}
+def build_analysis_result(
+    data: 'PropertyData',
+    zweck: str,
+    ai_analysis: dict,
+    marktdaten: Optional[dict],
+    finanz: dict,
+    no_go_check: dict,
+    warnsignale: dict
+) -> 'AnalysisResult':
+    """
+    Setzt das Analyse-Ergebnis aus KI-Bewertung und Finanz-Blöcken zusammen:
+    gewichteter Gesamtscore, Empfehlung, Kaufnebenkosten und Kennzahlen.
 
-=== FAIRER PREIS BERECHNUNG ===
-{json.dumps(fairer_preis_result, indent=2, ensure_ascii=False) if fairer_preis_result else "Nicht berechnet"}
+    Args:
+        ai_analysis: KI-Antwort (kriterien mit name/score/begründung, stärken, schwächen, zusammenfassung)
+        finanz: Ergebnis von calculate_financial_blocks
+    """
+    weights = WEIGHTS_INVESTMENT if zweck == "kapitalanlage" else WEIGHTS_SELF_USE
 
-=== FÖRDERUNGEN ===
-{json.dumps(foerderungen_empfehlung, indent=2, ensure_ascii=False) if foerderungen_empfehlung else "Keine passenden Förderungen"}
+    # Berechne gewichteten Gesamtscore
+    kriterien_scores = []
+    total_weighted = 0
 
-=== CASHFLOW-ANALYSE ===
-{json.dumps(cashflow_analyse, indent=2, ensure_ascii=False) if cashflow_analyse else "Nicht berechnet"}
+    for criterion in ai_analysis["kriterien"]:
+        kriterium = weigh_criterion(criterion, weights)
+        total_weighted += (kriterium.score * kriterium.gewichtung) / 100
+        kriterien_scores.append(kriterium)
 
-Standard-Finanzierung: 3.75% Zins + 1.25% Tilgung = 5.0% Gesamtrate
+    # Gesamtscore (auf 100 normalisiert) + 10 Basis-Bonus für positivere Bewertung
+    gesamtscore = min(100, round(total_weighted + 10, 1))
 
-=== BEWERTUNGSKRITERIEN für {zweck.upper()} ===
+    # EMPFEHLUNG basierend auf No-Gos, Score und Warnsignalen (positivere Schwellen)
+    if no_go_check["no_go"]:
+        empfehlung = "ABLEHNEN"
+        empfehlung_text = f"❌ NICHT INVESTIEREN - No-Go-Kriterien: {', '.join(no_go_check['gründe'])}"
+    elif gesamtscore >= 65:  # war 75
+        if warnsignale["kritisch"]:
+            empfehlung = "PRÜFEN"
+            empfehlung_text = f"⚠️ GENAU PRÜFEN - Guter Score ({gesamtscore}), aber kritische Warnsignale vorhanden"
+        else:
+            empfehlung = "INVESTIEREN"
+            empfehlung_text = f"✅ EMPFEHLENSWERT - Score: {gesamtscore}/100"
+    elif gesamtscore >= 50:  # war 60
+        empfehlung = "PRÜFEN"
+        empfehlung_text = f"🔍 PRÜFENSWERT - Solider Score ({gesamtscore}/100)"
+        if warnsignale["anzahl"] > 0:
+            empfehlung_text += f", {warnsignale['anzahl']} Warnsignal(e)"
+    elif gesamtscore >= 35:  # NEU: Zwischenstufe
+        empfehlung = "VORSICHT"
+        empfehlung_text = f"⚠️ MIT VORSICHT - Unterdurchschnittlicher Score ({gesamtscore}/100)"
+    else:
+        empfehlung = "ABLEHNEN"
+        empfehlung_text = f"❌ NICHT EMPFOHLEN - Schwacher Score ({gesamtscore}/100)"
+
+    # Erweitere Zusammenfassung mit Empfehlung
+    zusammenfassung_erweitert = f"{empfehlung_text}\n\n{ai_analysis['zusammenfassung']}"
+
+    return AnalysisResult(
+        gesamtscore=gesamtscore,
+        verwendungszweck=zweck,
+        kriterien=kriterien_scores,
+        no_go_check=no_go_check,
+        warnsignale=warnsignale,
+        zusammenfassung=zusammenfassung_erweitert,
+        stärken=ai_analysis["stärken"],
+        schwächen=ai_analysis["schwächen"],
+        empfehlung=empfehlung,
+        marktdaten=marktdaten,
+        # V3.0: Live-Marktdaten Kennzahlen + Kaufnebenkosten
+        **calculate_price_overview(data, marktdaten),
+        **finanz
+    )
+
+
+async def research_market_data(data: 'PropertyData') -> Optional[dict]:
+    """
+    Live-Marktdaten für den Standort des Objekts (V3.0 - PFLICHT!).
+    Die KI MUSS zuerst aktuelle Preise recherchieren.
+
+    Returns:
+        Marktdaten, Fallback-Werte bei Fehlern oder None ohne Stadt
+    """
+    marktdaten = None
+    if data.stadt:
+        try:
+            objekttyp = data.objekttyp or "Eigentumswohnung"
+            marktdaten = await fetch_live_market_data(
+                stadt=data.stadt,
+                stadtteil=data.stadtteil,
+                objekttyp=objekttyp
+            )
+            # Prüfe ob Live-Daten erfolgreich
+            if marktdaten and marktdaten.get("recherche_methode") == "live_web_search_v3":
+                print(f"✅ Live-Marktdaten für {data.stadt} erfolgreich recherchiert")
+            else:
+                print(f"⚠️ Fallback-Marktdaten für {data.stadt} verwendet")
+        except Exception as e:
+            print(f"❌ Marktdaten-Recherche fehlgeschlagen: {str(e)}")
+            # Fallback-Daten mit Warnung
+            marktdaten = {
+                "standort": f"{data.stadtteil}, {data.stadt}" if data.stadtteil else data.stadt,
+                "kaufpreis_qm_durchschnitt": 3500,
+                "miete_qm_durchschnitt": 10,
+                "datenqualität": "ACHTUNG: Konnte keine Live-Daten abrufen!",
+                "recherche_methode": "error_fallback"
+            }
+
+    return marktdaten
+
+
+def build_analysis_prompts(
+    data: 'PropertyData',
+    zweck: str,
+    marktdaten: Optional[dict],
+    no_go_check: dict,
+    warnsignale: dict,
+    finanz: dict
+) -> tuple:
+    """
+    Baut System-Prompt und Analyse-Prompt für die KI-Bewertung.
+
+    Returns:
+        (system_prompt, analyse_prompt)
+    """
+    weights = WEIGHTS_INVESTMENT if zweck == "kapitalanlage" else WEIGHTS_SELF_USE
+    investment_metriken = finanz["investment_metriken"]
+    cashflow_analyse = finanz["cashflow_analyse"]
+    fairer_preis_result = finanz["fairer_preis"]
+    foerderungen_empfehlung = finanz["foerderungen"]
+
+    # Statischer System-Prompt mit Cache-Breakpoint, Objektdaten folgen in der User-Message
+    system_prompt = get_ai_system_blocks(
+        context={**data.dict(), "warnsignale": warnsignale["warnsignale"], "no_gos": no_go_check["gründe"]},
+        token_budget=KNOWLEDGE_TOKEN_BUDGET,
+        verwendungszweck=zweck
+    )
+
+    # V3.0: Marktdaten-Info für Prompt
+    marktdaten_hinweis = ""
+    if marktdaten:
+        if marktdaten.get("recherche_methode") == "live_web_search_v3":
+            marktdaten_hinweis = "✅ LIVE-MARKTDATEN ERFOLGREICH RECHERCHIERT"
+        else:
+            marktdaten_hinweis = "⚠️ FALLBACK-DATEN - Bewertung mit Vorsicht!"
+
+    analyse_prompt = f"""Analysiere diese Immobilie professionell und bewerte jedes Kriterium mit einem Score von 0-100.
+
+🔴 V3.0 WICHTIG: Du MUSST die LIVE-RECHERCHIERTEN MARKTDATEN unten verwenden!
+Vergleiche den Kaufpreis IMMER mit den aktuellen €/m²-Preisen für diesen KONKRETEN Standort!
+
+=== IMMOBILIENDATEN ===
+{json.dumps(data.dict(), indent=2, ensure_ascii=False)}
+
+=== VERWENDUNGSZWECK ===
+{zweck}
+
+=== 🔴 LIVE-MARKTDATEN FÜR DIESEN STANDORT ({marktdaten_hinweis}) ===
+{json.dumps(marktdaten, indent=2, ensure_ascii=False) if marktdaten else "FEHLER: Keine Marktdaten!"}
+
+PFLICHT-VERGLEICH:
+- Objektpreis/m²: {round(data.kaufpreis / data.wohnflaeche, 2) if data.kaufpreis and data.wohnflaeche else "Unbekannt"} €/m²
+- Markt-Durchschnitt: {marktdaten.get('kaufpreis_qm_durchschnitt', 'Unbekannt') if marktdaten else 'Unbekannt'} €/m²
+- Bewertung: {"UNTER Markt ✅" if marktdaten and data.kaufpreis and data.wohnflaeche and (data.kaufpreis/data.wohnflaeche) < marktdaten.get('kaufpreis_qm_durchschnitt', 999999) else "ÜBER Markt ⚠️" if marktdaten else "Keine Daten"}
+
+=== NO-GO-PRÜFUNG ===
+{json.dumps(no_go_check, indent=2, ensure_ascii=False)}
+⚠️ WICHTIG: Bei No-Gos Alternativen und Verbesserungsvorschläge geben!
+
+=== WARNSIGNALE ===
+{json.dumps(warnsignale, indent=2, ensure_ascii=False)}
+
+=== INVESTMENT-METRIKEN (Kapitalanlage) ===
+{json.dumps(investment_metriken, indent=2, ensure_ascii=False) if investment_metriken else "Nicht berechnet"}
+
+=== FAIRER PREIS BERECHNUNG ===
+{json.dumps(fairer_preis_result, indent=2, ensure_ascii=False) if fairer_preis_result else "Nicht berechnet"}
+
+=== FÖRDERUNGEN ===
+{json.dumps(foerderungen_empfehlung, indent=2, ensure_ascii=False) if foerderungen_empfehlung else "Keine passenden Förderungen"}
+
+=== CASHFLOW-ANALYSE ===
+{json.dumps(cashflow_analyse, indent=2, ensure_ascii=False) if cashflow_analyse else "Nicht berechnet"}
+
+Standard-Finanzierung: 3.75% Zins + 1.25% Tilgung = 5.0% Gesamtrate
+
+=== BEWERTUNGSKRITERIEN für {zweck.upper()} ===
 {json.dumps(weights, indent=2, ensure_ascii=False)}
 
 🔴 V3.0 - BEWERTUNGSREGELN MIT LIVE-DATEN:
@@ -2143,171 +2355,633 @@ Antworte als JSON:
 
 Antworte NUR mit dem JSON."""
 
-    try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=2500,
-            system=system_prompt,
-            messages=[{"role": "user", "content": analyse_prompt}]
-        )
+    return system_prompt, analyse_prompt
 
-        # Log Usage
-        log_usage(
-            db=db,
-            user_id=current_user.id,
-            action_type="analyze",
-            input_tokens=response.usage.input_tokens,
-            output_tokens=response.usage.output_tokens
+
+def parse_ai_analysis(text: str) -> dict:
+    """Parst die JSON-Antwort der KI-Bewertung (auch in ```json-Blöcken)"""
+    json_text = text.strip()
+    if json_text.startswith("```"):
+        json_text = json_text.split("```")[1]
+        if json_text.startswith("json"):
+            json_text = json_text[4:]
+    return json.loads(json_text.strip())
+
+
+def save_analysis(
+    db: Session,
+    user_id: int,
+    request: 'AnalysisRequest',
+    result: 'AnalysisResult',
+    ai_cache_key: Optional[str]
+) -> int:
+    """Speichert eine Analyse in der Bibliothek des Users und gibt die ID zurück"""
+    data = request.property_data
+    zweck = request.verwendungszweck
+
+    db_analysis = Analysis(
+        user_id=user_id,
+        property_data=data.dict(),
+        analysis_result=result.dict(),
+        verwendungszweck=zweck,
+        eigenkapital=request.eigenkapital or 0,
+        zinssatz=request.zinssatz or 3.75,
+        tilgung=request.tilgung or 1.25,
+        kaufpreis=data.kaufpreis,
+        wohnflaeche=data.wohnflaeche,
+        stadt=data.stadt,
+        stadtteil=data.stadtteil,
+        gesamtscore=result.gesamtscore,
+        title=f"{data.stadt or 'Unbekannt'} - {data.objekttyp or 'Immobilie'}",
+        ai_cache_key=ai_cache_key
+    )
+    db.add(db_analysis)
+    db.commit()
+    db.refresh(db_analysis)
+
+    return db_analysis.id
+
+
+@app.post("/analyze", response_model=AnalysisResult)
+async def analyze_property(
+    request: AnalysisRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Führt die vollständige Immobilienanalyse durch mit:
+    - No-Go-Prüfung (K.O.-Kriterien)
+    - Kaufpreisfaktor & Bruttorendite
+    - Cashflow-Berechnung (3.75% Zins, 1.25% Tilgung)
+    - Warnsignal-Erkennung
+    - Gewichtete Score-Berechnung
+    """
+    # Prüfe Usage-Limit
+    if not check_usage_limit(db, current_user):
+        usage = get_user_total_usage(db, current_user.id)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Nutzungslimit erreicht! Du hast ${usage['total_cost_usd']:.2f} von ${current_user.usage_limit_usd:.2f} verbraucht. Kontaktiere den Admin für mehr."
         )
 
-        json_text = response.content[0].text.strip()
-        if json_text.startswith("```"):
-            json_text = json_text.split("```")[1]
-            if json_text.startswith("json"):
-                json_text = json_text[4:]
-        json_text = json_text.strip()
-        
-        ai_analysis = json.loads(json_text)
-
-        # Berechne gewichteten Gesamtscore
-        kriterien_scores = []
-        total_weighted = 0
-
-        for criterion in ai_analysis["kriterien"]:
-            name = criterion["name"]
-            score = criterion["score"]
-            gewichtung = weights.get(name, 0)
-            gewichteter_score = (score * gewichtung) / 100
-            total_weighted += gewichteter_score
-
-            kriterien_scores.append(CriterionScore(
-                name=name,
-                score=score,
-                gewichtung=gewichtung,
-                gewichteter_score=round(gewichteter_score, 2),
-                begründung=criterion["begründung"]
-            ))
-
-        # Gesamtscore (auf 100 normalisiert) + 10 Basis-Bonus für positivere Bewertung
-        gesamtscore = min(100, round(total_weighted + 10, 1))
-
-        # EMPFEHLUNG basierend auf No-Gos, Score und Warnsignalen (positivere Schwellen)
-        if no_go_check["no_go"]:
-            empfehlung = "ABLEHNEN"
-            empfehlung_text = f"❌ NICHT INVESTIEREN - No-Go-Kriterien: {', '.join(no_go_check['gründe'])}"
-        elif gesamtscore >= 65:  # war 75
-            if warnsignale["kritisch"]:
-                empfehlung = "PRÜFEN"
-                empfehlung_text = f"⚠️ GENAU PRÜFEN - Guter Score ({gesamtscore}), aber kritische Warnsignale vorhanden"
-            else:
-                empfehlung = "INVESTIEREN"
-                empfehlung_text = f"✅ EMPFEHLENSWERT - Score: {gesamtscore}/100"
-        elif gesamtscore >= 50:  # war 60
-            empfehlung = "PRÜFEN"
-            empfehlung_text = f"🔍 PRÜFENSWERT - Solider Score ({gesamtscore}/100)"
-            if warnsignale["anzahl"] > 0:
-                empfehlung_text += f", {warnsignale['anzahl']} Warnsignal(e)"
-        elif gesamtscore >= 35:  # NEU: Zwischenstufe
-            empfehlung = "VORSICHT"
-            empfehlung_text = f"⚠️ MIT VORSICHT - Unterdurchschnittlicher Score ({gesamtscore}/100)"
+    # Gleiche Pipeline wie /analyze/stream, Analyse-Jobs und Portfolios - hier nur das Endergebnis
+    async with aclosing(analysis_events(request, current_user.id)) as ereignisse:
+        async for ereignis in ereignisse:
+            if ereignis["event"] == "result":
+                return ereignis["daten"]
+            if ereignis["event"] == "error":
+                raise HTTPException(status_code=ereignis["status"], detail=ereignis["detail"])
+
+    raise HTTPException(status_code=500, detail="Fehler bei der Analyse: Pipeline ohne Ergebnis beendet")
+
+
+async def analysis_events(request: 'AnalysisRequest', user_id: int, research=None):
+    """
+    Analyse-Pipeline als Folge von Ereignissen (für /analyze, /analyze/stream, Analyse-Jobs und Portfolios).
+    Nutzt eine eigene DB-Session und speichert das Ergebnis in der Bibliothek.
+
+    Args:
+        research: Ersatz für research_market_data (z.B. bereits recherchierte Marktdaten im Portfolio)
+
+    Yields:
+        {"event": "block", "name", "daten"} - no_go_check und warnsignale sofort,
+            danach marktdaten, kennzahlen, kaufnebenkosten und die Finanz-Blöcke
+        {"event": "kriterium", "daten"} - gewichteter Score, sobald die KI ein Kriterium fertig geschrieben hat
+        {"event": "result", "daten"} - AnalysisResult mit gesamtscore, empfehlung und analysis_id
+        {"event": "error", "status", "detail"} - bei Fehlern (danach endet die Folge)
+    """
+    data = request.property_data
+    zweck = request.verwendungszweck
+    weights = WEIGHTS_INVESTMENT if zweck == "kapitalanlage" else WEIGHTS_SELF_USE
+
+    # Eigene Session - die Pipeline läuft auch nach dem Request weiter (Stream, Job-Worker)
+    db = SessionLocal()
+    try:
+        # 1.-2. No-Gos und Warnsignale brauchen keine Marktdaten
+        with span("regeln"):
+            no_go_check = check_no_gos(data)
+            warnsignale = detect_warning_signals(data)
+        yield {"event": "block", "name": "no_go_check", "daten": no_go_check}
+        yield {"event": "block", "name": "warnsignale", "daten": warnsignale}
+
+        # 3. Marktdaten
+        with span("marktdaten"):
+            marktdaten = await (research or research_market_data)(data)
+        yield {"event": "block", "name": "marktdaten", "daten": marktdaten}
+
+        # 4.-7. Deterministische Blöcke
+        with span("finanz"):
+            finanz = calculate_financial_blocks(
+                data=data,
+                zweck=zweck,
+                eigenkapital=request.eigenkapital,
+                zinssatz=request.zinssatz,
+                tilgung=request.tilgung,
+                marktdaten=marktdaten
+            )
+        for name, daten in {**calculate_price_overview(data, marktdaten), **finanz}.items():
+            if daten is not None:
+                yield {"event": "block", "name": name, "daten": daten}
+
+        # 8. KI-Bewertung
+        with span("ki_cache"):
+            ai_cache_key = analysis_cache_key(
+                property_data=data.dict(),
+                verwendungszweck=zweck,
+                marktdaten=marktdaten,
+                knowledge_version=get_knowledge_version(),
+                model=ANALYSIS_MODEL
+            )
+            cached_analysis = find_cached_analysis(db, user_id, ai_cache_key, force_refresh=request.force_refresh)
+
+        if cached_analysis:
+            ai_analysis = ai_analysis_from_result(cached_analysis.analysis_result)
+            print(f"♻️ KI-Bewertung aus Analyse #{cached_analysis.id} übernommen")
+            for criterion in ai_analysis["kriterien"]:
+                yield {"event": "kriterium", "daten": weigh_criterion(criterion, weights).dict()}
         else:
-            empfehlung = "ABLEHNEN"
-            empfehlung_text = f"❌ NICHT EMPFOHLEN - Schwacher Score ({gesamtscore}/100)"
-
-        # Erweitere Zusammenfassung mit Empfehlung
-        zusammenfassung_erweitert = f"{empfehlung_text}\n\n{ai_analysis['zusammenfassung']}"
-
-        # Kaufnebenkosten berechnen
-        kaufnebenkosten_result = None
-        if data.kaufpreis:
-            # Prüfe ob Makler involviert (aus Provision oder Verkäufertyp)
-            mit_makler = bool(data.provision) or (data.verkaufertyp and data.verkaufertyp.lower() == "makler")
-            kaufnebenkosten_result = calculate_kaufnebenkosten(
-                kaufpreis=data.kaufpreis,
-                bundesland=None,  # TODO: aus Stadt ableiten
-                mit_makler=mit_makler
+            with span("prompt"):
+                system_prompt, analyse_prompt = build_analysis_prompts(data, zweck, marktdaten, no_go_check, warnsignale, finanz)
+            parser = CriteriaStreamParser()
+            with span("llm_analyze"):
+                async with stream_message(
+                    model=ANALYSIS_MODEL,
+                    max_tokens=2500,
+                    system=system_prompt,
+                    messages=[{"role": "user", "content": analyse_prompt}]
+                ) as stream:
+                    async for text in stream.text_stream:
+                        for criterion in parser.feed(text):
+                            yield {"event": "kriterium", "daten": weigh_criterion(criterion, weights).dict()}
+                    final = await stream.get_final_message()
+
+            log_usage(
+                db=db,
+                user_id=user_id,
+                action_type="analyze",
+                input_tokens=final.usage.input_tokens,
+                output_tokens=final.usage.output_tokens,
+                cache_creation_input_tokens=final.usage.cache_creation_input_tokens or 0,
+                cache_read_input_tokens=final.usage.cache_read_input_tokens or 0
             )
+            ai_analysis = parse_ai_analysis(parser.text)
+
+        with span("ergebnis"):
+            result = build_analysis_result(
+                data=data,
+                zweck=zweck,
+                ai_analysis=ai_analysis,
+                marktdaten=marktdaten,
+                finanz=finanz,
+                no_go_check=no_go_check,
+                warnsignale=warnsignale
+            )
+        result.ki_bewertung_aus_cache = cached_analysis is not None
+        with span("db_save"):
+            result.analysis_id = save_analysis(db, user_id, request, result, ai_cache_key)
 
-        # V3.0: Kennzahlen mit Live-Marktdaten-Vergleich
-        kennzahlen = None
-        if data.kaufpreis and data.wohnflaeche:
-            preis_pro_qm = round(data.kaufpreis / data.wohnflaeche, 2)
-            markt_durchschnitt = marktdaten.get("kaufpreis_qm_durchschnitt") if marktdaten else None
-
-            kennzahlen = {
-                "preis_pro_qm": preis_pro_qm,
-                "markt_durchschnitt_qm": markt_durchschnitt,
-                "abweichung_prozent": round(((preis_pro_qm / markt_durchschnitt) - 1) * 100, 1) if markt_durchschnitt else None,
-                "unter_markt": preis_pro_qm < markt_durchschnitt if markt_durchschnitt else None,
-                "marktdaten_quelle": marktdaten.get("recherche_methode", "unbekannt") if marktdaten else "keine",
-                "marktdaten_standort": marktdaten.get("standort") if marktdaten else None,
-                "marktdaten_vertrauen": marktdaten.get("vertrauenswuerdigkeit", "unbekannt") if marktdaten else "keine",
-                "kaufpreisfaktor": round(data.kaufpreis / (data.aktuelle_miete * 12), 1) if data.aktuelle_miete else None,
-                "bruttorendite": round((data.aktuelle_miete * 12 / data.kaufpreis) * 100, 2) if data.aktuelle_miete else None
+        yield {"event": "result", "daten": result.dict()}
+    except json.JSONDecodeError as e:
+        yield {"event": "error", "status": 500, "detail": f"Fehler beim Parsen der KI-Analyse: {str(e)}"}
+    except HTTPException as e:
+        yield {"event": "error", "status": e.status_code, "detail": e.detail}
+    except Exception as e:
+        yield {"event": "error", "status": 500, "detail": f"Fehler bei der Analyse: {str(e)}"}
+    finally:
+        db.close()
+
+
+@app.post("/analyze/stream")
+async def analyze_property_stream(
+    request: AnalysisRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Progressive Variante von /analyze (NDJSON, eine JSON-Zeile pro Ereignis).
+    Das Frontend kann Charts rendern, bevor die KI-Bewertung fertig ist.
+
+    Ereignisse in dieser Reihenfolge:
+    - block:     {"name", "daten"} - no_go_check und warnsignale sofort,
+                 danach marktdaten, kennzahlen, kaufnebenkosten und die Finanz-Blöcke
+    - kriterium: {"daten": CriterionScore} - sobald die KI ein Kriterium fertig geschrieben hat
+    - result:    {"daten": AnalysisResult} - mit gesamtscore, empfehlung und analysis_id
+    - error:     {"detail"} bei Fehlern während des Streams
+    """
+    # Prüfe Usage-Limit
+    if not check_usage_limit(db, current_user):
+        usage = get_user_total_usage(db, current_user.id)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Nutzungslimit erreicht! Du hast ${usage['total_cost_usd']:.2f} von ${current_user.usage_limit_usd:.2f} verbraucht. Kontaktiere den Admin für mehr."
+        )
+
+    user_id = current_user.id
+
+    async def event_stream():
+        async for ereignis in analysis_events(request, user_id):
+            yield ndjson(ereignis)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def run_analysis_job(job: dict):
+    """Runner der Analyse-Warteschlange: Pipeline-Ereignisse für einen Job"""
+    return analysis_events(AnalysisRequest(**job["request"]), job["user_id"])
+
+
+def job_response(job: dict, db: Session) -> AnalysisJobResponse:
+    """Job-Status inkl. gespeicherter Analyse, sobald der Job fertig ist"""
+    ergebnis = None
+    if job["status"] == "done" and job["analysis_id"]:
+        analysis = db.query(Analysis).filter(Analysis.id == job["analysis_id"]).first()
+        if analysis:
+            ergebnis = AnalysisResult(**{**analysis.analysis_result, "analysis_id": analysis.id})
+
+    return AnalysisJobResponse(
+        job_id=job["id"],
+        status=job["status"],
+        created_at=job["created_at"],
+        started_at=job["started_at"],
+        finished_at=job["finished_at"],
+        teilergebnis=job.get("teilergebnis"),
+        analysis_id=job["analysis_id"],
+        ergebnis=ergebnis,
+        fehler=job["fehler"]
+    )
+
+
+@app.post("/analyze/jobs", response_model=AnalysisJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_analysis_job(
+    request: AnalysisRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Startet eine Analyse im Hintergrund und gibt sofort die Job-ID zurück.
+    Fortschritt und Ergebnis über GET /analyze/jobs/{job_id} abfragen.
+    Das Ergebnis wird wie bei /analyze in der Bibliothek gespeichert.
+    """
+    # Prüfe Usage-Limit
+    if not check_usage_limit(db, current_user):
+        usage = get_user_total_usage(db, current_user.id)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Nutzungslimit erreicht! Du hast ${usage['total_cost_usd']:.2f} von ${current_user.usage_limit_usd:.2f} verbraucht. Kontaktiere den Admin für mehr."
+        )
+
+    try:
+        job = await analysis_jobs.submit(current_user.id, request.dict())
+    except QueueFullError:
+        raise HTTPException(
+            status_code=503,
+            detail="Zu viele Analysen in der Warteschlange - bitte in einer Minute erneut versuchen"
+        )
+
+    return job_response(job, db)
+
+
+@app.get("/analyze/jobs/{job_id}", response_model=AnalysisJobResponse)
+async def get_analysis_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """Status, Teilergebnisse und (wenn fertig) die gespeicherte Analyse eines Jobs"""
+    job = await analysis_jobs.get(job_id)
+    if not job or job["user_id"] != current_user.id:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    # Fertige Jobs laden die gespeicherte Analyse aus der Datenbank
+    return await asyncio.to_thread(job_response, job, db)
+
+
+async def score_portfolio_property(
+    property_data: dict,
+    marktdaten: Optional[dict],
+    einstellungen: dict,
+    user_id: int
+) -> dict:
+    """
+    Bewertet ein Objekt eines Portfolios mit bereits recherchierten Marktdaten
+    und speichert es in der Bibliothek.
+
+    Returns:
+        Zeile der Portfolio-Rangliste
+    """
+    request = AnalysisRequest(property_data=PropertyData(**property_data), **einstellungen)
+
+    async def vorhandene_marktdaten(data):
+        return marktdaten
+
+    async for ereignis in analysis_events(request, user_id, research=vorhandene_marktdaten):
+        if ereignis["event"] == "error":
+            raise HTTPException(status_code=500, detail=ereignis["detail"])
+        if ereignis["event"] == "result":
+            result = ereignis["daten"]
+            data = request.property_data
+            return {
+                "titel": f"{data.stadt or 'Unbekannt'} - {data.objekttyp or 'Immobilie'}",
+                "stadt": data.stadt,
+                "stadtteil": data.stadtteil,
+                "kaufpreis": data.kaufpreis,
+                "wohnflaeche": data.wohnflaeche,
+                "gesamtscore": result["gesamtscore"],
+                "empfehlung": result["empfehlung"],
+                "no_go": (result.get("no_go_check") or {}).get("no_go", False),
+                "bruttorendite": (result.get("kennzahlen") or {}).get("bruttorendite"),
+                "monatlicher_cashflow": (result.get("cashflow_analyse") or {}).get("monatlicher_cashflow"),
+                "analysis_id": result["analysis_id"]
             }
+    raise HTTPException(status_code=500, detail="Analyse ohne Ergebnis beendet")
+
+
+def portfolio_response(objekte: List[dict], einstellungen: dict, user_id: int) -> StreamingResponse:
+    """NDJSON-Stream der Portfolio-Pipeline (Fortschritt + Ranking am Ende)"""
+
+    async def extract(content: bytes):
+        property_data, quelle, _ = await get_cached_pdf_extraction(content, extract_pdf_with_claude)
+        return property_data, quelle
+
+    async def research(property_data: dict):
+        return await research_market_data(PropertyData(**property_data))
+
+    async def score(property_data: dict, marktdaten: Optional[dict]):
+        return await score_portfolio_property(property_data, marktdaten, einstellungen, user_id)
 
-        result = AnalysisResult(
-            gesamtscore=gesamtscore,
-            verwendungszweck=zweck,
-            kriterien=kriterien_scores,
-            cashflow_analyse=cashflow_analyse,
-            investment_metriken=investment_metriken,
-            no_go_check=no_go_check,
-            warnsignale=warnsignale,
-            zusammenfassung=zusammenfassung_erweitert,
-            stärken=ai_analysis["stärken"],
-            schwächen=ai_analysis["schwächen"],
-            empfehlung=empfehlung,
-            marktdaten=marktdaten,
-            tilgungsplan=tilgungsplan,
-            breakeven_eigenkapital=breakeven_eigenkapital,
-            szenarien=szenarien,
-            sensitivity_analyse=sensitivity_analyse,
-            investment_vergleich=investment_vergleich,
-            meilensteine=meilensteine,
-            miet_variationen=miet_variationen,
-            finanzierungsoptionen=finanzierungsoptionen,
-            # NEU: Knowledge Base Integration
-            verbesserungsvorschlaege=verbesserungsvorschlaege,
-            foerderungen=foerderungen_empfehlung,
-            fairer_preis=fairer_preis_result,
-            afa_berechnung=afa_result,
-            leverage_effekt=leverage_result,
-            quick_check_result=quick_check_result,
-            # V3.0: Live-Marktdaten Kennzahlen
-            kennzahlen=kennzahlen,
-            # NEU: Mietschätzung-Info bei freien Immobilien
-            mietschaetzung=mietschaetzung_info,
-            # NEU: Kaufnebenkosten
-            kaufnebenkosten=kaufnebenkosten_result
+    async def event_stream():
+        async for ereignis in run_portfolio(objekte, extract, research, score):
+            yield ndjson(ereignis)
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+def check_portfolio_request(anzahl: int, current_user: User, db: Session):
+    """Prüft Objektanzahl und Usage-Limit vor dem Start eines Portfolios"""
+    if anzahl == 0:
+        raise HTTPException(status_code=400, detail="Keine Objekte übergeben")
+    if anzahl > PORTFOLIO_MAX_OBJEKTE:
+        raise HTTPException(status_code=400, detail=f"Maximal {PORTFOLIO_MAX_OBJEKTE} Objekte pro Portfolio")
+
+    # Prüfe Usage-Limit
+    if not check_usage_limit(db, current_user):
+        usage = get_user_total_usage(db, current_user.id)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Nutzungslimit erreicht! Du hast ${usage['total_cost_usd']:.2f} von ${current_user.usage_limit_usd:.2f} verbraucht. Kontaktiere den Admin für mehr."
         )
 
-        # Speichere Analyse in Datenbank
-        db_analysis = Analysis(
-            user_id=current_user.id,
-            property_data=data.dict(),
-            analysis_result=result.dict(),
-            verwendungszweck=zweck,
-            eigenkapital=request.eigenkapital or 0,
-            zinssatz=request.zinssatz or 3.75,
-            tilgung=request.tilgung or 1.25,
-            kaufpreis=data.kaufpreis,
-            wohnflaeche=data.wohnflaeche,
-            stadt=data.stadt,
-            stadtteil=data.stadtteil,
-            gesamtscore=gesamtscore,
-            title=f"{data.stadt or 'Unbekannt'} - {data.objekttyp or 'Immobilie'}"
+
+@app.post("/portfolio/analyze")
+async def analyze_portfolio(
+    request: PortfolioRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Bewertet viele Objekte (PropertyData) in einem Durchlauf.
+    Antwort als NDJSON: start, pro Objekt recherchiert/bewertet/fehler,
+    am Ende summary mit Ranking nach Gesamtscore. Jede Analyse wird gespeichert.
+    """
+    check_portfolio_request(len(request.objekte), current_user, db)
+
+    objekte = [{"property_data": objekt.dict()} for objekt in request.objekte]
+    einstellungen = request.dict(exclude={"objekte"})
+    return portfolio_response(objekte, einstellungen, current_user.id)
+
+
+@app.post("/portfolio/analyze-pdfs")
+async def analyze_portfolio_pdfs(
+    files: List[UploadFile] = File(...),
+    verwendungszweck: str = Form("kapitalanlage"),
+    eigenkapital: float = Form(0),
+    zinssatz: float = Form(3.75),
+    tilgung: float = Form(1.25),
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Wie /portfolio/analyze, aber mit PDF-Exposés (multipart, Feld "files").
+    Vor der Recherche kommt pro Datei ein Ereignis "extrahiert" (PDF-Cache wird genutzt).
+    """
+    check_portfolio_request(len(files), current_user, db)
+
+    for file in files:
+        if not file.filename.endswith('.pdf'):
+            raise HTTPException(status_code=400, detail=f"Nur PDF-Dateien werden akzeptiert: {file.filename}")
+
+    objekte = [{"datei": file.filename, "pdf": await file.read()} for file in files]
+    einstellungen = {
+        "verwendungszweck": verwendungszweck,
+        "eigenkapital": eigenkapital,
+        "zinssatz": zinssatz,
+        "tilgung": tilgung
+    }
+    return portfolio_response(objekte, einstellungen, current_user.id)
+
+
+def ai_analysis_from_result(gespeichert: dict) -> dict:
+    """
+    Stellt die KI-Bewertung aus einem gespeicherten Analyse-Ergebnis wieder her
+    (Kriterien-Scores, Stärken, Schwächen, Zusammenfassung ohne Empfehlungszeile).
+    """
+    zusammenfassung = gespeichert.get("zusammenfassung") or ""
+    # build_analysis_result stellt "<Empfehlung>\n\n" voran
+    if "\n\n" in zusammenfassung:
+        zusammenfassung = zusammenfassung.split("\n\n", 1)[1]
+
+    return {
+        "kriterien": [
+            {"name": k["name"], "score": k["score"], "begründung": k.get("begründung", "")}
+            for k in gespeichert.get("kriterien", [])
+        ],
+        "stärken": gespeichert.get("stärken", []),
+        "schwächen": gespeichert.get("schwächen", []),
+        "zusammenfassung": zusammenfassung
+    }
+
+
+@app.post("/sensitivity")
+def sensitivity_grid(
+    request: SensitivityRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Cashflow-Sensitivität in beliebiger Auflösung (z.B. Zins x EK-Quote mit 100 x 100 Punkten,
+    optional eine dritte Achse wie Miete oder Tilgung) plus analytische Break-Even-Linie.
+    Antwort im Spaltenformat: Achsenwerte + flaches Cashflow-Array (letzte Achse läuft am schnellsten).
+    """
+    if not 1 <= len(request.achsen) <= 3:
+        raise HTTPException(status_code=400, detail="1 bis 3 Achsen angeben")
+
+    basis = request.dict(exclude={"achsen", "break_even"})
+    try:
+        with span("sensitivitaet"):
+            ergebnis = sensitivity_analysis(basis, [achse.dict() for achse in request.achsen], request.break_even)
+    except SensitivityError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Nur Listen aus Floats/None - direkt serialisieren statt jsonable_encoder über 10k+ Werte
+    return Response(content=json.dumps(ergebnis), media_type="application/json")
+
+
+@app.post("/risk-simulation")
+def risk_simulation(
+    request: RiskSimulationRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Monte-Carlo-Risikosimulation: zufällige Anschlusszinsen, Miet- und Wertentwicklung,
+    Leerstand und Instandhaltungsschocks über 10.000-100.000 Pfade.
+    Liefert P5/P50/P95-Bänder pro Jahr und die Wahrscheinlichkeit von negativem
+    Eigenkapital bzw. Cashflow unter der Schwelle.
+    """
+    try:
+        with span("monte_carlo"):
+            ergebnis = run_monte_carlo(**request.dict())
+    except MonteCarloError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return Response(content=json.dumps(ergebnis), media_type="application/json")
+
+
+@app.post("/loan-schedule")
+def loan_schedule(
+    request: LoanScheduleRequest,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Monatlich gerechneter Tilgungsplan (Zinsbindung + Anschlusszins oder Zinspfad,
+    Sondertilgung, tilgungsfreie Anlaufjahre), aggregiert auf Jahreszeilen wie der Tilgungsplan.
+    Alle Varianten werden in einem Durchlauf berechnet.
+    """
+    if not 1 <= request.jahre <= 50:
+        raise HTTPException(status_code=400, detail="jahre muss zwischen 1 und 50 liegen")
+    if request.zinspfad is not None and len(request.zinspfad) != request.jahre:
+        raise HTTPException(status_code=400, detail=f"zinspfad braucht genau {request.jahre} Werte (einen pro Jahr)")
+    varianten = request.varianten or [LoanVariant(name="Basis")]
+    if len(varianten) > LOAN_MAX_VARIANTEN:
+        raise HTTPException(status_code=400, detail=f"Maximal {LOAN_MAX_VARIANTEN} Varianten pro Anfrage")
+
+    def spalte(feld: str, standard: Any) -> list:
+        werte = [getattr(variante, feld) for variante in varianten]
+        return [standard if wert is None else wert for wert in werte]
+
+    # Sondertilgung fest oder als Plan mit einem Betrag pro Jahr → (Varianten, Jahre)
+    sondertilgung = []
+    for wert in spalte("sondertilgung", request.sondertilgung):
+        if isinstance(wert, list) and len(wert) != request.jahre:
+            raise HTTPException(status_code=400, detail=f"sondertilgung als Liste braucht genau {request.jahre} Werte (einen pro Jahr)")
+        plan = wert if isinstance(wert, list) else [wert] * request.jahre
+        if any(betrag < 0 for betrag in plan):
+            raise HTTPException(status_code=400, detail="sondertilgung darf nicht negativ sein")
+        sondertilgung.append(plan)
+    tilgungsfreie_jahre = spalte("tilgungsfreie_jahre", request.tilgungsfreie_jahre)
+    if any(jahre < 0 for jahre in tilgungsfreie_jahre):
+        raise HTTPException(status_code=400, detail="tilgungsfreie_jahre darf nicht negativ sein")
+
+    zinssaetze = spalte("zinssatz", request.zinssatz)
+    bindung = spalte("zinsbindung_jahre", request.zinsbindung_jahre)
+    with span("monatsplan"):
+        batch = monatsplan_batch(
+            kaufpreis=request.kaufpreis,
+            eigenkapital=spalte("eigenkapital", request.eigenkapital),
+            zinssatz=zinssaetze,
+            tilgung=spalte("tilgung", request.tilgung),
+            monatliche_miete=request.monatliche_miete,
+            nebenkosten=request.nebenkosten,
+            jahre=request.jahre,
+            mietsteigerung=request.mietsteigerung,
+            wertsteigerung=request.wertsteigerung,
+            zinsbindung_jahre=[np.inf if jahre is None else jahre for jahre in bindung],
+            anschlusszins=[
+                zins if anschluss is None else anschluss
+                for zins, anschluss in zip(zinssaetze, spalte("anschlusszins", request.anschlusszins))
+            ],
+            zinspfad=request.zinspfad,
+            sondertilgung=sondertilgung,
+            tilgungsfreie_jahre=tilgungsfreie_jahre
         )
-        db.add(db_analysis)
-        db.commit()
-        db.refresh(db_analysis)
+        plaene = monatsplan_views(batch)
 
-        return result
-        
-    except json.JSONDecodeError as e:
-        raise HTTPException(status_code=500, detail=f"Fehler beim Parsen der KI-Analyse: {str(e)}")
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Fehler bei der Analyse: {str(e)}")
+    return {
+        "varianten": [
+            {"name": variante.name or f"Variante {i + 1}", **plan}
+            for i, (variante, plan) in enumerate(zip(varianten, plaene))
+        ]
+    }
+
+
+@app.post("/library/{analysis_id}/recalculate", response_model=AnalysisResult)
+def recalculate_analysis(
+    analysis_id: int,
+    request: RecalculateRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Berechnet eine gespeicherte Analyse mit geänderter Finanzierung oder
+    anderem Verwendungszweck neu - OHNE neue Marktrecherche und OHNE KI-Call.
+
+    Wiederverwendet werden die gespeicherten KI-Kriterien-Scores und Marktdaten,
+    neu berechnet werden alle Finanz-Blöcke und der gewichtete Gesamtscore.
+    Die gespeicherte Analyse wird aktualisiert.
+    """
+    analysis = db.query(Analysis)\
+        .filter(Analysis.id == analysis_id, Analysis.user_id == current_user.id)\
+        .first()
+
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+
+    gespeichert = analysis.analysis_result or {}
+    if not gespeichert.get("kriterien"):
+        raise HTTPException(status_code=400, detail="Analyse enthält keine KI-Bewertung - bitte neu analysieren")
+
+    data = PropertyData(**analysis.property_data)
+    zweck = request.verwendungszweck or analysis.verwendungszweck
+    eigenkapital = request.eigenkapital if request.eigenkapital is not None else analysis.eigenkapital
+    zinssatz = request.zinssatz if request.zinssatz is not None else analysis.zinssatz
+    tilgung = request.tilgung if request.tilgung is not None else analysis.tilgung
+    marktdaten = gespeichert.get("marktdaten")
+
+    finanz = calculate_financial_blocks(
+        data=data,
+        zweck=zweck,
+        eigenkapital=eigenkapital,
+        zinssatz=zinssatz,
+        tilgung=tilgung,
+        marktdaten=marktdaten
+    )
+
+    result = build_analysis_result(
+        data=data,
+        zweck=zweck,
+        ai_analysis=ai_analysis_from_result(gespeichert),
+        marktdaten=marktdaten,
+        finanz=finanz,
+        no_go_check=check_no_gos(data),
+        warnsignale=detect_warning_signals(data)
+    )
+
+    analysis.analysis_result = result.dict()
+    analysis.verwendungszweck = zweck
+    analysis.eigenkapital = eigenkapital or 0
+    analysis.zinssatz = zinssatz or 3.75
+    analysis.tilgung = tilgung or 1.25
+    analysis.gesamtscore = result.gesamtscore
+    db.commit()
+
+    result.analysis_id = analysis.id
+    return result
 
 
 # ========================================
@@ -2328,30 +3002,13 @@ class ChatResponse(BaseModel):
     recherche_standort: Optional[str] = None
 
 
-@app.post("/chat", response_model=ChatResponse)
-async def chat_with_ai(
-    request: ChatRequest,
-    current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
-):
+async def build_chat_context(request: ChatRequest) -> tuple:
     """
-    V3.0 Chat-Endpoint mit Live-Marktdaten-Recherche
+    Recherchiert Live-Marktdaten (falls Standort bekannt) und baut den Chat-System-Prompt.
 
-    Die KI kann:
-    - Fragen zu Immobilien beantworten
-    - Live-Marktdaten für spezifische Standorte recherchieren
-    - Auf Basis von Analyse-Kontext antworten
+    Returns:
+        (chat_system, live_marktdaten, standort)
     """
-    # Prüfe Usage-Limit
-    if not check_usage_limit(db, current_user):
-        usage = get_user_total_usage(db, current_user.id)
-        raise HTTPException(
-            status_code=429,
-            detail=f"Nutzungslimit erreicht! Du hast ${usage['total_cost_usd']:.2f} von ${current_user.usage_limit_usd:.2f} verbraucht. Kontaktiere den Admin für mehr."
-        )
-
-    client = get_anthropic_client()
-
     # Prüfe ob eine Stadt/Standort in der Nachricht erwähnt wird
     # oder im Kontext vorhanden ist
     standort = request.stadt
@@ -2403,21 +3060,52 @@ Antworte auf Deutsch, präzise und hilfreich.
 Nutze Markdown für Formatierung (fett, Listen, etc.).
 Bei Preisfragen: IMMER konkrete Zahlen aus den Live-Daten!"""
 
-    try:
-        response = client.messages.create(
-            model="claude-sonnet-4-20250514",
-            max_tokens=1500,
-            system=chat_system,
-            messages=[{"role": "user", "content": request.message}]
+    return chat_system, live_marktdaten, standort
+
+
+@app.post("/chat", response_model=ChatResponse)
+async def chat_with_ai(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    V3.0 Chat-Endpoint mit Live-Marktdaten-Recherche
+
+    Die KI kann:
+    - Fragen zu Immobilien beantworten
+    - Live-Marktdaten für spezifische Standorte recherchieren
+    - Auf Basis von Analyse-Kontext antworten
+    """
+    # Prüfe Usage-Limit
+    if not check_usage_limit(db, current_user):
+        usage = get_user_total_usage(db, current_user.id)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Nutzungslimit erreicht! Du hast ${usage['total_cost_usd']:.2f} von ${current_user.usage_limit_usd:.2f} verbraucht. Kontaktiere den Admin für mehr."
         )
 
+    with span("chat_kontext"):
+        chat_system, live_marktdaten, standort = await build_chat_context(request)
+
+    try:
+        with span("llm_chat"):
+            response = await create_message(
+                model="claude-sonnet-4-20250514",
+                max_tokens=1500,
+                system=chat_system,
+                messages=[{"role": "user", "content": request.message}]
+            )
+
         # Log Usage
         log_usage(
             db=db,
             user_id=current_user.id,
             action_type="chat",
             input_tokens=response.usage.input_tokens,
-            output_tokens=response.usage.output_tokens
+            output_tokens=response.usage.output_tokens,
+            cache_creation_input_tokens=response.usage.cache_creation_input_tokens or 0,
+            cache_read_input_tokens=response.usage.cache_read_input_tokens or 0
         )
 
         return ChatResponse(
@@ -2432,6 +3120,93 @@ Bei Preisfragen: IMMER konkrete Zahlen aus den Live-Daten!"""
         raise HTTPException(status_code=500, detail=f"Chat-Fehler: {str(e)}")
 
 
+def _sse(event: str, data: dict) -> str:
+    """Formatiert ein Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/chat/stream")
+async def chat_with_ai_stream(
+    request: ChatRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Streaming-Variante von /chat (Server-Sent Events).
+
+    Events:
+    - meta:  {"marktdaten_verwendet", "recherche_standort"} vor dem ersten Text
+    - delta: {"text"} für jedes Textstück der Antwort
+    - done:  {"marktdaten_verwendet", "recherche_standort", "usage"} am Ende
+    - error: {"detail"} bei Fehlern während des Streams
+    """
+    # Prüfe Usage-Limit
+    if not check_usage_limit(db, current_user):
+        usage = get_user_total_usage(db, current_user.id)
+        raise HTTPException(
+            status_code=429,
+            detail=f"Nutzungslimit erreicht! Du hast ${usage['total_cost_usd']:.2f} von ${current_user.usage_limit_usd:.2f} verbraucht. Kontaktiere den Admin für mehr."
+        )
+
+    with span("chat_kontext"):
+        chat_system, live_marktdaten, standort = await build_chat_context(request)
+    meta = {"marktdaten_verwendet": live_marktdaten is not None, "recherche_standort": standort}
+    user_id = current_user.id
+
+    async def event_stream():
+        yield _sse("meta", meta)
+        try:
+            with span("llm_chat"):
+                async with stream_message(
+                    model="claude-sonnet-4-20250514",
+                    max_tokens=1500,
+                    system=chat_system,
+                    messages=[{"role": "user", "content": request.message}]
+                ) as stream:
+                    async for text in stream.text_stream:
+                        yield _sse("delta", {"text": text})
+                    final = await stream.get_final_message()
+        except Exception as e:
+            detail = e.detail if isinstance(e, HTTPException) else f"Chat-Fehler: {str(e)}"
+            yield _sse("error", {"detail": detail})
+            return
+
+        # Log Usage (eigene Session - die Request-Session ist beim Streamen schon geschlossen)
+        usage_db = SessionLocal()
+        try:
+            log_usage(
+                db=usage_db,
+                user_id=user_id,
+                action_type="chat",
+                input_tokens=final.usage.input_tokens,
+                output_tokens=final.usage.output_tokens,
+                cache_creation_input_tokens=final.usage.cache_creation_input_tokens or 0,
+                cache_read_input_tokens=final.usage.cache_read_input_tokens or 0
+            )
+        finally:
+            usage_db.close()
+
+        yield _sse("done", {
+            **meta,
+            "usage": {
+                "input_tokens": final.usage.input_tokens,
+                "output_tokens": final.usage.output_tokens
+            }
+        })
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Histogramme der Request- und Stufen-Dauern im Prometheus-Textformat"""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
+
 @app.api_route("/health", methods=["GET", "HEAD"])
 async def health_check():
     """Health Check Endpoint"""
@@ -2468,7 +3243,7 @@ async def make_first_admin(
 # ADMIN ENDPOINTS
 # ========================================
 
-from schemas import AdminUserResponse, AdminUserUpdate, AdminStatsResponse
+from schemas import AdminUserResponse, AdminUserUpdate, AdminStatsResponse, AdminKnowledgeResponse
 from datetime import datetime, timedelta
 
 async def get_admin_user(current_user: User = Depends(get_current_active_user)) -> User:
@@ -2509,10 +3284,21 @@ async def get_admin_stats(
         users_today=users_today,
         users_this_week=users_this_week,
         analyses_today=analyses_today,
-        analyses_this_week=analyses_this_week
+        analyses_this_week=analyses_this_week,
+        market_cache=get_market_cache_stats(),
+        analysis_cache=get_analysis_cache_stats(),
+        pdf_cache=get_pdf_cache_stats(),
+        rechenkontext=get_calc_context_stats(),
+        analysis_jobs=analysis_jobs.stats()
     )
 
 
+@app.get("/admin/knowledge", response_model=AdminKnowledgeResponse)
+async def get_admin_knowledge(admin: User = Depends(get_admin_user)):
+    """Geladene KNOWLEDGE.md Version (Hash, Größe) - lädt neu, falls die Datei geändert wurde"""
+    return get_knowledge_info()
+
+
 @app.get("/admin/users", response_model=List[AdminUserResponse])
 async def get_all_users(
     admin: User = Depends(get_admin_user),
@@ -0,0 +1,199 @@
+"""
+Zwei-stufiger Cache für Live-Marktdaten
+In-Process LRU vor der Tabelle market_data_cache.
+
+Ablauf pro Anfrage (stale-while-revalidate):
+- Eintrag jünger als TTL          → sofort zurückgeben (Hit)
+- Eintrag älter, aber im Stale-Fenster → sofort zurückgeben, im Hintergrund neu recherchieren
+- Kein/zu alter Eintrag           → neu recherchieren (Miss)
+
+Fallback-Ergebnisse (recherche_methode != "live_web_search_v3") werden nie gespeichert.
+
+Gleichzeitige Recherchen für denselben Schlüssel werden zusammengefasst
+(Single-Flight): nur der erste Aufrufer recherchiert, alle anderen warten
+auf dasselbe Ergebnis.
+
+Die Datenbank-Zugriffe (synchrones SQLAlchemy) laufen in einem Worker-Thread,
+damit sie den Event-Loop nicht blockieren.
+
+Konfiguration über Environment Variablen:
+- MARKET_CACHE_TTL_HOURS: Frische-Dauer in Stunden (default: 24)
+- MARKET_CACHE_STALE_HOURS: Zusätzliches Stale-Fenster in Stunden (default: 72)
+- MARKET_CACHE_SIZE: Max. Einträge im In-Process LRU (default: 256)
+"""
+
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, Optional
+import asyncio
+import copy
+import os
+import re
+
+from cache_utils import LRUCache, SingleFlight
+from database import SessionLocal
+from models import MarketDataCache
+
+MARKET_CACHE_TTL = timedelta(hours=float(os.getenv("MARKET_CACHE_TTL_HOURS", "24")))
+MARKET_CACHE_STALE = timedelta(hours=float(os.getenv("MARKET_CACHE_STALE_HOURS", "72")))
+MARKET_CACHE_SIZE = int(os.getenv("MARKET_CACHE_SIZE", "256"))
+
+LIVE_METHODE = "live_web_search_v3"
+
+# Gleichbedeutende Objekttypen auf einen Schlüssel abbilden
+OBJEKTTYP_SYNONYME = {
+    "etw": "eigentumswohnung",
+    "wohnung": "eigentumswohnung",
+    "efh": "einfamilienhaus",
+    "mfh": "mehrfamilienhaus",
+}
+
+_lru = LRUCache(MARKET_CACHE_SIZE)
+_flights = SingleFlight()
+_refresh_tasks = set()  # Referenzen auf laufende Hintergrund-Tasks
+_stats = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "nicht_gecacht": 0}
+
+
+def _normalize(value: Optional[str]) -> str:
+    """Kleinschreibung, Umlaute ausschreiben, Satzzeichen und doppelte Leerzeichen entfernen"""
+    if not value:
+        return ""
+    value = value.lower().strip()
+    for umlaut, ersatz in (("ä", "ae"), ("ö", "oe"), ("ü", "ue"), ("ß", "ss")):
+        value = value.replace(umlaut, ersatz)
+    value = re.sub(r"[^\w\s-]", " ", value)
+    return re.sub(r"[\s_-]+", " ", value).strip()
+
+
+def market_cache_key(stadt: str, stadtteil: Optional[str], objekttyp: str) -> str:
+    """Normalisierter Cache-Schlüssel für Standort + Objekttyp"""
+    typ = _normalize(objekttyp) or "eigentumswohnung"
+    typ = OBJEKTTYP_SYNONYME.get(typ, typ)
+    return f"{_normalize(stadt)}|{_normalize(stadtteil)}|{typ}"
+
+
+def _load_from_db(key: str) -> Optional[Dict[str, Any]]:
+    """Liest einen Eintrag aus der Datenbank (None bei Fehler oder nicht vorhanden)"""
+    db = SessionLocal()
+    try:
+        row = db.query(MarketDataCache).filter(MarketDataCache.cache_key == key).first()
+        if row:
+            return {"data": row.market_data, "fetched_at": row.fetched_at}
+    except Exception as e:
+        print(f"Marktdaten-Cache: DB-Lesen fehlgeschlagen: {e}")
+    finally:
+        db.close()
+    return None
+
+
+def _store_in_db(key: str, stadt: str, stadtteil: Optional[str], objekttyp: str, entry: Dict[str, Any]):
+    """Schreibt/aktualisiert einen Eintrag in der Datenbank"""
+    db = SessionLocal()
+    try:
+        row = db.query(MarketDataCache).filter(MarketDataCache.cache_key == key).first()
+        if row is None:
+            row = MarketDataCache(cache_key=key, stadt=stadt, stadtteil=stadtteil, objekttyp=objekttyp)
+            db.add(row)
+        row.market_data = entry["data"]
+        row.fetched_at = entry["fetched_at"]
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"Marktdaten-Cache: DB-Schreiben fehlgeschlagen: {e}")
+    finally:
+        db.close()
+
+
+async def _get_entry(key: str) -> Optional[Dict[str, Any]]:
+    """Sucht zuerst im LRU, dann in der Datenbank"""
+    entry = _lru.get(key)
+    if entry is None:
+        entry = await asyncio.to_thread(_load_from_db, key)
+        if entry is not None:
+            _lru.set(key, entry)
+    return entry
+
+
+async def _research_and_store(
+    key: str,
+    stadt: str,
+    stadtteil: Optional[str],
+    objekttyp: str,
+    research: Callable[[str, Optional[str], str], Awaitable[dict]]
+) -> dict:
+    """
+    Recherchiert neu und speichert nur erfolgreiche Live-Ergebnisse.
+    Läuft für denselben Schlüssel höchstens einmal gleichzeitig.
+    """
+    async def run():
+        data = await research(stadt, stadtteil, objekttyp)
+        if data and data.get("recherche_methode") == LIVE_METHODE:
+            entry = {"data": data, "fetched_at": datetime.utcnow()}
+            _lru.set(key, entry)
+            await asyncio.to_thread(_store_in_db, key, stadt, stadtteil, objekttyp, entry)
+        else:
+            _stats["nicht_gecacht"] += 1
+        return data
+
+    # Jeder Wartende bekommt eine eigene Kopie
+    return copy.deepcopy(await _flights.do(key, run))
+
+
+def _schedule_refresh(key: str, stadt: str, stadtteil: Optional[str], objekttyp: str, research):
+    """Startet eine Hintergrund-Recherche für einen veralteten Eintrag (max. eine pro Schlüssel)"""
+    if _flights.in_flight(key):
+        return
+    _stats["refreshes"] += 1
+
+    async def refresh():
+        try:
+            await _research_and_store(key, stadt, stadtteil, objekttyp, research)
+        except Exception as e:
+            print(f"Marktdaten-Cache: Hintergrund-Aktualisierung für {key} fehlgeschlagen: {e}")
+
+    task = asyncio.create_task(refresh())
+    _refresh_tasks.add(task)
+    task.add_done_callback(_refresh_tasks.discard)
+
+
+async def get_cached_market_data(
+    stadt: str,
+    stadtteil: Optional[str],
+    objekttyp: str,
+    research: Callable[[str, Optional[str], str], Awaitable[dict]]
+) -> dict:
+    """
+    Gibt Marktdaten aus dem Cache zurück oder recherchiert sie über research().
+
+    Args:
+        stadt, stadtteil, objekttyp: Standort und Objekttyp
+        research: Ungecachte Recherche-Funktion (z.B. research_live_market_data)
+    """
+    key = market_cache_key(stadt, stadtteil, objekttyp)
+    entry = await _get_entry(key)
+
+    if entry is not None:
+        alter = datetime.utcnow() - entry["fetched_at"]
+        if alter < MARKET_CACHE_TTL:
+            _stats["hits"] += 1
+            return copy.deepcopy(entry["data"])
+        if alter < MARKET_CACHE_TTL + MARKET_CACHE_STALE:
+            _stats["stale_hits"] += 1
+            _schedule_refresh(key, stadt, stadtteil, objekttyp, research)
+            return copy.deepcopy(entry["data"])
+
+    _stats["misses"] += 1
+    return await _research_and_store(key, stadt, stadtteil, objekttyp, research)
+
+
+def get_market_cache_stats() -> Dict[str, Any]:
+    """Hit/Miss-Zähler für die Admin-Statistik (pro Prozess)"""
+    anfragen = _stats["hits"] + _stats["stale_hits"] + _stats["misses"]
+    return {
+        **_stats,
+        "recherchen_zusammengefasst": _flights.stats["zusammengefasst"],
+        "anfragen": anfragen,
+        "hit_rate": round((_stats["hits"] + _stats["stale_hits"]) / anfragen, 3) if anfragen else None,
+        "lru_eintraege": len(_lru),
+        "ttl_stunden": MARKET_CACHE_TTL.total_seconds() / 3600,
+        "stale_stunden": MARKET_CACHE_STALE.total_seconds() / 3600,
+    }
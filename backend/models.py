@@ -71,6 +71,9 @@ class Analysis(Base):
     stadtteil = Column(String, nullable=True)
     gesamtscore = Column(Float, nullable=True)
 
+    # Schlüssel der KI-Bewertung (Hash aus Objektdaten, Zweck, Marktdaten, Wissensstand)
+    ai_cache_key = Column(String, nullable=True, index=True)
+
     # Relationship
     owner = relationship("User", back_populates="analyses")
 
@@ -89,9 +92,62 @@ class UsageLog(Base):
     # Token-Verbrauch
     input_tokens = Column(Integer, default=0)
     output_tokens = Column(Integer, default=0)
+    cache_creation_input_tokens = Column(Integer, default=0)  # Prompt-Cache schreiben
+    cache_read_input_tokens = Column(Integer, default=0)      # Prompt-Cache lesen
 
     # Kosten (berechnet)
     cost_usd = Column(Float, default=0.0)
 
     # Relationship
     user = relationship("User", back_populates="usage_logs")
+
+
+class MarketDataCache(Base):
+    """Gecachte Live-Marktdaten pro Standort und Objekttyp"""
+    __tablename__ = "market_data_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String, unique=True, index=True, nullable=False)  # normalisiert: stadt|stadtteil|objekttyp
+    stadt = Column(String, nullable=False)
+    stadtteil = Column(String, nullable=True)
+    objekttyp = Column(String, nullable=False)
+
+    # Ergebnis von fetch_live_market_data (nur erfolgreiche Live-Recherchen)
+    market_data = Column(JSON, nullable=False)
+
+    fetched_at = Column(DateTime, default=datetime.utcnow)
+
+
+class PdfExtractionCache(Base):
+    """Gecachte PDF-Extraktionen, Schlüssel = SHA-256 der PDF-Bytes"""
+    __tablename__ = "pdf_extraction_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), unique=True, index=True, nullable=False)
+    groesse_bytes = Column(Integer, nullable=True)
+
+    # Extrahierte PropertyData (als JSON)
+    property_data = Column(JSON, nullable=False)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    hits = Column(Integer, default=0)
+
+
+class AnalysisJob(Base):
+    """Analyse-Jobs der Hintergrund-Warteschlange (nur bei ANALYSIS_JOB_STORE=db)"""
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String(32), primary_key=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False, index=True)
+    status = Column(String, default="queued", index=True)  # queued, running, done, failed
+
+    # AnalysisRequest (als JSON)
+    request = Column(JSON, nullable=False)
+
+    # Ergebnis: gespeicherte Analyse oder Fehlermeldung
+    analysis_id = Column(Integer, ForeignKey("analyses.id"), nullable=True)
+    fehler = Column(Text, nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
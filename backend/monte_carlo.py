@@ -0,0 +1,255 @@
+"""
+Monte-Carlo-Risikosimulation für Cashflow, Restschuld und Vermögen
+Statt drei fest gewählter Szenarien (generate_scenarios) werden 10.000-100.000
+zufällige Pfade über die Laufzeit simuliert - Jahr für Jahr, vektorisiert über alle Pfade:
+
+- Anschlusszins: nach jeder Zinsbindung springt der Zins zufällig (Normalverteilung,
+  mindestens MIN_ZINS); die Rate wird auf Restschuld * (Zins + Tilgung) neu festgesetzt
+- Mietsteigerung und Wertsteigerung: jedes Jahr neu gezogen (Normalverteilung)
+- Leerstand: bei Mieterwechsel 1 bis leerstand_max_monate Monate ohne Miete
+- Instandhaltungsschocks: mit kleiner Wahrscheinlichkeit pro Jahr Kosten in % des Immobilienwerts
+
+Ergebnis: Perzentil-Bänder (P5/P50/P95) pro Jahr und Risiko-Kennzahlen
+(negatives Eigenkapital, Cashflow unter Schwelle). Mit seed reproduzierbar.
+Zufallszahlen und Perzentile werden Jahr für Jahr berechnet - run_monte_carlo hält nie
+mehr als ein Jahr aller Pfade im Speicher.
+
+Konfiguration über Environment Variablen:
+- MONTE_CARLO_MAX_PFADE: Max. Pfade pro Anfrage (default: 100000)
+- MONTE_CARLO_MAX_ZELLEN: Max. Jahre x Pfade pro Anfrage (default: 3000000)
+"""
+
+from typing import Any, Dict, Iterator, Optional
+import math
+import os
+
+import numpy as np
+
+MONTE_CARLO_MAX_PFADE = int(os.getenv("MONTE_CARLO_MAX_PFADE", "100000"))
+MONTE_CARLO_MAX_ZELLEN = int(os.getenv("MONTE_CARLO_MAX_ZELLEN", "3000000"))
+
+# Untergrenze für Anschlusszinsen (wie bei den Zins-Variationen der Szenarien)
+MIN_ZINS = 0.5
+
+PERZENTILE = (5, 50, 95)
+
+# Standard-Annahmen - Erwartungswerte entsprechen dem Szenario "Realistisch"
+STANDARD_ANNAHMEN = {
+    "zinsbindung_jahre": 10,           # Anschlusszins alle n Jahre
+    "zins_aenderung": 0.0,             # Erwartete Zinsänderung pro Anschluss (Prozentpunkte)
+    "zins_volatilitaet": 1.0,          # Standardabweichung pro Anschluss (Prozentpunkte)
+    "mietsteigerung": 1.5,             # % p.a.
+    "mietsteigerung_volatilitaet": 1.0,
+    "wertsteigerung": 1.5,             # % p.a.
+    "wertsteigerung_volatilitaet": 3.0,
+    "mieterwechsel_quote": 0.1,        # Wahrscheinlichkeit pro Jahr
+    "leerstand_max_monate": 4,         # Leerstand bei Wechsel: 1 bis n Monate (im Mittel ~2% der Miete)
+    "instandhaltung_quote": 0.05,      # Wahrscheinlichkeit eines Schocks pro Jahr
+    "instandhaltung_min_prozent": 1.0, # Kosten in % des aktuellen Immobilienwerts
+    "instandhaltung_max_prozent": 4.0,
+}
+
+# Kennzahlen mit Perzentil-Bändern (pro Jahr über alle Pfade)
+BAND_FELDER = ("jaehrlicher_cashflow", "kumulierter_cashflow", "restschuld", "immobilienwert", "gesamtvermoegen")
+
+
+class MonteCarloError(ValueError):
+    """Ungültige Simulations-Parameter"""
+
+
+def _annahmen(annahmen: Optional[Dict[str, float]]) -> Dict[str, float]:
+    """Standard-Annahmen mit Overrides (unbekannte Schlüssel sind ein Fehler)"""
+    unbekannt = set(annahmen or {}) - set(STANDARD_ANNAHMEN)
+    if unbekannt:
+        raise MonteCarloError(f"Unbekannte Annahmen: {', '.join(sorted(unbekannt))}")
+    werte = {**STANDARD_ANNAHMEN, **(annahmen or {})}
+    nicht_endlich = [name for name, wert in werte.items() if not math.isfinite(wert)]
+    if nicht_endlich:
+        raise MonteCarloError(f"Annahmen müssen endliche Zahlen sein: {', '.join(nicht_endlich)}")
+    if werte["zinsbindung_jahre"] < 1:
+        raise MonteCarloError("zinsbindung_jahre muss mindestens 1 sein")
+    if not 1 <= werte["leerstand_max_monate"] <= 12:
+        raise MonteCarloError("leerstand_max_monate muss zwischen 1 und 12 liegen")
+    for name in ("zins_volatilitaet", "mietsteigerung_volatilitaet", "wertsteigerung_volatilitaet"):
+        if werte[name] < 0:
+            raise MonteCarloError(f"{name} darf nicht negativ sein")
+    for name in ("mieterwechsel_quote", "instandhaltung_quote"):
+        if not 0 <= werte[name] <= 1:
+            raise MonteCarloError(f"{name} muss zwischen 0 und 1 liegen (Wahrscheinlichkeit pro Jahr)")
+    for name in ("mietsteigerung", "wertsteigerung"):
+        if werte[name] <= -100:
+            raise MonteCarloError(f"{name} muss größer als -100 % sein")
+    if werte["instandhaltung_min_prozent"] < 0:
+        raise MonteCarloError("instandhaltung_min_prozent darf nicht negativ sein")
+    if werte["instandhaltung_min_prozent"] > werte["instandhaltung_max_prozent"]:
+        raise MonteCarloError("instandhaltung_min_prozent darf nicht größer als instandhaltung_max_prozent sein")
+    return werte
+
+
+def _pruefen(jahre: int, pfade: int, seed: Optional[int]) -> None:
+    """Grenzen für Jahre, Pfade, Rechenaufwand (Jahre x Pfade) und seed"""
+    if seed is not None and seed < 0:
+        raise MonteCarloError("seed darf nicht negativ sein")
+    if not 1 <= pfade <= MONTE_CARLO_MAX_PFADE:
+        raise MonteCarloError(f"pfade muss zwischen 1 und {MONTE_CARLO_MAX_PFADE} liegen")
+    if not 1 <= jahre <= 60:
+        raise MonteCarloError("jahre muss zwischen 1 und 60 liegen")
+    if jahre * pfade > MONTE_CARLO_MAX_ZELLEN:
+        raise MonteCarloError(
+            f"jahre x pfade zu groß: {jahre * pfade} (max. {MONTE_CARLO_MAX_ZELLEN}) - weniger Pfade oder Jahre wählen"
+        )
+
+
+def _jahres_pfade(
+    kaufpreis: float,
+    monatliche_miete: float,
+    nebenkosten: float,
+    eigenkapital: float,
+    zinssatz: float,
+    tilgung: float,
+    jahre: int,
+    pfade: int,
+    seed: Optional[int],
+    annahmen: Dict[str, float]
+) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Simuliert alle Pfade Jahr für Jahr (vektorisiert über die Pfade).
+    Die Zufallszahlen werden pro Jahr gezogen; geliefert wird pro Jahr ein Dict mit
+    Arrays (Pfade,) für BAND_FELDER und zinssatz.
+    """
+    a = annahmen
+    rng = np.random.default_rng(seed)
+    bindung = int(a["zinsbindung_jahre"])
+
+    rest = np.full(pfade, float(kaufpreis - eigenkapital))
+    zins = np.full(pfade, float(zinssatz))
+    jaehrliche_rate = rest * ((zins + tilgung) / 100)
+    miete = np.full(pfade, float(monatliche_miete))
+    immobilienwert = np.full(pfade, float(kaufpreis))
+    kumuliert = np.zeros(pfade)
+
+    for jahr in range(jahre):
+        if jahr and jahr % bindung == 0:
+            # Anschlussfinanzierung: neuer Zins, Rate auf Basis der Restschuld
+            zins = np.maximum(MIN_ZINS, zins + rng.normal(a["zins_aenderung"], a["zins_volatilitaet"], pfade))
+            jaehrliche_rate = rest * ((zins + tilgung) / 100)
+        if jahr:
+            miete = miete * (1 + rng.normal(a["mietsteigerung"], a["mietsteigerung_volatilitaet"], pfade) / 100)
+            immobilienwert = immobilienwert * (
+                1 + rng.normal(a["wertsteigerung"], a["wertsteigerung_volatilitaet"], pfade) / 100
+            )
+        leerstand_monate = np.where(
+            rng.random(pfade) < a["mieterwechsel_quote"],
+            rng.integers(1, int(a["leerstand_max_monate"]) + 1, pfade),
+            0
+        )
+        schock_prozent = np.where(
+            rng.random(pfade) < a["instandhaltung_quote"],
+            rng.uniform(a["instandhaltung_min_prozent"], a["instandhaltung_max_prozent"], pfade),
+            0.0
+        )
+
+        zinsen = rest * (zins / 100)
+        getilgt = np.minimum(jaehrliche_rate - zinsen, rest)
+        # Nach vollständiger Tilgung fällt die Rate weg
+        zahlung = zinsen + getilgt
+        rest = np.maximum(0.0, rest - getilgt)
+
+        cashflow = (
+            miete * (12 - leerstand_monate)
+            - zahlung
+            - nebenkosten * 12
+            - immobilienwert * (schock_prozent / 100)
+        )
+        kumuliert = kumuliert + cashflow
+
+        yield {
+            "zinssatz": zins,
+            "jaehrlicher_cashflow": cashflow,
+            "kumulierter_cashflow": kumuliert,
+            "restschuld": rest,
+            "immobilienwert": immobilienwert,
+            "gesamtvermoegen": immobilienwert - rest,
+        }
+
+
+def _runden(werte: np.ndarray) -> list:
+    return np.round(werte, 2).tolist()
+
+
+def run_monte_carlo(
+    kaufpreis: float,
+    monatliche_miete: float,
+    nebenkosten: float,
+    eigenkapital: float,
+    zinssatz: float,
+    tilgung: float,
+    jahre: int = 30,
+    pfade: int = 10000,
+    seed: Optional[int] = None,
+    cashflow_schwelle: float = 0.0,
+    annahmen: Optional[Dict[str, float]] = None
+) -> Dict[str, Any]:
+    """
+    Monte-Carlo-Simulation mit zusammengefasstem Ergebnis.
+
+    Args:
+        kaufpreis, monatliche_miete, nebenkosten, eigenkapital, zinssatz, tilgung: wie calculate_cashflow
+        jahre: Simulationszeitraum
+        pfade: Anzahl simulierter Pfade
+        seed: Startwert des Zufallsgenerators (gleicher seed = gleiches Ergebnis)
+        cashflow_schwelle: Schwelle für den monatlichen Cashflow (z.B. 0 = selbsttragend)
+        annahmen: Overrides für STANDARD_ANNAHMEN
+
+    Returns:
+        Dict mit "baender" (pro Feld p5/p50/p95 je Jahr), "risiko" (Wahrscheinlichkeiten),
+        "endwerte" (Perzentile im letzten Jahr) und den verwendeten Annahmen
+    """
+    _pruefen(jahre, pfade, seed)
+    a = _annahmen(annahmen)
+
+    # Perzentile und Risiko-Zähler pro Jahr - es liegt immer nur ein Jahr aller Pfade im Speicher
+    perzentile = {feld: [] for feld in BAND_FELDER + ("zinssatz",)}
+    negatives_ek_jemals = np.zeros(pfade, dtype=bool)
+    immer_unter_schwelle = np.ones(pfade, dtype=bool)
+    negatives_ek_pro_jahr, unter_schwelle_pro_jahr = [], []
+    for werte in _jahres_pfade(
+        kaufpreis, monatliche_miete, nebenkosten, eigenkapital, zinssatz, tilgung,
+        jahre, pfade, seed, a
+    ):
+        for feld, liste in perzentile.items():
+            liste.append(np.percentile(werte[feld], PERZENTILE))
+        negatives_ek = werte["immobilienwert"] < werte["restschuld"]
+        unter_schwelle = werte["jaehrlicher_cashflow"] / 12 < cashflow_schwelle
+        negatives_ek_jemals |= negatives_ek
+        immer_unter_schwelle &= unter_schwelle
+        negatives_ek_pro_jahr.append(negatives_ek.mean())
+        unter_schwelle_pro_jahr.append(unter_schwelle.mean())
+    durchschnitt_monatlich = werte["kumulierter_cashflow"] / (12 * jahre)
+
+    baender = {}
+    for feld, liste in perzentile.items():
+        baender[feld] = {f"p{p}": _runden(zeile) for p, zeile in zip(PERZENTILE, np.array(liste).T)}
+
+    return {
+        "pfade": pfade,
+        "jahre": jahre,
+        "seed": seed,
+        "perzentile": list(PERZENTILE),
+        "baender": baender,
+        "endwerte": {
+            feld: {f"p{p}": wert for p, wert in zip(PERZENTILE, _runden(perzentile[feld][-1]))}
+            for feld in ("kumulierter_cashflow", "restschuld", "gesamtvermoegen")
+        },
+        "risiko": {
+            "cashflow_schwelle": cashflow_schwelle,
+            # Anteil der Pfade, in denen die Immobilie mindestens einmal weniger wert ist als die Restschuld
+            "negatives_eigenkapital": round(float(negatives_ek_jemals.mean()), 4),
+            "negatives_eigenkapital_pro_jahr": np.round(negatives_ek_pro_jahr, 4).tolist(),
+            # Cashflow unter der Schwelle: in jedem Jahr, im Durchschnitt über die Laufzeit, pro Jahr
+            "cashflow_dauerhaft_unter_schwelle": round(float(immer_unter_schwelle.mean()), 4),
+            "cashflow_durchschnitt_unter_schwelle": round(float((durchschnitt_monatlich < cashflow_schwelle).mean()), 4),
+            "cashflow_unter_schwelle_pro_jahr": np.round(unter_schwelle_pro_jahr, 4).tolist(),
+        },
+        "annahmen": a,
+    }
@@ -0,0 +1,245 @@
+"""
+Monatlicher Tilgungsplan mit Zinsbindung, Sondertilgung und tilgungsfreien Anlaufjahren
+Deutsche Annuitätendarlehen werden monatlich bedient: Monatsrate = Darlehen * (Zins + Tilgung) / 1200,
+Zinsen fallen monatlich auf die Restschuld an. Berechnet werden viele Varianten gleichzeitig
+(eine Spalte pro Variante), aggregiert auf Jahreszeilen im Format von calculate_tilgungsplan
+(YearlyProjection).
+
+Regeln:
+- Zinsbindung: bis Jahr zinsbindung_jahre gilt zinssatz, danach anschlusszins
+  (oder ein Zinspfad mit einem Zinssatz pro Jahr)
+- Ändert sich der Zins, wird die Rate neu festgesetzt: Restschuld * (neuer Zins + Tilgung) / 1200
+  (Anschlussfinanzierung mit gleicher anfänglicher Tilgung)
+- Tilgungsfreie Anlaufjahre: nur Zinsen, danach Rate auf Basis der (unveränderten) Restschuld
+- Sondertilgung: Betrag pro Jahr (fest oder als Plan je Jahr), gezahlt am Jahresende;
+  die Rate bleibt gleich, die Laufzeit sinkt
+- Der Cashflow enthält Zins und reguläre Tilgung, Sondertilgungen kommen aus eigenen Mitteln
+  und werden separat ausgewiesen
+
+Konfiguration über Environment Variablen:
+- LOAN_MAX_VARIANTEN: Max. Varianten pro Anfrage an /loan-schedule (default: 1000)
+"""
+
+from typing import Any, Dict, List, Optional
+import os
+
+import numpy as np
+
+from amortization import JAHRES_FELDER, PLAN_FELDER, plan_dict
+
+LOAN_MAX_VARIANTEN = int(os.getenv("LOAN_MAX_VARIANTEN", "1000"))
+
+# Zusätzliche Spalten pro Jahr (Form: Varianten x Jahre)
+ZUSATZ_FELDER = ("zinssatz", "monatliche_rate", "sondertilgung_jahr")
+
+
+def monatsplan_batch(
+    kaufpreis,
+    eigenkapital,
+    zinssatz,
+    tilgung,
+    monatliche_miete,
+    nebenkosten,
+    jahre: int = 30,
+    mietsteigerung=1.5,
+    wertsteigerung=1.5,
+    zinsbindung_jahre=None,
+    anschlusszins=None,
+    zinspfad=None,
+    sondertilgung=0.0,
+    tilgungsfreie_jahre=0,
+    monatswerte: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Berechnet beliebig viele monatliche Tilgungspläne auf einmal.
+    Skalare Parameter dürfen Skalare oder 1D-Arrays gleicher Länge sein (eine Variante pro Eintrag).
+
+    Args:
+        kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten,
+        mietsteigerung, wertsteigerung: wie calculate_tilgungsplan
+        jahre: Laufzeit in Jahren (für alle Varianten gleich)
+        zinsbindung_jahre: Jahre mit zinssatz (None = gesamte Laufzeit)
+        anschlusszins: Zinssatz nach der Zinsbindung in % (None = zinssatz)
+        zinspfad: Zinssatz pro Jahr, Form (jahre,) oder (Varianten, jahre) - ersetzt Zinsbindung/Anschlusszins
+        sondertilgung: Sondertilgung in EUR pro Jahr, Skalar, (Varianten,) oder (Varianten, jahre)
+        tilgungsfreie_jahre: Anlaufjahre, in denen nur Zinsen gezahlt werden
+        monatswerte: True = zusätzlich restschuld_monatlich (Varianten x Monate)
+
+    Returns:
+        Dict mit Arrays (Varianten x Jahre) für JAHRES_FELDER und ZUSATZ_FELDER, Arrays (Varianten,)
+        für PLAN_FELDER sowie gesamte_sondertilgung, abbezahlt_nach_monaten (NaN = nicht abbezahlt).
+        jaehrliche_rate ist die erste Annuitätenrate x 12 - bei tilgungsfreien Jahren die Rate danach
+    """
+    (kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten,
+     mietsteigerung, wertsteigerung, tilgungsfreie_jahre) = (
+        np.atleast_1d(np.asarray(wert, dtype=float)) for wert in np.broadcast_arrays(
+            kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten,
+            mietsteigerung, wertsteigerung, tilgungsfreie_jahre
+        )
+    )
+    anzahl = kaufpreis.shape[0]
+    form = (jahre, anzahl)
+    if np.any(np.asarray(sondertilgung) < 0) or np.any(tilgungsfreie_jahre < 0):
+        raise ValueError("sondertilgung und tilgungsfreie_jahre dürfen nicht negativ sein")  # intern Jahre x Varianten, nach außen Varianten x Jahre
+
+    # Zins pro Jahr und Variante
+    if zinspfad is not None:
+        zins_jahre = np.broadcast_to(np.asarray(zinspfad, dtype=float).T, form) if np.ndim(zinspfad) > 1 \
+            else np.broadcast_to(np.asarray(zinspfad, dtype=float)[:, None], form)
+    else:
+        bindung = np.inf if zinsbindung_jahre is None else np.asarray(zinsbindung_jahre, dtype=float)
+        anschluss = zinssatz if anschlusszins is None else np.asarray(anschlusszins, dtype=float)
+        zins_jahre = np.where(np.arange(jahre)[:, None] < bindung, zinssatz, anschluss)
+    zins_jahre = np.broadcast_to(zins_jahre, form)
+
+    sondertilgung = np.asarray(sondertilgung, dtype=float)
+    sonder_jahre = np.broadcast_to(sondertilgung.T if sondertilgung.ndim > 1 else sondertilgung, form)
+
+    finanzierungssumme = kaufpreis - eigenkapital
+    rest = np.maximum(0.0, finanzierungssumme)
+    rate = np.zeros(anzahl)
+    abbezahlt_monat = np.full(anzahl, np.nan)
+
+    restschuld, getilgt_kumuliert, zinsen, tilgung_jahr, sonder, zahlungen, zins_prozent, raten, miete, immobilienwert = (
+        np.empty(form) for _ in range(10)
+    )
+    restschuld_monatlich = np.empty((jahre * 12, anzahl)) if monatswerte else None
+    miet_faktor = 1 + mietsteigerung / 100
+    wert_faktor = 1 + wertsteigerung / 100
+    getilgt_gesamt = np.zeros(anzahl)
+    gesamte_zinsen = np.zeros(anzahl)
+    gesamte_sondertilgung = np.zeros(anzahl)
+    # Erste Annuitätenrate (nach den tilgungsfreien Jahren) - die Zinsrate der Anlaufjahre
+    # steht nur in den Jahreszeilen
+    anfangsrate = np.full(anzahl, np.nan)
+
+    # Jahre x 12 Monate - jeder Monat hängt vom Vormonat ab, vektorisiert über die Varianten
+    for jahr in range(jahre):
+        zins = zins_jahre[jahr]
+        tilgungsfrei = jahr < tilgungsfreie_jahre
+        # Rate neu festsetzen: Tilgungsbeginn oder Zinsänderung
+        neu = (jahr == tilgungsfreie_jahre) | ((jahr > tilgungsfreie_jahre) & (zins != zins_jahre[jahr - 1]))
+        if jahr == 0:
+            neu = np.ones(anzahl, dtype=bool)
+        annuitaet = rest * ((zins + tilgung) / 1200)
+        rate = np.where(tilgungsfrei, rest * (zins / 1200), np.where(neu, annuitaet, rate))
+        np.copyto(anfangsrate, rate, where=np.isnan(anfangsrate) & ~tilgungsfrei)
+
+        zins_monat = zins / 1200
+        zinsen_summe = np.zeros(anzahl)
+        tilgung_summe = np.zeros(anzahl)
+        for monat in range(12):
+            zinsen_monat = rest * zins_monat
+            getilgt = np.where(tilgungsfrei, 0.0, np.clip(rate - zinsen_monat, 0.0, rest))
+            rest = rest - getilgt
+            zinsen_summe += zinsen_monat
+            tilgung_summe += getilgt
+            index = jahr * 12 + monat
+            np.copyto(abbezahlt_monat, index + 1, where=np.isnan(abbezahlt_monat) & (rest <= 0) & (finanzierungssumme > 0))
+            if monatswerte:
+                restschuld_monatlich[index] = rest
+
+        # Sondertilgung am Jahresende (höchstens die Restschuld)
+        sonder_jahr = np.minimum(sonder_jahre[jahr], rest)
+        rest = rest - sonder_jahr
+        np.copyto(abbezahlt_monat, (jahr + 1) * 12, where=np.isnan(abbezahlt_monat) & (rest <= 0) & (finanzierungssumme > 0))
+        if monatswerte:
+            restschuld_monatlich[jahr * 12 + 11] = rest
+
+        getilgt_gesamt = getilgt_gesamt + tilgung_summe + sonder_jahr
+        gesamte_zinsen = gesamte_zinsen + zinsen_summe
+        gesamte_sondertilgung = gesamte_sondertilgung + sonder_jahr
+
+        restschuld[jahr] = rest
+        getilgt_kumuliert[jahr] = getilgt_gesamt
+        zinsen[jahr] = zinsen_summe
+        tilgung_jahr[jahr] = tilgung_summe + sonder_jahr
+        sonder[jahr] = sonder_jahr
+        zahlungen[jahr] = zinsen_summe + tilgung_summe
+        zins_prozent[jahr] = zins
+        raten[jahr] = np.where(rest > 0, rate, 0.0)
+        if jahr == 0:
+            miete[0] = monatliche_miete
+            immobilienwert[0] = kaufpreis
+        else:
+            np.multiply(miete[jahr - 1], miet_faktor, out=miete[jahr])
+            np.multiply(immobilienwert[jahr - 1], wert_faktor, out=immobilienwert[jahr])
+
+    # Tilgung beginnt erst nach der Laufzeit: Rate, die danach fällig würde
+    if jahre:
+        np.copyto(anfangsrate, rest * ((zins_jahre[-1] + tilgung) / 1200), where=np.isnan(anfangsrate))
+    else:
+        anfangsrate = finanzierungssumme * ((zinssatz + tilgung) / 1200)
+
+    jaehrlicher_cashflow = (miete * 12) - zahlungen - (nebenkosten * 12)
+
+    jahres_werte = {
+        "restschuld": restschuld,
+        "getilgt": getilgt_kumuliert,
+        "zinsen_jahr": zinsen,
+        "tilgung_jahr": tilgung_jahr,
+        "jaehrlicher_cashflow": jaehrlicher_cashflow,
+        "monatlicher_cashflow": jaehrlicher_cashflow / 12,
+        "immobilienwert": immobilienwert,
+        "eigenkapital_aufbau": eigenkapital + getilgt_kumuliert,
+        "gesamtvermoegen": immobilienwert - restschuld,
+        "aktuelle_miete": miete,
+        "zinssatz": zins_prozent,
+        "monatliche_rate": raten,
+        "sondertilgung_jahr": sonder,
+    }
+    ergebnis = {
+        **{feld: werte.T for feld, werte in jahres_werte.items()},
+        "finanzierungssumme": finanzierungssumme,
+        "eigenkapital": eigenkapital,
+        "kaufpreis": kaufpreis,
+        "jaehrliche_rate": anfangsrate * 12,
+        "gesamte_zinsen": gesamte_zinsen,
+        "gesamte_tilgung": getilgt_gesamt,
+        "gesamte_sondertilgung": gesamte_sondertilgung,
+        "restschuld_ende": rest,
+        "abbezahlt_nach_monaten": abbezahlt_monat,
+        "zinsbindung_jahre": np.broadcast_to(
+            np.nan if zinspfad is not None or zinsbindung_jahre is None else np.asarray(zinsbindung_jahre, dtype=float),
+            (anzahl,)
+        ),
+    }
+    if monatswerte:
+        ergebnis["restschuld_monatlich"] = restschuld_monatlich.T
+    return ergebnis
+
+
+def monatsplan_view(batch: Dict[str, np.ndarray], index: int = 0) -> Dict[str, Any]:
+    """
+    Eine Variante aus monatsplan_batch im Format von calculate_tilgungsplan
+    (Jahreszeilen kompatibel mit YearlyProjection, plus zinssatz, monatliche_rate, sondertilgung_jahr).
+    """
+    spalten = [batch[feld][index].tolist() for feld in JAHRES_FELDER]
+    plan = plan_dict(spalten, {feld: float(batch[feld][index]) for feld in PLAN_FELDER})
+
+    for zeile, zinssatz, rate, sonder in zip(
+        plan["jahre"], *(batch[feld][index].tolist() for feld in ZUSATZ_FELDER)
+    ):
+        zeile["zinssatz"] = round(zinssatz, 3)
+        zeile["monatliche_rate"] = round(rate, 2)
+        zeile["sondertilgung_jahr"] = round(sonder, 2)
+
+    monate = float(batch["abbezahlt_nach_monaten"][index])
+    bindung = float(batch["zinsbindung_jahre"][index])
+    restschuld_bindung: Optional[float] = None
+    if np.isfinite(bindung) and 1 <= bindung <= len(plan["jahre"]):
+        restschuld_bindung = plan["jahre"][int(bindung) - 1]["restschuld"]
+
+    plan["zusammenfassung"].update({
+        # Exaktes Jahr der vollständigen Tilgung (None = innerhalb der Laufzeit nicht abbezahlt)
+        "kredit_abbezahlt_in_jahren": int(np.ceil(monate / 12)) if np.isfinite(monate) else None,
+        "kredit_abbezahlt_nach_monaten": int(monate) if np.isfinite(monate) else None,
+        "gesamte_sondertilgung": round(float(batch["gesamte_sondertilgung"][index]), 2),
+        "restschuld_ende_zinsbindung": restschuld_bindung,
+    })
+    return plan
+
+
+def monatsplan_views(batch: Dict[str, np.ndarray]) -> List[Dict[str, Any]]:
+    """Alle Varianten eines Batches im Dict-Format"""
+    return [monatsplan_view(batch, index) for index in range(batch["finanzierungssumme"].shape[0])]
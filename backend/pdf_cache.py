@@ -0,0 +1,119 @@
+"""
+Cache für PDF-Extraktionen
+Schlüssel ist der SHA-256 der PDF-Bytes: dasselbe Exposé (z.B. dieselbe Makler-Mail
+bei mehreren Kollegen) wird nur einmal an Claude geschickt.
+
+In-Process LRU vor der Tabelle pdf_extraction_cache. Gleichzeitige Uploads
+derselben Datei werden zusammengefasst (Single-Flight). Die Datenbank-Zugriffe
+(synchrones SQLAlchemy) laufen in einem Worker-Thread, damit sie den Event-Loop
+nicht blockieren.
+
+Konfiguration über Environment Variablen:
+- PDF_CACHE_SIZE: Max. Einträge im In-Process LRU (default: 128)
+"""
+
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+import asyncio
+import copy
+import hashlib
+import os
+
+from cache_utils import LRUCache, SingleFlight
+from database import SessionLocal
+from models import PdfExtractionCache
+
+PDF_CACHE_SIZE = int(os.getenv("PDF_CACHE_SIZE", "128"))
+
+_lru = LRUCache(PDF_CACHE_SIZE)
+_flights = SingleFlight()
+_stats = {"hits_memory": 0, "hits_db": 0, "misses": 0}
+
+
+def pdf_digest(content: bytes) -> str:
+    """SHA-256 der PDF-Bytes (Hex)"""
+    return hashlib.sha256(content).hexdigest()
+
+
+def _load_from_db(digest: str) -> Optional[Dict[str, Any]]:
+    """Liest eine Extraktion aus der Datenbank und zählt den Treffer"""
+    db = SessionLocal()
+    try:
+        row = db.query(PdfExtractionCache).filter(PdfExtractionCache.sha256 == digest).first()
+        if row:
+            row.hits = (row.hits or 0) + 1
+            db.commit()
+            return row.property_data
+    except Exception as e:
+        db.rollback()
+        print(f"PDF-Cache: DB-Lesen fehlgeschlagen: {e}")
+    finally:
+        db.close()
+    return None
+
+
+def _store_in_db(digest: str, groesse: int, property_data: Dict[str, Any]):
+    """Speichert eine Extraktion (bestehender Eintrag wird überschrieben)"""
+    db = SessionLocal()
+    try:
+        row = db.query(PdfExtractionCache).filter(PdfExtractionCache.sha256 == digest).first()
+        if row is None:
+            row = PdfExtractionCache(sha256=digest, groesse_bytes=groesse)
+            db.add(row)
+        row.property_data = property_data
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        print(f"PDF-Cache: DB-Schreiben fehlgeschlagen: {e}")
+    finally:
+        db.close()
+
+
+async def get_cached_pdf_extraction(
+    content: bytes,
+    extract: Callable[[bytes], Awaitable[Dict[str, Any]]]
+) -> Tuple[Dict[str, Any], Optional[str], str]:
+    """
+    Gibt die Extraktion aus dem Cache zurück oder führt extract(content) aus.
+
+    Args:
+        content: PDF-Bytes
+        extract: Ungecachte Extraktion (liefert PropertyData als dict)
+
+    Returns:
+        (property_data, quelle, sha256) - quelle ist "memory", "db" oder None (neu extrahiert)
+    """
+    digest = pdf_digest(content)
+
+    data = _lru.get(digest)
+    if data is not None:
+        _stats["hits_memory"] += 1
+        return copy.deepcopy(data), "memory", digest
+
+    data = await asyncio.to_thread(_load_from_db, digest)
+    if data is not None:
+        _lru.set(digest, data)
+        _stats["hits_db"] += 1
+        return copy.deepcopy(data), "db", digest
+
+    _stats["misses"] += 1
+
+    async def run():
+        result = await extract(content)
+        _lru.set(digest, result)
+        await asyncio.to_thread(_store_in_db, digest, len(content), result)
+        return result
+
+    return copy.deepcopy(await _flights.do(digest, run)), None, digest
+
+
+def get_pdf_cache_stats() -> Dict[str, Any]:
+    """Hit/Miss-Zähler für die Admin-Statistik (pro Prozess)"""
+    hits = _stats["hits_memory"] + _stats["hits_db"]
+    anfragen = hits + _stats["misses"]
+    return {
+        **_stats,
+        "uploads_zusammengefasst": _flights.stats["zusammengefasst"],
+        "anfragen": anfragen,
+        "hit_rate": round(hits / anfragen, 3) if anfragen else None,
+        "lru_eintraege": len(_lru),
+    }
@@ -0,0 +1,300 @@
+"""
+PDF-Exposé Extraktion
+Die meisten Makler-Exposés sind Text-PDFs. Statt das komplette Dokument
+(teuerste Eingabeform) an Claude zu schicken, wird zuerst lokal die Textebene
+gelesen und die eindeutigen Felder per Regex erkannt:
+Kaufpreis, Wohnfläche, Zimmer, Baujahr, Hausgeld, Energieklasse.
+
+Nur die restlichen Felder werden aus dem Rohtext von Claude extrahiert.
+Gescannte PDFs (keine/kaum Textebene) gehen wie bisher als Dokument an Claude.
+
+pypdf ist optional - ohne pypdf wird immer der Dokument-Weg genutzt.
+
+Konfiguration über Environment Variablen:
+- PDF_MIN_CHARS_PER_PAGE: Ab so vielen Zeichen pro Seite gilt das PDF als Text-PDF (default: 200)
+- PDF_TEXT_MAX_CHARS: Max. Zeichen Rohtext im Prompt (default: 40000)
+- PDF_MAX_PAGES: Max. gelesene Seiten (default: 30)
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+import asyncio
+import base64
+import io
+import json
+import os
+import re
+
+from llm_client import create_message
+from timing import span
+
+try:
+    from pypdf import PdfReader
+    PYPDF_AVAILABLE = True
+except ImportError:
+    PYPDF_AVAILABLE = False
+
+PDF_MIN_CHARS_PER_PAGE = int(os.getenv("PDF_MIN_CHARS_PER_PAGE", "200"))
+PDF_TEXT_MAX_CHARS = int(os.getenv("PDF_TEXT_MAX_CHARS", "40000"))
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "30"))
+
+EXTRACTION_MODEL = "claude-sonnet-4-20250514"
+
+# Felder der PropertyData mit Beschreibung für den Prompt
+EXTRACTION_FELDER = {
+    "kaufpreis": '<Zahl in Euro>',
+    "wohnflaeche": '<Zahl in qm>',
+    "zimmer": '<Anzahl>',
+    "baujahr": '<Jahr>',
+    "etage": '"<z.B. 2. OG>"',
+    "nebenkosten": '<monatlich in Euro>',
+    "hausgeld": '<monatlich in Euro>',
+    "energieausweis": '"<Verbrauch oder Bedarf>"',
+    "energieklasse": '"<A+ bis H>"',
+    "heizungsart": '"<z.B. Gas-Zentralheizung>"',
+    "adresse": '"<Straße und Hausnummer>"',
+    "stadt": '"<Stadt>"',
+    "stadtteil": '"<Stadtteil/Bezirk>"',
+    "objekttyp": '"<z.B. Eigentumswohnung, Einfamilienhaus>"',
+    "zustand": '"<z.B. gepflegt, renovierungsbedürftig, Neubau>"',
+    "ausstattung": '"<z.B. gehoben, normal, einfach>"',
+    "balkon_terrasse": '<true/false>',
+    "keller": '<true/false>',
+    "stellplatz": '"<z.B. Tiefgarage, Außenstellplatz, keiner>"',
+    "vermietet": '<true/false>',
+    "aktuelle_miete": '<monatliche Kaltmiete in Euro falls vermietet>',
+    "verkäufertyp": '"<privat oder Makler>"',
+    "provision": '"<z.B. 3,57% oder provisionsfrei>"',
+    "beschreibung": '"<Kurze Zusammenfassung des Objekts in 2-3 Sätzen>"',
+}
+
+# Deutsche Zahl: 349.000 / 349.000,00 / 78,5 / 78.5
+_ZAHL = r"(\d{1,3}(?:[.\s]\d{3})+(?:,\d{1,2})?|\d+(?:[.,]\d{1,2})?)"
+_CA = r"(?:ca\.?|circa|rd\.?)?\s*"
+
+# Regex pro Feld (erste Gruppe = Wert) und plausibler Wertebereich
+LOKALE_MUSTER = {
+    "kaufpreis": (
+        re.compile(r"Kaufpreis\s*(?:\(.*?\))?\s*[:\-]?\s*" + _CA + r"(?:EUR|€)?\s*" + _ZAHL + r"\s*(?:€|EUR|Euro)?(?!\s*(?:/|pro|je)\s*(?:m²|m2|qm))", re.IGNORECASE),
+        (10000, 50000000)
+    ),
+    "wohnflaeche": (
+        re.compile(r"Wohnfl(?:ä|ae)che\s*(?:gesamt|insgesamt)?\s*[:\-]?\s*" + _CA + _ZAHL + r"\s*(?:m²|m2|qm)", re.IGNORECASE),
+        (10, 2000)
+    ),
+    "zimmer": (
+        re.compile(r"(?:Zimmer(?:anzahl)?|Anzahl\s+Zimmer)\s*[:\-]?\s*(\d{1,2}(?:[.,]5)?)\b", re.IGNORECASE),
+        (1, 30)
+    ),
+    "baujahr": (
+        re.compile(r"Baujahr\s*[:\-]?\s*" + _CA + r"((?:1[6-9]|20)\d{2})\b", re.IGNORECASE),
+        (1600, datetime.now().year + 3)
+    ),
+    "hausgeld": (
+        re.compile(r"Hausgeld\s*(?:\(.*?\)|monatlich|mtl\.?|p\.\s?m\.|pro\s+Monat)?\s*[:\-]?\s*" + _CA + r"(?:EUR|€)?\s*" + _ZAHL, re.IGNORECASE),
+        (10, 3000)
+    ),
+    "energieklasse": (
+        re.compile(r"Energie(?:effizienz)?klasse\s*[:\-]?\s*(A\+|[A-H])(?![\w+])", re.IGNORECASE),
+        None
+    ),
+}
+
+# Zimmer auch als "3 Zimmer" / "3-Zimmer-Wohnung"
+ZIMMER_NACHGESTELLT = re.compile(r"\b(\d{1,2}(?:[.,]5)?)\s*-?\s*Zimmer", re.IGNORECASE)
+
+
+def parse_german_number(raw: str) -> Optional[float]:
+    """
+    Wandelt eine deutsche Zahlenangabe in float um.
+    "349.000" → 349000.0, "349.000,00" → 349000.0, "78,5" → 78.5, "78.5" → 78.5
+    """
+    raw = raw.strip().replace(" ", "")
+    if "," in raw:
+        raw = raw.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", raw):
+        raw = raw.replace(".", "")
+    try:
+        return float(raw)
+    except ValueError:
+        return None
+
+
+def extract_text_layer(content: bytes) -> Tuple[Optional[str], int]:
+    """
+    Liest die Textebene des PDFs.
+
+    Returns:
+        (text, seitenanzahl) - text ist None ohne pypdf oder bei Lesefehlern
+    """
+    if not PYPDF_AVAILABLE:
+        return None, 0
+    try:
+        reader = PdfReader(io.BytesIO(content))
+        seiten = reader.pages[:PDF_MAX_PAGES]
+        texte = [(seite.extract_text() or "") for seite in seiten]
+        return "\n".join(texte), len(seiten)
+    except Exception as e:
+        print(f"PDF-Textebene konnte nicht gelesen werden: {e}")
+        return None, 0
+
+
+def has_text_layer(text: Optional[str], seiten: int) -> bool:
+    """Genug Text für ein Text-PDF? (sonst: gescanntes PDF)"""
+    if not text or seiten <= 0:
+        return False
+    return len(re.sub(r"\s+", "", text)) / seiten >= PDF_MIN_CHARS_PER_PAGE
+
+
+def parse_expose_fields(text: str) -> Dict[str, Any]:
+    """
+    Erkennt die eindeutigen Felder per Regex.
+    Nur plausible Werte werden übernommen; der erste Treffer gewinnt.
+    """
+    felder: Dict[str, Any] = {}
+    for feld, (muster, bereich) in LOKALE_MUSTER.items():
+        for match in muster.finditer(text):
+            if feld == "energieklasse":
+                felder[feld] = match.group(1).upper()
+                break
+            wert = parse_german_number(match.group(1))
+            if wert is not None and bereich[0] <= wert <= bereich[1]:
+                felder[feld] = int(wert) if feld == "baujahr" else wert
+                break
+
+    if "zimmer" not in felder:
+        for match in ZIMMER_NACHGESTELLT.finditer(text):
+            wert = parse_german_number(match.group(1))
+            if wert is not None and 1 <= wert <= 30:
+                felder["zimmer"] = wert
+                break
+
+    return felder
+
+
+def build_extraction_prompt(felder: List[str], einleitung: str) -> str:
+    """Baut den Extraktions-Prompt für die angegebenen Felder"""
+    zeilen = ",\n".join(f'    "{feld}": {EXTRACTION_FELDER[feld]}' for feld in felder)
+    return f"""{einleitung}
+
+Gib die Daten als JSON zurück mit genau diesen Feldern (null wenn nicht gefunden):
+
+{{
+{zeilen}
+}}
+
+Antworte NUR mit dem JSON, kein anderer Text."""
+
+
+def _parse_json_response(response) -> Dict[str, Any]:
+    """Parst die JSON-Antwort (mit oder ohne Markdown-Codeblock)"""
+    json_text = response.content[0].text.strip()
+    # Entferne mögliche Markdown-Codeblöcke
+    if json_text.startswith("```"):
+        json_text = json_text.split("```")[1]
+        if json_text.startswith("json"):
+            json_text = json_text[4:]
+    return json.loads(json_text.strip())
+
+
+def _clean_text(text: str) -> str:
+    """Entfernt überflüssige Leerzeichen/Leerzeilen und kürzt auf PDF_TEXT_MAX_CHARS"""
+    text = re.sub(r"[ \t]+", " ", text)
+    text = re.sub(r"\n\s*\n+", "\n\n", text).strip()
+    return text[:PDF_TEXT_MAX_CHARS]
+
+
+async def extract_via_document(content: bytes) -> Tuple[Dict[str, Any], Any]:
+    """
+    Bisheriger Weg: komplettes PDF als Dokument an Claude.
+
+    Returns:
+        (extrahierte Felder, usage)
+    """
+    # Base64 encoding für Claude
+    pdf_base64 = base64.b64encode(content).decode('utf-8')
+
+    extraction_prompt = build_extraction_prompt(
+        list(EXTRACTION_FELDER),
+        "Analysiere dieses Immobilien-Exposé und extrahiere alle relevanten Daten."
+    )
+
+    response = await create_message(
+        model=EXTRACTION_MODEL,
+        max_tokens=2000,
+        messages=[
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "document",
+                        "source": {
+                            "type": "base64",
+                            "media_type": "application/pdf",
+                            "data": pdf_base64
+                        }
+                    },
+                    {
+                        "type": "text",
+                        "text": extraction_prompt
+                    }
+                ]
+            }
+        ]
+    )
+    return _parse_json_response(response), response.usage
+
+
+async def extract_via_text(text: str, lokale_felder: Dict[str, Any]) -> Tuple[Dict[str, Any], Any]:
+    """
+    Text-Weg: nur der Rohtext und nur die noch fehlenden Felder gehen an Claude.
+    Lokal erkannte Felder haben Vorrang.
+
+    Returns:
+        (extrahierte Felder, usage)
+    """
+    offene_felder = [feld for feld in EXTRACTION_FELDER if feld not in lokale_felder]
+
+    einleitung = "Analysiere den folgenden Text eines Immobilien-Exposés und extrahiere die relevanten Daten."
+    if lokale_felder:
+        einleitung += "\n\nBereits erkannt (nicht erneut angeben):\n" + json.dumps(lokale_felder, ensure_ascii=False)
+    extraction_prompt = build_extraction_prompt(offene_felder, einleitung)
+
+    response = await create_message(
+        model=EXTRACTION_MODEL,
+        max_tokens=2000,
+        messages=[
+            {
+                "role": "user",
+                "content": f"=== EXPOSÉ-TEXT ===\n{_clean_text(text)}\n\n=== AUFGABE ===\n{extraction_prompt}"
+            }
+        ]
+    )
+    ki_felder = _parse_json_response(response)
+    ergebnis = {feld: ki_felder.get(feld) for feld in offene_felder}
+    ergebnis.update(lokale_felder)
+    return ergebnis, response.usage
+
+
+async def extract_expose(content: bytes) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Extrahiert die Immobiliendaten - lokal vorverarbeitet, wenn das PDF eine Textebene hat.
+
+    Returns:
+        (extrahierte Felder, info) - info enthält methode ("text" oder "dokument"),
+        lokal_erkannt (Feldnamen) und usage
+    """
+    # pypdf und Regex-Erkennung sind CPU-Arbeit - im Thread, damit der Event-Loop frei bleibt
+    with span("pdf_text"):
+        text, seiten = await asyncio.to_thread(extract_text_layer, content)
+
+    if has_text_layer(text, seiten):
+        lokale_felder = await asyncio.to_thread(parse_expose_fields, text)
+        with span("llm_extract"):
+            daten, usage = await extract_via_text(text, lokale_felder)
+        return daten, {"methode": "text", "lokal_erkannt": list(lokale_felder), "seiten": seiten, "usage": usage}
+
+    # Gescanntes PDF (oder kein pypdf): Dokument-Weg
+    with span("llm_extract"):
+        daten, usage = await extract_via_document(content)
+    return daten, {"methode": "dokument", "lokal_erkannt": [], "seiten": seiten, "usage": usage}
@@ -0,0 +1,135 @@
+"""
+Portfolio-Analyse: viele Exposés eines Maklers in einem Durchlauf
+Jedes Objekt durchläuft die Pipeline Extraktion → Marktrecherche → Bewertung.
+Objekte laufen unabhängig voneinander durch die Stufen, jede Stufe ist begrenzt.
+Die Marktrecherche läuft nur einmal pro Standort (Stadt, Stadtteil, Objekttyp).
+
+Konfiguration über Environment Variablen:
+- PORTFOLIO_MAX_OBJEKTE: Max. Objekte pro Portfolio (default: 50)
+- PORTFOLIO_EXTRACT_CONCURRENCY: Gleichzeitige PDF-Extraktionen (default: 4)
+- PORTFOLIO_SCORE_CONCURRENCY: Gleichzeitige Bewertungen (default: 4)
+"""
+
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+import os
+import time
+
+PORTFOLIO_MAX_OBJEKTE = int(os.getenv("PORTFOLIO_MAX_OBJEKTE", "50"))
+PORTFOLIO_EXTRACT_CONCURRENCY = int(os.getenv("PORTFOLIO_EXTRACT_CONCURRENCY", "4"))
+PORTFOLIO_SCORE_CONCURRENCY = int(os.getenv("PORTFOLIO_SCORE_CONCURRENCY", "4"))
+
+
+def standort_key(property_data: Dict[str, Any]) -> Tuple[str, str, str]:
+    """Schlüssel für die Marktrecherche - gleiche Standorte werden nur einmal recherchiert"""
+    return (
+        (property_data.get("stadt") or "").strip().lower(),
+        (property_data.get("stadtteil") or "").strip().lower(),
+        (property_data.get("objekttyp") or "Eigentumswohnung").strip().lower(),
+    )
+
+
+def rank_results(ergebnisse: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Bewertete Objekte nach Gesamtscore absteigend, mit Rang"""
+    bewertet = sorted(
+        (e for e in ergebnisse if "fehler" not in e),
+        key=lambda e: (-e["gesamtscore"], e["index"])
+    )
+    return [{"rang": rang, **eintrag} for rang, eintrag in enumerate(bewertet, start=1)]
+
+
+async def run_portfolio(
+    objekte: List[Dict[str, Any]],
+    extract: Callable[[bytes], Awaitable[Tuple[Dict[str, Any], Optional[str]]]],
+    research: Callable[[Dict[str, Any]], Awaitable[Optional[Dict[str, Any]]]],
+    score: Callable[[Dict[str, Any], Optional[Dict[str, Any]]], Awaitable[Dict[str, Any]]],
+    extract_concurrency: int = PORTFOLIO_EXTRACT_CONCURRENCY,
+    score_concurrency: int = PORTFOLIO_SCORE_CONCURRENCY
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Führt die Portfolio-Pipeline aus und liefert Fortschritts-Ereignisse.
+
+    Args:
+        objekte: [{"datei", "pdf"}] oder [{"property_data"}]
+        extract: PDF-Bytes → (PropertyData als dict, Cache-Quelle oder None)
+        research: PropertyData → Marktdaten (einmal pro Standort aufgerufen)
+        score: (PropertyData, Marktdaten) → Zusammenfassung mit gesamtscore, empfehlung, analysis_id
+
+    Yields:
+        {"event": "start"}, dann pro Objekt "extrahiert", "recherchiert", "bewertet" oder "fehler"
+        (in Fertigstellungs-Reihenfolge), am Ende {"event": "summary"} mit Ranking
+    """
+    start = time.perf_counter()
+    ereignisse: asyncio.Queue = asyncio.Queue()
+    extract_slots = asyncio.Semaphore(extract_concurrency)
+    score_slots = asyncio.Semaphore(score_concurrency)
+    recherchen: Dict[Tuple[str, str, str], asyncio.Task] = {}
+
+    async def marktdaten_fuer(property_data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], bool]:
+        key = standort_key(property_data)
+        geteilt = key in recherchen
+        if not geteilt:
+            recherchen[key] = asyncio.create_task(research(property_data))
+        return await recherchen[key], geteilt
+
+    async def verarbeite(index: int, objekt: Dict[str, Any]) -> Dict[str, Any]:
+        basis = {"index": index, "datei": objekt.get("datei")}
+        stufe = "extraktion"
+        try:
+            property_data = objekt.get("property_data")
+            if property_data is None:
+                async with extract_slots:
+                    property_data, quelle = await extract(objekt["pdf"])
+                ereignisse.put_nowait({"event": "extrahiert", **basis, "cache": quelle, "property_data": property_data})
+
+            stufe = "marktrecherche"
+            marktdaten, geteilt = await marktdaten_fuer(property_data)
+            ereignisse.put_nowait({
+                "event": "recherchiert", **basis,
+                "standort": marktdaten.get("standort") if marktdaten else None,
+                "geteilt": geteilt
+            })
+
+            stufe = "bewertung"
+            async with score_slots:
+                ergebnis = {**basis, **await score(property_data, marktdaten)}
+            ereignisse.put_nowait({"event": "bewertet", **ergebnis})
+            return ergebnis
+
+        except Exception as e:
+            fehler = {**basis, "stufe": stufe, "fehler": getattr(e, "detail", None) or str(e)}
+            ereignisse.put_nowait({"event": "fehler", **fehler})
+            return fehler
+        finally:
+            ereignisse.put_nowait(None)  # Objekt fertig
+
+    yield {"event": "start", "anzahl": len(objekte)}
+
+    tasks = [asyncio.create_task(verarbeite(i, objekt)) for i, objekt in enumerate(objekte)]
+    try:
+        offen = len(tasks)
+        while offen:
+            ereignis = await ereignisse.get()
+            if ereignis is None:
+                offen -= 1
+            else:
+                yield ereignis
+    finally:
+        # Client hat die Verbindung abgebrochen → restliche Objekte nicht weiter bearbeiten
+        for task in tasks:
+            task.cancel()
+        for task in recherchen.values():
+            task.cancel()
+
+    ergebnisse = [task.result() for task in tasks]
+    fehler = [e for e in ergebnisse if "fehler" in e]
+    yield {
+        "event": "summary",
+        "anzahl": len(objekte),
+        "bewertet": len(ergebnisse) - len(fehler),
+        "fehlgeschlagen": len(fehler),
+        "marktrecherchen": len(recherchen),
+        "dauer_s": round(time.perf_counter() - start, 2),
+        "ranking": rank_results(ergebnisse),
+        "fehler": fehler,
+    }
@@ -257,3 +257,25 @@ class AdminStatsResponse(BaseModel):
     users_this_week: int
     analyses_today: int
     analyses_this_week: int
+    market_cache: Optional[dict] = None  # Hit/Miss-Zähler des Marktdaten-Caches
+    analysis_cache: Optional[dict] = None  # Hit/Miss-Zähler des KI-Bewertungs-Caches
+    pdf_cache: Optional[dict] = None  # Hit/Miss-Zähler des PDF-Extraktions-Caches
+    rechenkontext: Optional[dict] = None  # Berechnete vs. wiederverwendete Rechner-Aufrufe der Finanz-Blöcke
+    analysis_jobs: Optional[dict] = None  # Metriken der Analyse-Warteschlange
+
+
+class AdminKnowledgeResponse(BaseModel):
+    """Geladener Stand der Wissensdatei (KNOWLEDGE.md)"""
+    datei: str
+    quelle: str
+    version: Optional[str]
+    sha256: Optional[str]
+    groesse_bytes: int
+    zeichen: int
+    zeilen: int
+    abschnitte: int
+    system_prompt_zeichen: int
+    system_prompt_tokens_geschaetzt: int
+    geaendert_am: Optional[datetime]
+    geladen_am: datetime
+    reload_count: int
@@ -0,0 +1,199 @@
+"""
+Vektorisierte Sensitivitätsanalyse des monatlichen Cashflows
+Beliebige Achsen (Zinssatz, Tilgung, Eigenkapital, Miete, Nebenkosten, Kaufpreis)
+in beliebiger Auflösung - das Raster wird mit NumPy-Broadcasting in einem Schritt
+berechnet (gleiche Formel und Rechenreihenfolge wie calculate_cashflow).
+
+Die Break-Even-Linie (Cashflow = 0) wird nicht aus dem Raster interpoliert, sondern
+analytisch nach einem Parameter aufgelöst - für jede Kombination der übrigen Achsen.
+
+Konfiguration über Environment Variablen:
+- SENSITIVITY_MAX_ZELLEN: Max. Rasterzellen pro Anfrage (default: 250000)
+"""
+
+from typing import Any, Dict, List, Optional, Sequence
+import os
+
+import numpy as np
+
+SENSITIVITY_MAX_ZELLEN = int(os.getenv("SENSITIVITY_MAX_ZELLEN", "250000"))
+
+# Parameter, die als Achse variiert oder als Basiswert gesetzt werden können
+PARAMETER = (
+    "kaufpreis", "monatliche_miete", "nebenkosten", "eigenkapital",
+    "eigenkapital_prozent", "zinssatz", "tilgung",
+)
+
+
+class SensitivityError(ValueError):
+    """Ungültige Achsen-Definition"""
+
+
+def achsen_laenge(achse: Dict[str, Any]) -> int:
+    """Anzahl Punkte einer Achse - ohne die Werte zu erzeugen"""
+    if achse.get("werte"):
+        return len(achse["werte"])
+    if achse.get("von") is None or achse.get("bis") is None or not achse.get("schritte"):
+        raise SensitivityError(f"Achse {achse.get('parameter')}: 'werte' oder 'von', 'bis' und 'schritte' angeben")
+    if achse["schritte"] < 2:
+        raise SensitivityError(f"Achse {achse['parameter']}: mindestens 2 Schritte")
+    return int(achse["schritte"])
+
+
+def achsen_werte(achse: Dict[str, Any]) -> np.ndarray:
+    """
+    Werte einer Achse: {"parameter", "werte": [...]} oder {"parameter", "von", "bis", "schritte"}
+    """
+    anzahl = achsen_laenge(achse)
+    if achse.get("werte"):
+        return np.asarray(achse["werte"], dtype=float)
+    return np.linspace(achse["von"], achse["bis"], anzahl)
+
+
+def _raster(basis: Dict[str, float], achsen: Sequence[Dict[str, Any]]) -> Dict[str, np.ndarray]:
+    """Alle Parameter als broadcastbare Arrays (Achse k entlang Dimension k)"""
+    namen = [achse["parameter"] for achse in achsen]
+    for name in namen:
+        if name not in PARAMETER:
+            raise SensitivityError(f"Unbekannter Parameter '{name}' (erlaubt: {', '.join(PARAMETER)})")
+    if len(set(namen)) != len(namen):
+        raise SensitivityError("Jeder Parameter darf nur eine Achse haben")
+    if "eigenkapital" in namen and "eigenkapital_prozent" in namen:
+        raise SensitivityError("Eigenkapital entweder absolut oder in Prozent variieren")
+
+    # Größe prüfen, bevor ein Array angelegt wird
+    form = [achsen_laenge(achse) for achse in achsen]
+    zellen = 1
+    for laenge in form:
+        zellen *= laenge
+    if zellen > SENSITIVITY_MAX_ZELLEN:
+        raise SensitivityError(f"Raster zu groß: {zellen} Zellen (max. {SENSITIVITY_MAX_ZELLEN})")
+
+    werte = {name: np.asarray(basis.get(name, 0) or 0, dtype=float) for name in PARAMETER}
+    for k, achse in enumerate(achsen):
+        werte[achse["parameter"]] = achsen_werte(achse).reshape([-1 if i == k else 1 for i in range(len(achsen))])
+
+    # EK in Prozent (Achse oder Basiswert) hat Vorrang vor dem absoluten Basiswert
+    if "eigenkapital_prozent" in namen or ("eigenkapital" not in namen and basis.get("eigenkapital_prozent") is not None):
+        werte["eigenkapital"] = werte["kaufpreis"] * (werte["eigenkapital_prozent"] / 100)
+    werte["_form"] = tuple(form)
+    return werte
+
+
+def cashflow_raster(basis: Dict[str, float], achsen: Sequence[Dict[str, Any]]) -> np.ndarray:
+    """
+    Monatlicher Cashflow für jede Zelle des Rasters (Form: Länge der Achsen).
+    Rechenreihenfolge wie calculate_cashflow, damit die Werte identisch sind.
+    """
+    werte = _raster(basis, achsen)
+    finanzierungssumme = werte["kaufpreis"] - werte["eigenkapital"]
+    jaehrliche_rate = finanzierungssumme * ((werte["zinssatz"] + werte["tilgung"]) / 100)
+    monatliche_rate = jaehrliche_rate / 12
+    cashflow = werte["monatliche_miete"] - monatliche_rate - werte["nebenkosten"]
+    return np.broadcast_to(cashflow, werte["_form"])
+
+
+def break_even(basis: Dict[str, float], achsen: Sequence[Dict[str, Any]], parameter: str) -> np.ndarray:
+    """
+    Wert von `parameter`, bei dem der Cashflow genau 0 ist - für jede Kombination der übrigen Achsen.
+    Ist `parameter` eine Achse, fällt sie im Ergebnis weg (Kontur der Heatmap).
+    NaN, wo es keinen Break-Even gibt (z.B. Rate 0 bei Auflösung nach Eigenkapital).
+
+    Auflösung von Miete - (Kaufpreis - EK) * (Zins + Tilgung) / 1200 - Nebenkosten = 0:
+        monatliche_miete = Rate + Nebenkosten
+        nebenkosten      = Miete - Rate
+        zinssatz         = 1200 * (Miete - Nebenkosten) / Darlehen - Tilgung
+        tilgung          = 1200 * (Miete - Nebenkosten) / Darlehen - Zinssatz
+        eigenkapital     = Kaufpreis - 1200 * (Miete - Nebenkosten) / (Zins + Tilgung)
+        kaufpreis        = EK + 1200 * (Miete - Nebenkosten) / (Zins + Tilgung)   (bei EK in %: / (1 - EK%))
+    """
+    if parameter not in PARAMETER:
+        raise SensitivityError(f"Unbekannter Break-Even-Parameter '{parameter}'")
+    werte = _raster(basis, achsen)
+    ek_in_prozent = "eigenkapital_prozent" in [a["parameter"] for a in achsen] or (
+        "eigenkapital" not in [a["parameter"] for a in achsen] and basis.get("eigenkapital_prozent") is not None
+    )
+
+    kaufpreis, eigenkapital = werte["kaufpreis"], werte["eigenkapital"]
+    miete, nebenkosten = werte["monatliche_miete"], werte["nebenkosten"]
+    zins, tilgung = werte["zinssatz"], werte["tilgung"]
+    ueberschuss = (miete - nebenkosten) * 1200  # jährlicher Überschuss vor Rate, in % Basis
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        if parameter == "monatliche_miete":
+            ergebnis = (kaufpreis - eigenkapital) * ((zins + tilgung) / 100) / 12 + nebenkosten
+        elif parameter == "nebenkosten":
+            ergebnis = miete - (kaufpreis - eigenkapital) * ((zins + tilgung) / 100) / 12
+        elif parameter == "zinssatz":
+            ergebnis = ueberschuss / (kaufpreis - eigenkapital) - tilgung
+        elif parameter == "tilgung":
+            ergebnis = ueberschuss / (kaufpreis - eigenkapital) - zins
+        elif parameter == "eigenkapital":
+            ergebnis = kaufpreis - ueberschuss / (zins + tilgung)
+        elif parameter == "eigenkapital_prozent":
+            ergebnis = (kaufpreis - ueberschuss / (zins + tilgung)) / kaufpreis * 100
+        elif ek_in_prozent:
+            ergebnis = ueberschuss / ((zins + tilgung) * (1 - werte["eigenkapital_prozent"] / 100))
+        else:
+            ergebnis = eigenkapital + ueberschuss / (zins + tilgung)
+
+    # Dimension des aufgelösten Parameters entfernen (die Formel hängt nicht von ihm ab)
+    form = list(werte["_form"])
+    namen = [achse["parameter"] for achse in achsen]
+    if parameter in namen:
+        form[namen.index(parameter)] = 1
+    ergebnis = np.broadcast_to(ergebnis, form)
+    if parameter in namen:
+        ergebnis = ergebnis.squeeze(axis=namen.index(parameter))
+    return np.where(np.isfinite(ergebnis), ergebnis, np.nan)
+
+
+def _liste(werte: np.ndarray) -> List[Optional[float]]:
+    """Flaches, auf 2 Nachkommastellen gerundetes Array als Liste (NaN → None)"""
+    flach = np.round(np.ravel(werte), 2)
+    if np.isnan(flach).any():
+        return [None if np.isnan(wert) else wert for wert in flach.tolist()]
+    return flach.tolist()
+
+
+def sensitivity_analysis(
+    basis: Dict[str, float],
+    achsen: Sequence[Dict[str, Any]],
+    break_even_parameter: Optional[str] = None
+) -> Dict[str, Any]:
+    """
+    Sensitivitätsraster im Spaltenformat (kompakt für große Heatmaps).
+
+    Args:
+        basis: Basiswerte (kaufpreis, monatliche_miete, nebenkosten, eigenkapital oder
+            eigenkapital_prozent, zinssatz, tilgung) für alle Parameter ohne Achse
+        achsen: 1-3 Achsen, z.B. [{"parameter": "zinssatz", "von": 2, "bis": 6, "schritte": 50}]
+        break_even_parameter: Nach diesem Parameter wird die Break-Even-Linie aufgelöst
+            (default: letzte Achse)
+
+    Returns:
+        {"achsen": [{"parameter", "werte"}], "form", "monatlicher_cashflow" (flach, C-Reihenfolge:
+        letzte Achse läuft am schnellsten), "statistik", "break_even": {"parameter", "form", "werte"}}
+    """
+    if not achsen:
+        raise SensitivityError("Mindestens eine Achse angeben")
+    cashflow = cashflow_raster(basis, achsen)
+    parameter = break_even_parameter or achsen[-1]["parameter"]
+    linie = break_even(basis, achsen, parameter)
+
+    return {
+        "achsen": [{"parameter": achse["parameter"], "werte": _liste(achsen_werte(achse))} for achse in achsen],
+        "form": list(cashflow.shape),
+        "monatlicher_cashflow": _liste(cashflow),
+        "statistik": {
+            "zellen": int(cashflow.size),
+            "min": round(float(cashflow.min()), 2),
+            "max": round(float(cashflow.max()), 2),
+            "selbsttragend_anteil": round(float((cashflow >= 0).mean()), 4),
+        },
+        "break_even": {
+            "parameter": parameter,
+            "form": list(linie.shape),
+            "werte": _liste(linie),
+        },
+    }
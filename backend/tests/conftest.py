@@ -0,0 +1,25 @@
+"""
+Gemeinsame Test-Einstellungen: Backend-Module direkt importierbar machen
+(wie beim Start im backend-Ordner), Fixture-Ordner bereitstellen.
+Die Tests brauchen weder Netzwerk noch eine echte Datenbank.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# main.py importierbar ohne lokale Datenbank und API-Key
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("ANTHROPIC_API_KEY", "test")
+
+FIXTURES = Path(__file__).resolve().parent / "fixtures"
+
+
+@pytest.fixture
+def fixture_html():
+    """Liest eine gespeicherte Ergebnisseite aus tests/fixtures"""
+    return lambda name: (FIXTURES / name).read_text(encoding="utf-8")
@@ -0,0 +1,51 @@
+"""
+calculate_tilgungsplan (vektorisierte Engine) gegen die frühere Jahresschleife.
+Verglichen wird das serialisierte JSON, damit auch die Zahlentypen übereinstimmen
+(ganzzahlige Eingaben bleiben ganzzahlig, die getilgte Restschuld ist 0 statt 0.0).
+"""
+
+import json
+import random
+
+import pytest
+
+from benchmarks.bench_amortization import loop_tilgungsplan
+from main import calculate_tilgungsplan
+
+
+def _als_json(plan):
+    return json.dumps(plan, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("parameter", [
+    # Ganzzahlige Eingaben, Kredit wird innerhalb der Laufzeit getilgt
+    dict(kaufpreis=173000, eigenkapital=35000, zinssatz=3.5, tilgung=6.0, monatliche_miete=650, nebenkosten=180),
+    dict(kaufpreis=300000, eigenkapital=60000.0, zinssatz=3.5, tilgung=2.0, monatliche_miete=1100.0, nebenkosten=250),
+    # Ohne Darlehen, zinsfrei, tilgungsfrei, Tilgung im ersten Jahr
+    dict(kaufpreis=250000, eigenkapital=250000, zinssatz=3.5, tilgung=2.0, monatliche_miete=900, nebenkosten=200),
+    dict(kaufpreis=200000, eigenkapital=40000, zinssatz=0.0, tilgung=5.0, monatliche_miete=800, nebenkosten=150),
+    dict(kaufpreis=200000, eigenkapital=40000, zinssatz=4.0, tilgung=0.0, monatliche_miete=800, nebenkosten=150),
+    dict(kaufpreis=200000.0, eigenkapital=40000.0, zinssatz=4.0, tilgung=120.0, monatliche_miete=800, nebenkosten=150),
+])
+@pytest.mark.parametrize("jahre", [0, 1, 30])
+def test_tilgungsplan_json_wie_schleife(parameter, jahre):
+    assert _als_json(calculate_tilgungsplan(**parameter, jahre=jahre)) == _als_json(loop_tilgungsplan(**parameter, jahre=jahre))
+
+
+def test_tilgungsplan_json_wie_schleife_zufall():
+    rng = random.Random(3)
+    for _ in range(300):
+        kaufpreis = rng.choice([rng.randrange(50000, 1000000, 1000), rng.uniform(5e4, 1e6)])
+        parameter = dict(
+            kaufpreis=kaufpreis,
+            eigenkapital=rng.choice([0, round(kaufpreis * rng.uniform(0, 0.5)), kaufpreis * rng.uniform(0, 0.5)]),
+            zinssatz=rng.uniform(0, 6),
+            tilgung=rng.choice([rng.uniform(0, 4), rng.uniform(4, 15)]),
+            monatliche_miete=rng.choice([rng.randrange(300, 5000, 50), rng.uniform(300, 5000)]),
+            nebenkosten=rng.uniform(0, 500),
+            mietsteigerung=rng.uniform(0, 3),
+            wertsteigerung=rng.uniform(-1, 3),
+        )
+        jahre = rng.choice([10, 30, 40])
+        plan = calculate_tilgungsplan(**parameter, jahre=jahre)
+        assert _als_json(plan) == _als_json(loop_tilgungsplan(**parameter, jahre=jahre)), parameter
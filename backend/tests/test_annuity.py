@@ -0,0 +1,152 @@
+"""
+Geschlossene Annuitätenformeln (annuity.py) gegen die frühere Jahresschleife.
+Die Schleife bleibt hier als Referenz-Implementierung erhalten.
+"""
+
+import random
+
+import pytest
+
+from annuity import erstes_volles_jahr, laufzeit_jahre, restschuld_nach
+from main import calculate_financing_options, calculate_key_milestones
+
+
+def schleife_tilgungsplan(kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten,
+                          jahre=40, mietsteigerung=1.5, wertsteigerung=1.5):
+    """Jahresschleife des ursprünglichen calculate_tilgungsplan (gerundete Jahreszeilen)"""
+    finanzierungssumme = kaufpreis - eigenkapital
+    restschuld = finanzierungssumme
+    jaehrliche_rate = finanzierungssumme * ((zinssatz + tilgung) / 100)
+    aktuelle_miete = monatliche_miete
+    immobilienwert = kaufpreis
+    gesamte_tilgung = 0
+    zeilen = []
+    for jahr in range(1, jahre + 1):
+        zinsen_jahr = restschuld * (zinssatz / 100)
+        tilgung_jahr = jaehrliche_rate - zinsen_jahr
+        if tilgung_jahr > restschuld:
+            tilgung_jahr = restschuld
+        restschuld = max(0, restschuld - tilgung_jahr)
+        gesamte_tilgung += tilgung_jahr
+        jaehrlicher_cashflow = (aktuelle_miete * 12) - jaehrliche_rate - (nebenkosten * 12)
+        zeilen.append({
+            "jahr": jahr,
+            "restschuld": round(restschuld, 2),
+            "getilgt": round(gesamte_tilgung, 2),
+            "monatlicher_cashflow": round(jaehrlicher_cashflow / 12, 2),
+            "eigenkapital_aufbau": round(eigenkapital + gesamte_tilgung, 2),
+            "gesamtvermoegen": round(immobilienwert - restschuld, 2),
+        })
+        aktuelle_miete *= (1 + mietsteigerung / 100)
+        immobilienwert *= (1 + wertsteigerung / 100)
+    return zeilen
+
+
+def schleife_meilensteine(kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten):
+    """Das ursprüngliche calculate_key_milestones (Suche über 40 Planjahre)"""
+    finanzierungssumme = kaufpreis - eigenkapital
+    schwellen = {
+        "kredit_25_prozent_getilgt": lambda z, p: p >= 25,
+        "kredit_50_prozent_getilgt": lambda z, p: p >= 50,
+        "kredit_75_prozent_getilgt": lambda z, p: p >= 75,
+        "kredit_komplett_getilgt": lambda z, p: z["restschuld"] <= 0,
+        "erster_positiver_cashflow": lambda z, p: z["monatlicher_cashflow"] > 0,
+        "eigenkapital_verdoppelt": lambda z, p: z["eigenkapital_aufbau"] >= eigenkapital * 2,
+        "vermögen_100k_erreicht": lambda z, p: z["gesamtvermoegen"] >= 100000,
+        "vermögen_250k_erreicht": lambda z, p: z["gesamtvermoegen"] >= 250000,
+        "vermögen_500k_erreicht": lambda z, p: z["gesamtvermoegen"] >= 500000,
+    }
+    meilensteine = dict.fromkeys(schwellen)
+    for zeile in schleife_tilgungsplan(kaufpreis, eigenkapital, zinssatz, tilgung, monatliche_miete, nebenkosten):
+        getilgt_prozent = (zeile["getilgt"] / finanzierungssumme * 100) if finanzierungssumme > 0 else 0
+        for name, erreicht in schwellen.items():
+            if meilensteine[name] is None and erreicht(zeile, getilgt_prozent):
+                meilensteine[name] = zeile["jahr"]
+    return meilensteine
+
+
+def schleife_darlehen(darlehen, zinssatz, tilgung, max_jahre=2000):
+    """Restschuld pro Jahr, Abzahlungsjahr (None = nie) und Summe aller Raten"""
+    rest = darlehen
+    rate = darlehen * (zinssatz + tilgung) / 100
+    restschulden, abbezahlt, summe = [], None, 0.0
+    for jahr in range(1, max_jahre + 1):
+        zinsen = rest * zinssatz / 100
+        getilgt = min(rate - zinsen, rest)
+        summe += zinsen + getilgt
+        rest = max(0.0, rest - getilgt)
+        restschulden.append(rest)
+        if rest <= 0:
+            abbezahlt = jahr
+            break
+    return restschulden, abbezahlt, summe
+
+
+# Randfälle: zinsfrei, tilgungsfrei (nie abbezahlt), in 40 Jahren nicht abbezahlt, sehr schnelle Tilgung
+RANDFAELLE = [
+    (0.0, 2.0),
+    (0.0, 0.0),
+    (3.5, 0.0),
+    (6.0, 0.5),
+    (3.75, 12.0),
+    (3.5, 2.0),
+]
+
+
+@pytest.mark.parametrize("zinssatz, tilgung", RANDFAELLE)
+def test_restschuld_und_laufzeit_wie_schleife(zinssatz, tilgung):
+    darlehen = 240000.0
+    restschulden, abbezahlt, _ = schleife_darlehen(darlehen, zinssatz, tilgung, max_jahre=60)
+
+    for jahr, rest in enumerate(restschulden, start=1):
+        assert float(restschuld_nach(darlehen, zinssatz, tilgung, jahr)) == pytest.approx(rest, abs=1e-6)
+
+    jahr = float(erstes_volles_jahr(laufzeit_jahre(zinssatz, tilgung)))
+    if abbezahlt is None:
+        assert jahr > 60
+    else:
+        assert jahr == abbezahlt
+
+
+def _zufallsfaelle(anzahl, seed):
+    rng = random.Random(seed)
+    for _ in range(anzahl):
+        kaufpreis = rng.uniform(5e4, 1.5e6)
+        yield {
+            "kaufpreis": kaufpreis,
+            "eigenkapital": rng.choice([0.0, kaufpreis * rng.uniform(0, 0.6), kaufpreis * rng.uniform(0.6, 0.99)]),
+            "zinssatz": rng.choice([0.0, rng.uniform(0.5, 8)]),
+            "tilgung": rng.choice([0.0, rng.uniform(0.5, 8), 12.0]),
+            "monatliche_miete": rng.uniform(0, 6000),
+            "nebenkosten": rng.uniform(0, 600),
+        }
+
+
+@pytest.mark.parametrize("zinssatz, tilgung", RANDFAELLE)
+def test_meilensteine_randfaelle(zinssatz, tilgung):
+    parameter = dict(kaufpreis=300000.0, eigenkapital=60000.0, zinssatz=zinssatz, tilgung=tilgung,
+                     monatliche_miete=1100.0, nebenkosten=250.0)
+    assert calculate_key_milestones(**parameter) == schleife_meilensteine(**parameter)
+
+
+def test_meilensteine_wie_schleife():
+    for parameter in _zufallsfaelle(2000, seed=5):
+        assert calculate_key_milestones(**parameter) == schleife_meilensteine(**parameter), parameter
+
+
+def test_finanzierungsoptionen_wie_schleife():
+    rng = random.Random(7)
+    for _ in range(500):
+        kaufpreis = rng.uniform(1e5, 1e6)
+        eigenkapital = kaufpreis * rng.uniform(0, 0.5)
+        for option in calculate_financing_options(kaufpreis, 1000.0, 200.0, eigenkapital):
+            _, abbezahlt, summe = schleife_darlehen(kaufpreis - eigenkapital, option["zinssatz"], option["tilgung"])
+            assert option["jahre_bis_abbezahlt"] == abbezahlt
+            assert option["gesamtkosten_geschaetzt"] == pytest.approx(summe, abs=0.02)
+
+
+def test_finanzierungsoptionen_ohne_darlehen():
+    for option in calculate_financing_options(300000.0, 1000.0, 200.0, 300000.0):
+        assert option["jahre_bis_abbezahlt"] == 0
+        assert option["gesamtkosten_geschaetzt"] == 0
+        assert option["laufzeit_jahre_exakt"] is None
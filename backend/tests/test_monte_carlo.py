@@ -0,0 +1,79 @@
+"""
+Monte-Carlo-Risikosimulation: Reproduzierbarkeit, Grenzfall ohne Zufall
+(gegen die geschlossene Annuitätenformel) und Plausibilität der Kennzahlen.
+"""
+
+import pytest
+
+from annuity import restschuld_nach
+from monte_carlo import PERZENTILE, MonteCarloError, run_monte_carlo
+
+BEISPIEL = dict(
+    kaufpreis=300000.0, monatliche_miete=1100.0, nebenkosten=250.0,
+    eigenkapital=60000.0, zinssatz=3.5, tilgung=2.0,
+)
+
+OHNE_ZUFALL = {
+    "zins_volatilitaet": 0, "mietsteigerung_volatilitaet": 0, "wertsteigerung_volatilitaet": 0,
+    "mieterwechsel_quote": 0, "instandhaltung_quote": 0,
+}
+
+
+def test_gleicher_seed_gleiches_ergebnis():
+    ergebnis = run_monte_carlo(**BEISPIEL, pfade=2000, seed=11)
+    assert run_monte_carlo(**BEISPIEL, pfade=2000, seed=11) == ergebnis
+    assert run_monte_carlo(**BEISPIEL, pfade=2000, seed=12) != ergebnis
+
+
+@pytest.mark.parametrize("zinsbindung_jahre, zins_aenderung", [(1000, 0.0), (10, 0.0), (10, 1.5), (5, -2.0)])
+def test_ohne_zufall_wie_annuitaet(zinsbindung_jahre, zins_aenderung):
+    jahre = 30
+    annahmen = {**OHNE_ZUFALL, "zinsbindung_jahre": zinsbindung_jahre, "zins_aenderung": zins_aenderung}
+    baender = run_monte_carlo(**BEISPIEL, jahre=jahre, pfade=3, seed=1, annahmen=annahmen)["baender"]
+
+    # Referenz: Annuität je Zinsbindung, danach neue Rate auf die Restschuld zum Anschlusszins
+    darlehen, zins = BEISPIEL["kaufpreis"] - BEISPIEL["eigenkapital"], BEISPIEL["zinssatz"]
+    restschulden, zinssaetze = [], []
+    for start in range(0, jahre, zinsbindung_jahre):
+        if start:
+            zins = max(0.5, zins + zins_aenderung)
+        for n in range(1, min(zinsbindung_jahre, jahre - start) + 1):
+            restschulden.append(float(restschuld_nach(darlehen, zins, BEISPIEL["tilgung"], n)))
+            zinssaetze.append(zins)
+        darlehen = restschulden[-1]
+
+    for p in PERZENTILE:
+        assert baender["restschuld"][f"p{p}"] == pytest.approx(restschulden, abs=0.006)
+        assert baender["zinssatz"][f"p{p}"] == pytest.approx(zinssaetze, abs=0.006)
+
+
+def test_perzentile_geordnet_und_wahrscheinlichkeiten_gueltig():
+    ergebnis = run_monte_carlo(
+        **BEISPIEL, jahre=40, pfade=5000, seed=3, cashflow_schwelle=100,
+        annahmen={"zins_volatilitaet": 2.0, "wertsteigerung_volatilitaet": 6.0},
+    )
+    for feld, band in ergebnis["baender"].items():
+        for p5, p50, p95 in zip(band["p5"], band["p50"], band["p95"]):
+            assert p5 <= p50 <= p95, feld
+    for werte in ergebnis["endwerte"].values():
+        assert werte["p5"] <= werte["p50"] <= werte["p95"]
+
+    risiko = ergebnis["risiko"]
+    for name in ("negatives_eigenkapital", "cashflow_dauerhaft_unter_schwelle", "cashflow_durchschnitt_unter_schwelle"):
+        assert 0 <= risiko[name] <= 1, name
+    for name in ("negatives_eigenkapital_pro_jahr", "cashflow_unter_schwelle_pro_jahr"):
+        assert len(risiko[name]) == 40
+        assert all(0 <= wert <= 1 for wert in risiko[name]), name
+
+
+@pytest.mark.parametrize("parameter", [
+    {"seed": -1},
+    {"annahmen": {"zins_volatilitaet": -1}},
+    {"annahmen": {"mieterwechsel_quote": 1.5}},
+    {"annahmen": {"leerstand_max_monate": 13}},
+    {"annahmen": {"unbekannt": 1}},
+    {"jahre": 60, "pfade": 100000},
+])
+def test_ungueltige_eingaben(parameter):
+    with pytest.raises(MonteCarloError):
+        run_monte_carlo(**{**BEISPIEL, "pfade": 100, **parameter})
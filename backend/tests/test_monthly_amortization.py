@@ -0,0 +1,174 @@
+"""
+Monatlicher Tilgungsplan (monthly_amortization.py) gegen eine skalare Monatsschleife
+mit Zinsbindung/Anschlusszins bzw. Zinspfad, Sondertilgung und tilgungsfreien Jahren.
+"""
+
+import math
+import random
+
+import numpy as np
+import pytest
+
+from monthly_amortization import monatsplan_batch, monatsplan_views
+from schemas import YearlyProjection
+
+
+def schleife_monatsplan(kaufpreis, eigenkapital, tilgung, monatliche_miete, nebenkosten, jahre,
+                        mietsteigerung, wertsteigerung, zinsen_pro_jahr, sondertilgung, tilgungsfreie_jahre):
+    """Referenz: Monat für Monat, eine Variante, Zinssatz und Sondertilgung je Jahr als Liste"""
+    finanzierungssumme = kaufpreis - eigenkapital
+    rest = max(0.0, finanzierungssumme)
+    rate = 0.0
+    erste_annuitaet = None
+    getilgt_gesamt = 0.0
+    miete, wert = monatliche_miete, kaufpreis
+    abbezahlt = None
+    zeilen = []
+    for jahr in range(jahre):
+        zins = zinsen_pro_jahr[jahr]
+        tilgungsfrei = jahr < tilgungsfreie_jahre
+        if tilgungsfrei:
+            rate = rest * zins / 1200
+        elif jahr == 0 or jahr == tilgungsfreie_jahre or zins != zinsen_pro_jahr[jahr - 1]:
+            rate = rest * (zins + tilgung) / 1200
+        if not tilgungsfrei and erste_annuitaet is None:
+            erste_annuitaet = rate
+
+        zinsen = getilgt = 0.0
+        for monat in range(12):
+            zinsen_monat = rest * zins / 1200
+            tilgung_monat = 0.0 if tilgungsfrei else min(max(rate - zinsen_monat, 0.0), rest)
+            rest -= tilgung_monat
+            zinsen += zinsen_monat
+            getilgt += tilgung_monat
+            if abbezahlt is None and rest <= 0 and finanzierungssumme > 0:
+                abbezahlt = jahr * 12 + monat + 1
+        sonder = min(sondertilgung[jahr], rest)
+        rest -= sonder
+        if abbezahlt is None and rest <= 0 and finanzierungssumme > 0:
+            abbezahlt = (jahr + 1) * 12
+        getilgt_gesamt += getilgt + sonder
+
+        cashflow = miete * 12 - (zinsen + getilgt) - nebenkosten * 12
+        zeilen.append({
+            "restschuld": rest,
+            "getilgt": getilgt_gesamt,
+            "zinsen_jahr": zinsen,
+            "tilgung_jahr": getilgt + sonder,
+            "sondertilgung_jahr": sonder,
+            "jaehrlicher_cashflow": cashflow,
+            "immobilienwert": wert,
+            "aktuelle_miete": miete,
+            "monatliche_rate": rate if rest > 0 else 0.0,
+        })
+        miete *= 1 + mietsteigerung / 100
+        wert *= 1 + wertsteigerung / 100
+    if erste_annuitaet is None:
+        erste_annuitaet = rest * (zinsen_pro_jahr[-1] + tilgung) / 1200
+    return zeilen, erste_annuitaet, abbezahlt
+
+
+def _zufallsvarianten(anzahl, jahre, seed):
+    rng = random.Random(seed)
+    varianten = []
+    for _ in range(anzahl):
+        kaufpreis = rng.uniform(1e5, 1e6)
+        varianten.append({
+            "kaufpreis": kaufpreis,
+            "eigenkapital": kaufpreis * rng.uniform(0, 0.5),
+            "zinssatz": rng.choice([0.0, rng.uniform(0.5, 6)]),
+            "tilgung": rng.uniform(1, 6),
+            "monatliche_miete": kaufpreis * rng.uniform(0.03, 0.05) / 12,
+            "nebenkosten": rng.uniform(100, 500),
+            "mietsteigerung": rng.uniform(0, 3),
+            "wertsteigerung": rng.uniform(-1, 3),
+            "zinsbindung_jahre": rng.choice([5, 10, 15, 1000]),
+            "anschlusszins": rng.uniform(0.5, 7),
+            "sondertilgung": [rng.choice([0.0, rng.uniform(0, 20000)]) for _ in range(jahre)],
+            "tilgungsfreie_jahre": rng.choice([0, 0, 1, 3]),
+        })
+    return varianten
+
+
+def _vergleichen(batch, varianten, zinsen, jahre):
+    for index, variante in enumerate(varianten):
+        zeilen, erste_annuitaet, abbezahlt = schleife_monatsplan(
+            variante["kaufpreis"], variante["eigenkapital"], variante["tilgung"], variante["monatliche_miete"],
+            variante["nebenkosten"], jahre, variante["mietsteigerung"], variante["wertsteigerung"],
+            zinsen[index], variante["sondertilgung"], variante["tilgungsfreie_jahre"],
+        )
+        for feld in zeilen[0]:
+            erwartet = [zeile[feld] for zeile in zeilen]
+            assert batch[feld][index] == pytest.approx(erwartet, rel=1e-9, abs=1e-6), (index, feld)
+        assert batch["jaehrliche_rate"][index] == pytest.approx(erste_annuitaet * 12, rel=1e-12)
+        monate = batch["abbezahlt_nach_monaten"][index]
+        assert (None if math.isnan(monate) else int(monate)) == abbezahlt
+
+
+def _spalten(varianten, feld):
+    return np.array([variante[feld] for variante in varianten])
+
+
+def test_zinsbindung_sondertilgung_tilgungsfrei_wie_schleife():
+    jahre = 30
+    varianten = _zufallsvarianten(300, jahre, seed=9)
+    batch = monatsplan_batch(
+        **{feld: _spalten(varianten, feld) for feld in (
+            "kaufpreis", "eigenkapital", "zinssatz", "tilgung", "monatliche_miete", "nebenkosten",
+            "mietsteigerung", "wertsteigerung", "zinsbindung_jahre", "anschlusszins", "sondertilgung",
+            "tilgungsfreie_jahre",
+        )},
+        jahre=jahre,
+    )
+    zinsen = [
+        [v["zinssatz"] if jahr < v["zinsbindung_jahre"] else v["anschlusszins"] for jahr in range(jahre)]
+        for v in varianten
+    ]
+    _vergleichen(batch, varianten, zinsen, jahre)
+
+
+def test_zinspfad_wie_schleife():
+    jahre = 20
+    varianten = _zufallsvarianten(50, jahre, seed=4)
+    rng = random.Random(1)
+    zinspfad = [[round(rng.uniform(1, 6), 1) for _ in range(jahre)] for _ in varianten]
+    batch = monatsplan_batch(
+        **{feld: _spalten(varianten, feld) for feld in (
+            "kaufpreis", "eigenkapital", "zinssatz", "tilgung", "monatliche_miete", "nebenkosten",
+            "mietsteigerung", "wertsteigerung", "sondertilgung", "tilgungsfreie_jahre",
+        )},
+        jahre=jahre,
+        zinspfad=zinspfad,
+    )
+    _vergleichen(batch, varianten, zinspfad, jahre)
+
+
+def test_jahreszeilen_sind_yearly_projection():
+    jahre = 15
+    varianten = _zufallsvarianten(20, jahre, seed=2)
+    batch = monatsplan_batch(
+        **{feld: _spalten(varianten, feld) for feld in (
+            "kaufpreis", "eigenkapital", "zinssatz", "tilgung", "monatliche_miete", "nebenkosten",
+            "zinsbindung_jahre", "anschlusszins", "sondertilgung", "tilgungsfreie_jahre",
+        )},
+        jahre=jahre,
+    )
+    for plan in monatsplan_views(batch):
+        assert len(plan["jahre"]) == jahre
+        for zeile in plan["jahre"]:
+            YearlyProjection.model_validate(zeile)
+
+
+def test_rate_nach_tilgungsfreien_jahren():
+    # 240.000 EUR zu 3,75 % + 2 % Tilgung: 750 EUR Zinsen im Anlaufjahr, danach 1.150 EUR Annuität
+    batch = monatsplan_batch(300000, 60000, 3.75, 2.0, 1000, 200, jahre=10, tilgungsfreie_jahre=1)
+    plan = monatsplan_views(batch)[0]
+    assert plan["jahre"][0]["monatliche_rate"] == 750.0
+    assert plan["jahre"][1]["monatliche_rate"] == 1150.0
+    assert plan["zusammenfassung"]["monatliche_rate"] == 1150.0
+
+
+@pytest.mark.parametrize("parameter", [{"sondertilgung": -1000.0}, {"tilgungsfreie_jahre": -1}])
+def test_negative_eingaben(parameter):
+    with pytest.raises(ValueError):
+        monatsplan_batch(300000, 60000, 3.75, 2.0, 1000, 200, jahre=10, **parameter)
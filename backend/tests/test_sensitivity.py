@@ -0,0 +1,89 @@
+"""
+Sensitivitätsraster (sensitivity.py): Zellen wie calculate_cashflow, analytische
+Break-Even-Linie und Validierung der Achsen.
+"""
+
+import itertools
+
+import numpy as np
+import pytest
+
+from main import calculate_cashflow
+from sensitivity import PARAMETER, SensitivityError, break_even, cashflow_raster, sensitivity_analysis
+
+BASIS = {"kaufpreis": 300000.0, "monatliche_miete": 1100.0, "nebenkosten": 250.0,
+         "eigenkapital": 60000.0, "zinssatz": 3.5, "tilgung": 2.0}
+BASIS_EK_PROZENT = {**{k: v for k, v in BASIS.items() if k != "eigenkapital"}, "eigenkapital_prozent": 20.0}
+
+ACHSEN = [
+    {"parameter": "zinssatz", "werte": [1.0, 3.75, 6.5]},
+    {"parameter": "monatliche_miete", "von": 800, "bis": 1600, "schritte": 4},
+]
+
+
+def _achsen_werte(achse):
+    return achse["werte"] if "werte" in achse else np.linspace(achse["von"], achse["bis"], achse["schritte"]).tolist()
+
+
+def _cashflow(werte, ek_in_prozent):
+    """Monatlicher Cashflow wie calculate_cashflow, ungerundet"""
+    eigenkapital = werte["kaufpreis"] * werte["eigenkapital_prozent"] / 100 if ek_in_prozent else werte["eigenkapital"]
+    rate = (werte["kaufpreis"] - eigenkapital) * ((werte["zinssatz"] + werte["tilgung"]) / 100) / 12
+    return werte["monatliche_miete"] - rate - werte["nebenkosten"]
+
+
+def test_zellen_wie_calculate_cashflow():
+    achsen = ACHSEN + [{"parameter": "eigenkapital", "werte": [0.0, 45000.0, 90000.0]}]
+    raster = cashflow_raster(BASIS, achsen)
+    assert raster.shape == (3, 4, 3)
+    for index in np.ndindex(raster.shape):
+        werte = dict(BASIS)
+        for achse, i in zip(achsen, index):
+            werte[achse["parameter"]] = _achsen_werte(achse)[i]
+        erwartet = calculate_cashflow(**werte)["monatlicher_cashflow"]
+        assert round(float(raster[index]), 2) == erwartet, werte
+
+
+@pytest.mark.parametrize("basis", [BASIS, BASIS_EK_PROZENT], ids=["ek_absolut", "ek_prozent"])
+@pytest.mark.parametrize("parameter", PARAMETER)
+def test_break_even_ergibt_cashflow_null(basis, parameter):
+    linie = break_even(basis, ACHSEN, parameter)
+    namen = [achse["parameter"] for achse in ACHSEN]
+    ek_in_prozent = parameter == "eigenkapital_prozent" or (parameter != "eigenkapital" and "eigenkapital_prozent" in basis)
+
+    for index in itertools.product(*(range(len(_achsen_werte(achse))) for achse in ACHSEN)):
+        werte = {"eigenkapital": 0.0, "eigenkapital_prozent": 0.0, **basis}
+        for achse, i in zip(ACHSEN, index):
+            werte[achse["parameter"]] = _achsen_werte(achse)[i]
+        # Die Achse des aufgelösten Parameters fällt im Ergebnis weg
+        linien_index = tuple(i for name, i in zip(namen, index) if name != parameter)
+        werte[parameter] = float(linie[linien_index])
+        assert _cashflow(werte, ek_in_prozent) == pytest.approx(0, abs=1e-6), (parameter, werte)
+
+
+def test_break_even_nan_ohne_rate():
+    basis = {**BASIS, "tilgung": 0.0}
+    achsen = [{"parameter": "zinssatz", "werte": [0.0, 2.0]}]
+    for parameter in ("eigenkapital", "kaufpreis", "eigenkapital_prozent"):
+        linie = break_even(basis, achsen, parameter)
+        assert np.isnan(linie[0]), parameter
+        assert np.isfinite(linie[1]), parameter
+
+    ergebnis = sensitivity_analysis(basis, achsen, "eigenkapital")
+    assert ergebnis["break_even"]["werte"][0] is None
+
+
+@pytest.mark.parametrize("achsen", [
+    # Zu großes Raster (100 x 100 x 100 Zellen)
+    [{"parameter": name, "von": 1, "bis": 2, "schritte": 100} for name in ("zinssatz", "tilgung", "monatliche_miete")],
+    # Doppelte Achse
+    [{"parameter": "zinssatz", "werte": [1, 2]}, {"parameter": "zinssatz", "werte": [3, 4]}],
+    # Eigenkapital absolut und in Prozent
+    [{"parameter": "eigenkapital", "werte": [0, 1]}, {"parameter": "eigenkapital_prozent", "werte": [10, 20]}],
+    # Unbekannter Parameter, fehlende Schritte
+    [{"parameter": "grundsteuer", "werte": [1, 2]}],
+    [{"parameter": "zinssatz", "von": 1, "bis": 2}],
+])
+def test_ungueltige_achsen(achsen):
+    with pytest.raises(SensitivityError):
+        sensitivity_analysis(BASIS, achsen)
@@ -0,0 +1,44 @@
+"""
+Preis-Extraktion aus gespeicherten DuckDuckGo-Ergebnisseiten (tests/fixtures)
+"""
+
+import pytest
+
+from web_search import dedupe_results, extract_prices, parse_search_html
+
+
+def test_treffer_und_urls(fixture_html):
+    result = parse_search_html("leipzig gohlis", fixture_html("ddg_leipzig_kaufpreise.html"))
+
+    assert [t["url"] for t in result["treffer"]] == [
+        "https://www.immowelt.de/immobilienpreise/leipzig-gohlis",
+        "https://www.immobilienscout24.de/expose/151234567",
+        "https://www.wohnungsboerse.net/mietspiegel-Leipzig/1234",
+    ]
+
+
+def test_kaufpreise_und_mieten(fixture_html):
+    result = parse_search_html("leipzig gohlis", fixture_html("ddg_leipzig_kaufpreise.html"))
+
+    # Skript-Inhalt (4.000 €/m²) und Flächen (85 m², 6 m2, 12 qm, 68 m2) zählen nicht
+    assert result["preise_qm"] == [3850.0, 9.8, 4200.0, 11.2, 8.75, 12.5]
+
+    statistik = dedupe_results([result])[0]["preise_qm"]
+    assert statistik["kauf"] == {"anzahl": 2, "median": 4025.0, "min": 3850.0, "max": 4200.0}
+    assert statistik["miete"]["anzahl"] == 4
+    assert statistik["miete"]["median"] == pytest.approx(10.5)
+    assert statistik["miete"]["max"] == 12.5
+
+
+def test_flaechen_sind_keine_preise():
+    assert extract_prices("Wohnung 85 m² für 4.200 €/m², Miete 11,20 €/m²") == [4200.0, 11.2]
+    assert extract_prices("68 m2 Wohnfläche, Balkon 6 qm, Grundstück 450 Quadratmeter") == []
+
+
+def test_fallback_auf_sichtbaren_text(fixture_html):
+    """Geändertes Markup ohne erkennbare Treffer: Preise aus dem sichtbaren Text (ohne <script>)"""
+    result = parse_search_html("dresden neustadt", fixture_html("ddg_markup_geaendert.html"))
+
+    assert result["treffer"] == []
+    assert result["preise_qm"] == [3400.0, 10.2]
+    assert dedupe_results([result])[0]["preise_qm"]["kauf"]["median"] == 3400.0
@@ -0,0 +1,117 @@
+"""
+Stufen-Timing für Requests
+- span("name") misst einen Abschnitt (Web-Suche, LLM-Call, Berechnung, DB-Commit ...)
+- Pro Request werden die Spans als Server-Timing-Header ausgegeben
+  (sichtbar in den DevTools unter "Timing")
+- Alle Spans und Request-Dauern landen in Histogrammen für /metrics (Prometheus-Textformat)
+
+Spans funktionieren auch in Tasks und Threadpool-Funktionen, die innerhalb
+des Requests gestartet werden (contextvars).
+"""
+
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+import re
+import threading
+import time
+
+# Obergrenzen der Histogramm-Buckets in Sekunden
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_request_spans: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_spans", default=None)
+
+
+class Histogram:
+    """Kumulatives Histogramm mit festen Buckets pro Label-Kombination"""
+
+    def __init__(self, name: str, beschreibung: str, labels: Tuple[str, ...]):
+        self.name = name
+        self.beschreibung = beschreibung
+        self.labels = labels
+        self._werte: Dict[Tuple[str, ...], List[float]] = {}  # Bucket-Zähler + [summe, anzahl]
+        self._lock = threading.Lock()  # sync Endpoints laufen im Threadpool
+
+    def observe(self, sekunden: float, *label_werte: str):
+        index = bisect_left(BUCKETS, sekunden)
+        with self._lock:
+            werte = self._werte.setdefault(label_werte, [0] * (len(BUCKETS) + 2))
+            if index < len(BUCKETS):
+                werte[index] += 1
+            werte[-2] += sekunden
+            werte[-1] += 1
+
+    def render(self) -> List[str]:
+        zeilen = [f"# HELP {self.name} {self.beschreibung}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            eintraege = sorted((k, list(v)) for k, v in self._werte.items())
+        for label_werte, werte in eintraege:
+            labels = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labels, label_werte))
+            kumuliert = 0
+            for grenze, anzahl in zip(BUCKETS, werte):
+                kumuliert += anzahl
+                zeilen.append(f'{self.name}_bucket{{{labels},le="{grenze}"}} {kumuliert}')
+            zeilen.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {werte[-1]}')
+            zeilen.append(f"{self.name}_sum{{{labels}}} {round(werte[-2], 6)}")
+            zeilen.append(f"{self.name}_count{{{labels}}} {werte[-1]}")
+        return zeilen
+
+
+def _escape(wert: str) -> str:
+    return wert.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+stage_seconds = Histogram("amlaki_stage_seconds", "Dauer einzelner Verarbeitungsstufen", ("stage",))
+request_seconds = Histogram("amlaki_request_seconds", "Dauer der HTTP-Requests", ("method", "route", "status"))
+
+
+@contextmanager
+def span(name: str):
+    """
+    Misst einen Abschnitt.
+
+    Verwendung:
+        with span("llm_analyze"):
+            response = await create_message(...)
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        dauer = time.perf_counter() - start
+        stage_seconds.observe(dauer, name)
+        spans = _request_spans.get()
+        if spans is not None:
+            spans.append((name, dauer))
+
+
+def start_request():
+    """Beginnt die Span-Sammlung für den aktuellen Request (Token für end_request)"""
+    return _request_spans.set([])
+
+
+def end_request(token) -> List[Tuple[str, float]]:
+    """Beendet die Span-Sammlung und gibt die Spans des Requests zurück"""
+    spans = _request_spans.get() or []
+    _request_spans.reset(token)
+    return spans
+
+
+def server_timing_header(spans: List[Tuple[str, float]], gesamt: Optional[float] = None) -> str:
+    """
+    Formatiert Spans als Server-Timing-Header, z.B. "search;dur=812.4, llm_research;dur=4310.0".
+    Mehrfach gemessene Stufen (z.B. zwei DB-Commits) werden addiert.
+    """
+    summen: Dict[str, float] = {}
+    for name, dauer in spans:
+        summen[name] = summen.get(name, 0.0) + dauer
+    eintraege = [f"{re.sub(r'[^A-Za-z0-9_-]', '_', name)};dur={dauer * 1000:.1f}" for name, dauer in summen.items()]
+    if gesamt is not None:
+        eintraege.append(f"total;dur={gesamt * 1000:.1f}")
+    return ", ".join(eintraege)
+
+
+def render_metrics() -> str:
+    """Alle Histogramme im Prometheus-Textformat"""
+    return "\n".join(stage_seconds.render() + request_seconds.render()) + "\n"
@@ -0,0 +1,318 @@
+"""
+Web-Suche für die Live-Marktdaten-Recherche
+Gemeinsamer HTTP-Client (Keep-Alive, HTTP/2 falls verfügbar) und parallele Suchstufe.
+
+Konfiguration über Environment Variablen:
+- MARKET_SEARCH_FANOUT: Anzahl gleichzeitig gestarteter Suchanfragen (default: 4)
+- MARKET_SEARCH_DEADLINE: Max. Dauer der gesamten Suchstufe in Sekunden (default: 8)
+- MARKET_SEARCH_TIMEOUT: Timeout pro Suchanfrage in Sekunden (default: 15)
+- MARKET_SEARCH_MAX_RESULTS: Max. Treffer pro Suchanfrage im Prompt (default: 8)
+- HTTP_TRANSPORT_MODE: live, record oder replay (siehe http_replay.py)
+"""
+
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+import asyncio
+import os
+import re
+import statistics
+
+import httpx
+
+from http_replay import build_transport
+
+MARKET_SEARCH_FANOUT = int(os.getenv("MARKET_SEARCH_FANOUT", "4"))
+MARKET_SEARCH_DEADLINE = float(os.getenv("MARKET_SEARCH_DEADLINE", "8"))
+MARKET_SEARCH_TIMEOUT = float(os.getenv("MARKET_SEARCH_TIMEOUT", "15"))
+MARKET_SEARCH_MAX_RESULTS = int(os.getenv("MARKET_SEARCH_MAX_RESULTS", "8"))
+
+# Preisangaben wie "4.500 €/m²", "12,50 Euro pro qm", "3200 EUR/Quadratmeter".
+# Die Währung ist Pflicht - sonst würden Flächen wie "85 m²" als Preis gezählt.
+PRICE_PATTERN = re.compile(
+    r'(?<![\d.,])(\d{1,2}[.,]?\d{0,3})\s*(?:€|Euro|EUR)\s*(?:/|pro|je)?\s*(?:m²|m2|qm|Quadratmeter)',
+    re.IGNORECASE
+)
+MAX_SNIPPET_CHARS = 300
+
+# €/m²-Werte darunter sind Mieten, darüber Kaufpreise
+MIETE_MAX_QM = 100
+
+DUCKDUCKGO_URL = "https://html.duckduckgo.com/html/"
+SEARCH_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36"
+}
+
+try:
+    import h2  # noqa: F401 - nur Verfügbarkeit prüfen
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+_search_client: Optional[httpx.AsyncClient] = None
+
+
+def get_search_client() -> httpx.AsyncClient:
+    """Gibt den gemeinsamen HTTP-Client für Web-Suchen zurück"""
+    global _search_client
+    if _search_client is None:
+        limits = httpx.Limits(max_connections=20, max_keepalive_connections=10)
+        _search_client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=MARKET_SEARCH_TIMEOUT,
+            headers=SEARCH_HEADERS,
+            limits=limits,
+            transport=build_transport("search", http2=HTTP2_AVAILABLE, limits=limits),
+        )
+    return _search_client
+
+
+async def close_search_client():
+    """Schließt den HTTP-Client (beim Shutdown)"""
+    global _search_client
+    if _search_client is not None:
+        await _search_client.aclose()
+        _search_client = None
+
+
+class _DuckDuckGoParser(HTMLParser):
+    """Sammelt Titel, Snippet und URL der Treffer aus der DuckDuckGo HTML-Seite"""
+
+    FELDER = {"result__a": "titel", "result__snippet": "snippet", "result__url": "anzeige_url"}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.treffer: List[Dict[str, str]] = []
+        self._feld: Optional[str] = None
+        self._tiefe = 0
+        self._text: List[str] = []
+        self._ignorieren = 0  # innerhalb von <script>/<style>
+        self.sichtbarer_text: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self._ignorieren += 1
+            return
+        if self._feld:
+            self._tiefe += 1
+            return
+        attrs = dict(attrs)
+        klassen = (attrs.get("class") or "").split()
+        for klasse, feld in self.FELDER.items():
+            if klasse in klassen:
+                if feld == "titel" or not self.treffer:
+                    self.treffer.append({})
+                if feld == "titel":
+                    self.treffer[-1]["url"] = _resolve_url(attrs.get("href", ""))
+                self._feld = feld
+                self._tiefe = 0
+                self._text = []
+                break
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style"):
+            self._ignorieren = max(0, self._ignorieren - 1)
+            return
+        if not self._feld:
+            return
+        if self._tiefe:
+            self._tiefe -= 1
+            return
+        self.treffer[-1][self._feld] = _clean_text(" ".join(self._text))
+        self._feld = None
+
+    def handle_data(self, data):
+        if self._ignorieren:
+            return
+        self.sichtbarer_text.append(data)
+        if self._feld:
+            self._text.append(data)
+
+
+def _clean_text(text: str) -> str:
+    """Entfernt überflüssige Leerzeichen"""
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def _resolve_url(href: str) -> str:
+    """Löst DuckDuckGo-Weiterleitungen (//duckduckgo.com/l/?uddg=...) zur Ziel-URL auf"""
+    if not href:
+        return ""
+    parsed = urlparse(href)
+    if parsed.path.startswith("/l/"):
+        ziel = parse_qs(parsed.query).get("uddg")
+        if ziel:
+            return ziel[0]
+    if href.startswith("//"):
+        return "https:" + href
+    return href
+
+
+def _url_key(url: str) -> str:
+    """Vergleichsschlüssel für URLs (ohne Schema, www, Query und abschließenden Slash)"""
+    parsed = urlparse(url)
+    host = parsed.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return f"{host}{parsed.path.rstrip('/')}"
+
+
+def parse_price(raw: str) -> Optional[float]:
+    """
+    Wandelt eine Preisangabe im deutschen Format in eine Zahl um.
+    "4.500" → 4500.0 (Tausenderpunkt), "12,50" → 12.5 (Dezimalkomma)
+    """
+    if "." in raw:
+        ganz, rest = raw.split(".", 1)
+        raw = ganz + rest if len(rest) == 3 else f"{ganz}.{rest}"
+    raw = raw.replace(",", ".")
+    try:
+        wert = float(raw)
+    except ValueError:
+        return None
+    return wert if wert > 0 else None
+
+
+def extract_prices(text: str) -> List[float]:
+    """Findet alle €/m²-Angaben in einem Text"""
+    preise = []
+    for raw in PRICE_PATTERN.findall(text):
+        wert = parse_price(raw)
+        if wert is not None:
+            preise.append(wert)
+    return preise
+
+
+def _price_stats(preise: List[float]) -> Optional[Dict[str, float]]:
+    """Median, Minimum und Maximum einer Preisliste (None wenn leer)"""
+    if not preise:
+        return None
+    return {
+        "anzahl": len(preise),
+        "median": round(statistics.median(preise), 2),
+        "min": min(preise),
+        "max": max(preise),
+    }
+
+
+def summarize_prices(preise: List[float]) -> Optional[Dict[str, Optional[Dict[str, float]]]]:
+    """Kennzahlen getrennt nach Kaufpreisen und Mieten pro m² (None wenn keine Preise)"""
+    if not preise:
+        return None
+    return {
+        "kauf": _price_stats([p for p in preise if p >= MIETE_MAX_QM]),
+        "miete": _price_stats([p for p in preise if p < MIETE_MAX_QM]),
+    }
+
+
+def parse_search_html(query: str, html: str) -> dict:
+    """
+    Reduziert eine DuckDuckGo-Ergebnisseite auf Treffer (Titel, Snippet, URL)
+    und die darin genannten €/m²-Preise.
+
+    Liefert die Seite keine erkennbaren Treffer (z.B. geändertes Markup),
+    werden die Preise aus dem sichtbaren Text der Seite gelesen.
+    """
+    parser = _DuckDuckGoParser()
+    try:
+        parser.feed(html)
+        parser.close()
+    except Exception:
+        pass
+
+    treffer = []
+    for eintrag in parser.treffer:
+        if not eintrag.get("url") and not eintrag.get("snippet"):
+            continue
+        treffer.append({
+            "titel": eintrag.get("titel", ""),
+            "snippet": eintrag.get("snippet", "")[:MAX_SNIPPET_CHARS],
+            "url": eintrag.get("url") or eintrag.get("anzeige_url", ""),
+        })
+
+    if treffer:
+        preise = [p for t in treffer for p in extract_prices(f"{t['titel']} {t['snippet']}")]
+    else:
+        preise = extract_prices(_clean_text(" ".join(parser.sichtbarer_text)))
+
+    return {"query": query, "treffer": treffer, "preise_qm": preise}
+
+
+def dedupe_results(results: List[dict]) -> List[dict]:
+    """
+    Entfernt Treffer, die schon bei einer früheren Suchanfrage vorkamen (gleiche URL),
+    begrenzt die Treffer pro Anfrage und berechnet die Preis-Kennzahlen.
+    """
+    gesehen = set()
+    bereinigt = []
+    for result in results:
+        if "treffer" not in result:
+            bereinigt.append(result)
+            continue
+
+        treffer = []
+        preise = []
+        for eintrag in result["treffer"]:
+            key = _url_key(eintrag["url"]) if eintrag["url"] else eintrag["snippet"]
+            if key in gesehen:
+                continue
+            gesehen.add(key)
+            if len(treffer) < MARKET_SEARCH_MAX_RESULTS:
+                treffer.append(eintrag)
+                preise.extend(extract_prices(f"{eintrag['titel']} {eintrag['snippet']}"))
+
+        if not result["treffer"]:
+            # Preise aus dem Seitentext (keine Treffer erkannt)
+            preise = result["preise_qm"]
+
+        bereinigt.append({
+            "query": result["query"],
+            "treffer": treffer,
+            "preise_qm": summarize_prices(preise),
+        })
+    return bereinigt
+
+
+async def duckduckgo_search(query: str) -> Optional[dict]:
+    """
+    Führt eine DuckDuckGo HTML-Suche aus (kein API-Key nötig).
+
+    Returns:
+        Dict mit Query, Treffern und gefundenen Preisangaben (None bei HTTP-Fehlerstatus)
+    """
+    try:
+        response = await get_search_client().get(DUCKDUCKGO_URL, params={"q": query})
+        if response.status_code == 200:
+            return parse_search_html(query, response.text)
+    except Exception as e:
+        return {"query": query, "error": str(e)}
+    return None
+
+
+async def run_search_stage(queries: List[str], deadline: Optional[float] = None) -> List[dict]:
+    """
+    Startet alle Suchanfragen gleichzeitig und wartet höchstens `deadline` Sekunden.
+    Was bis dahin angekommen ist, wird verwendet; der Rest wird abgebrochen.
+
+    Args:
+        queries: Suchanfragen (es werden max. MARKET_SEARCH_FANOUT verwendet)
+        deadline: Max. Dauer in Sekunden (default: MARKET_SEARCH_DEADLINE)
+
+    Returns:
+        Ergebnisse in Reihenfolge der Queries, Treffer über alle Queries dedupliziert
+    """
+    queries = queries[:MARKET_SEARCH_FANOUT]
+    if not queries:
+        return []
+
+    tasks = [asyncio.create_task(duckduckgo_search(query)) for query in queries]
+    await asyncio.wait(tasks, timeout=deadline if deadline is not None else MARKET_SEARCH_DEADLINE)
+
+    results = []
+    for query, task in zip(queries, tasks):
+        if not task.done():
+            task.cancel()
+            results.append({"query": query, "error": "Zeitlimit der Suche überschritten"})
+        elif task.result() is not None:
+            results.append(task.result())
+    return dedupe_results(results)
@@ -96,8 +96,10 @@ function AIChat({ analysisContext, isProjectSpecific = false }) {
     const stadtMatch = question.match(/(?:in|für|nach)\s+([A-ZÄÖÜa-zäöüß-]+(?:\s+[A-ZÄÖÜa-zäöüß-]+)?)/i);
     const detectedStadt = stadtMatch ? stadtMatch[1] : stadtInput;
 
+    let started = false;
+
     try {
-      const response = await fetch(`${API_BASE}/chat`, {
+      const response = await fetch(`${API_BASE}/chat/stream`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -110,34 +112,83 @@ function AIChat({ analysisContext, isProjectSpecific = false }) {
         })
       });
 
-      if (response.ok) {
-        const data = await response.json();
-        // Zeige Info wenn Live-Daten verwendet wurden
-        let responseText = data.response;
-        if (data.marktdaten_verwendet) {
-          responseText = `🔴 *Live-Daten für ${data.recherche_standort}*\n\n${responseText}`;
+      if (!response.ok || !response.body) {
+        throw new Error('Chat nicht verfügbar');
+      }
+
+      // Antwort kommt als Server-Sent Events: meta, delta (Textstücke), done, error
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = '';
+      let prefix = '';
+      let text = '';
+
+      const updateAssistant = (patch) => {
+        setMessages(prev => {
+          const next = [...prev];
+          next[next.length - 1] = { ...next[next.length - 1], ...patch };
+          return next;
+        });
+      };
+
+      const handleEvent = (event, data) => {
+        if (event === 'meta' && data.marktdaten_verwendet) {
+          // Zeige Info wenn Live-Daten verwendet wurden
+          prefix = `🔴 *Live-Daten für ${data.recherche_standort}*\n\n`;
+        } else if (event === 'delta') {
+          text += data.text;
+          if (!started) {
+            started = true;
+            setIsLoading(false);
+            setMessages(prev => [...prev, { role: 'assistant', content: prefix + text }]);
+          } else {
+            updateAssistant({ content: prefix + text });
+          }
+        } else if (event === 'done' && started) {
+          updateAssistant({
+            liveData: data.marktdaten_verwendet,
+            standort: data.recherche_standort
+          });
+        } else if (event === 'error') {
+          throw new Error(data.detail);
         }
-        setMessages(prev => [...prev, {
-          role: 'assistant',
-          content: responseText,
-          liveData: data.marktdaten_verwendet,
-          standort: data.recherche_standort
-        }]);
+      };
+
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+
+        let boundary;
+        while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+          const block = buffer.slice(0, boundary);
+          buffer = buffer.slice(boundary + 2);
+          const event = block.match(/^event: (.*)$/m)?.[1];
+          const data = block.match(/^data: (.*)$/m)?.[1];
+          if (event && data) handleEvent(event, JSON.parse(data));
+        }
+      }
+
+      if (!started) {
+        throw new Error('Leere Antwort');
+      }
+    } catch (error) {
+      if (started) {
+        // Abbruch mitten im Stream: bisherigen Text behalten
+        setMessages(prev => {
+          const next = [...prev];
+          const last = next[next.length - 1];
+          next[next.length - 1] = { ...last, content: `${last.content}\n\n⚠️ Antwort unvollständig: ${error.message}` };
+          return next;
+        });
       } else {
-        // Fallback to local knowledge base
+        // Use local knowledge base if API fails
         const localResponse = generateLocalResponse(question);
         setMessages(prev => [...prev, {
           role: 'assistant',
           content: localResponse
         }]);
       }
-    } catch (error) {
-      // Use local knowledge base if API fails
-      const localResponse = generateLocalResponse(question);
-      setMessages(prev => [...prev, {
-        role: 'assistant',
-        content: localResponse
-      }]);
     } finally {
       setIsLoading(false);
     }
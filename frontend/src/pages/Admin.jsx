@@ -268,6 +268,67 @@ function Admin() {
           </div>
         )}
 
+        {/* Cache Stats */}
+        {stats && (stats.analysis_cache || stats.market_cache || stats.pdf_cache || stats.analysis_jobs || stats.rechenkontext) && (
+          <div className="grid grid-cols-2 md:grid-cols-3 gap-4 fade-in fade-in-delay-2">
+            {stats.analysis_cache && (
+              <div className="glass-card rounded-xl p-4 border border-white/10">
+                <p className="text-text-muted text-xs mb-1">KI-Bewertungs-Cache Trefferquote</p>
+                <p className="text-xl font-bold text-white">
+                  {stats.analysis_cache.hit_rate != null ? `${Math.round(stats.analysis_cache.hit_rate * 100)}%` : '–'}
+                  <span className="text-text-muted text-sm font-normal ml-2">
+                    ({stats.analysis_cache.hits}/{stats.analysis_cache.anfragen})
+                  </span>
+                </p>
+              </div>
+            )}
+            {stats.market_cache && (
+              <div className="glass-card rounded-xl p-4 border border-white/10">
+                <p className="text-text-muted text-xs mb-1">Marktdaten-Cache Trefferquote</p>
+                <p className="text-xl font-bold text-white">
+                  {stats.market_cache.hit_rate != null ? `${Math.round(stats.market_cache.hit_rate * 100)}%` : '–'}
+                  <span className="text-text-muted text-sm font-normal ml-2">
+                    ({stats.market_cache.hits + stats.market_cache.stale_hits}/{stats.market_cache.anfragen})
+                  </span>
+                </p>
+              </div>
+            )}
+            {stats.pdf_cache && (
+              <div className="glass-card rounded-xl p-4 border border-white/10">
+                <p className="text-text-muted text-xs mb-1">PDF-Cache Trefferquote</p>
+                <p className="text-xl font-bold text-white">
+                  {stats.pdf_cache.hit_rate != null ? `${Math.round(stats.pdf_cache.hit_rate * 100)}%` : '–'}
+                  <span className="text-text-muted text-sm font-normal ml-2">
+                    ({stats.pdf_cache.hits_memory + stats.pdf_cache.hits_db}/{stats.pdf_cache.anfragen})
+                  </span>
+                </p>
+              </div>
+            )}
+            {stats.rechenkontext && (
+              <div className="glass-card rounded-xl p-4 border border-white/10">
+                <p className="text-text-muted text-xs mb-1">Finanz-Berechnungen wiederverwendet</p>
+                <p className="text-xl font-bold text-white">
+                  {stats.rechenkontext.dedup_rate != null ? `${Math.round(stats.rechenkontext.dedup_rate * 100)}%` : '–'}
+                  <span className="text-text-muted text-sm font-normal ml-2">
+                    ({stats.rechenkontext.wiederverwendet}/{stats.rechenkontext.berechnet + stats.rechenkontext.wiederverwendet})
+                  </span>
+                </p>
+              </div>
+            )}
+            {stats.analysis_jobs && (
+              <div className="glass-card rounded-xl p-4 border border-white/10">
+                <p className="text-text-muted text-xs mb-1">Analyse-Warteschlange</p>
+                <p className="text-xl font-bold text-white">
+                  {stats.analysis_jobs.laufend}/{stats.analysis_jobs.workers} aktiv
+                  <span className="text-text-muted text-sm font-normal ml-2">
+                    ({stats.analysis_jobs.wartend} wartend, {stats.analysis_jobs.fehlgeschlagen} Fehler)
+                  </span>
+                </p>
+              </div>
+            )}
+          </div>
+        )}
+
         {/* Users Table */}
         <div className="glass-card rounded-2xl border border-white/10 overflow-hidden fade-in fade-in-delay-3">
           <div className="p-4 md:p-6 border-b border-white/10">
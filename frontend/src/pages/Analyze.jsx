@@ -109,20 +109,35 @@ function Analyze() {
     setLastFinanzierung(finanzierung);
 
     try {
-      const response = await fetch(`${API_BASE}/analyze`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${token}`
-        },
-        body: JSON.stringify({
-          property_data: propertyData,
-          verwendungszweck: newVerwendungszweck,
-          eigenkapital: finanzierung.eigenkapital,
-          zinssatz: finanzierung.zinssatz,
-          tilgung: finanzierung.tilgung,
-        }),
-      });
+      // Gespeicherte Analyse: nur Finanz-Blöcke + Score neu berechnen (ohne KI)
+      const response = analysisResult?.analysis_id
+        ? await fetch(`${API_BASE}/library/${analysisResult.analysis_id}/recalculate`, {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+              'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({
+              verwendungszweck: newVerwendungszweck,
+              eigenkapital: finanzierung.eigenkapital,
+              zinssatz: finanzierung.zinssatz,
+              tilgung: finanzierung.tilgung,
+            }),
+          })
+        : await fetch(`${API_BASE}/analyze`, {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+              'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({
+              property_data: propertyData,
+              verwendungszweck: newVerwendungszweck,
+              eigenkapital: finanzierung.eigenkapital,
+              zinssatz: finanzierung.zinssatz,
+              tilgung: finanzierung.tilgung,
+            }),
+          });
 
       if (!response.ok) {
         const errorData = await response.json();
@@ -136,7 +151,7 @@ function Analyze() {
       setError(err.message);
       setStep('result'); // Bleibe auf result Seite bei Fehler
     }
-  }, [propertyData, lastFinanzierung, token]);
+  }, [propertyData, lastFinanzierung, analysisResult, token]);
 
   // NEU: Neu-Analyse mit geändertem Eigenkapital
   const handleChangeEigenkapital = useCallback(async (neuesEigenkapital) => {
@@ -154,20 +169,35 @@ function Analyze() {
     setLastFinanzierung(updatedFinanzierung);
 
     try {
-      const response = await fetch(`${API_BASE}/analyze`, {
-        method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-          'Authorization': `Bearer ${token}`
-        },
-        body: JSON.stringify({
-          property_data: propertyData,
-          verwendungszweck: lastVerwendungszweck,
-          eigenkapital: neuesEigenkapital,
-          zinssatz: lastFinanzierung?.zinssatz || 3.75,
-          tilgung: lastFinanzierung?.tilgung || 1.25,
-        }),
-      });
+      // Gespeicherte Analyse: nur Finanz-Blöcke + Score neu berechnen (ohne KI)
+      const response = analysisResult?.analysis_id
+        ? await fetch(`${API_BASE}/library/${analysisResult.analysis_id}/recalculate`, {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+              'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({
+              verwendungszweck: lastVerwendungszweck,
+              eigenkapital: neuesEigenkapital,
+              zinssatz: lastFinanzierung?.zinssatz || 3.75,
+              tilgung: lastFinanzierung?.tilgung || 1.25,
+            }),
+          })
+        : await fetch(`${API_BASE}/analyze`, {
+            method: 'POST',
+            headers: {
+              'Content-Type': 'application/json',
+              'Authorization': `Bearer ${token}`
+            },
+            body: JSON.stringify({
+              property_data: propertyData,
+              verwendungszweck: lastVerwendungszweck,
+              eigenkapital: neuesEigenkapital,
+              zinssatz: lastFinanzierung?.zinssatz || 3.75,
+              tilgung: lastFinanzierung?.tilgung || 1.25,
+            }),
+          });
 
       if (!response.ok) {
         const errorData = await response.json();
@@ -180,7 +210,7 @@ function Analyze() {
     } catch (err) {
       setError(err.message);
     }
-  }, [propertyData, lastVerwendungszweck, lastFinanzierung, token]);
+  }, [propertyData, lastVerwendungszweck, lastFinanzierung, analysisResult, token]);
 
   const handleReset = useCallback(() => {
     setStep('upload');